@@ -0,0 +1,114 @@
+"""
+GraphManager のコールドスタート（load_graph）のベンチマーク
+
+テキスト形式（papers/*.nq + knowledge_graph.ttl）のパースと、
+バイナリスナップショット（knowledge_graph.snap）からの読み込みを比較する。
+
+    uv run python benchmarks/bench_cold_start.py --papers 1000 10000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from rdflib import RDF, BNode, Literal, URIRef
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+
+CONTENT_TYPES = (
+    (KG.Method, "method"),
+    (KG.Result, "result"),
+    (KG.Discussion, "discussion"),
+    (KG.Conclusion, "conclusion"),
+)
+
+
+def make_paper_quads(index: int) -> list:
+    """実験3件・コンテンツ各4件を持つ論文1件分のクワッド"""
+    paper = URIRef(f"urn:uuid:bench-{index:06d}")
+    quads = [
+        (paper, RDF.type, KG.Paper),
+        (paper, KG.paperTitle, Literal(f"Benchmark Paper {index}")),
+        (paper, KG.documentType, Literal("main")),
+    ]
+    for exp_index in range(3):
+        exp = BNode()
+        quads += [
+            (paper, KG.hasExperiment, exp),
+            (exp, RDF.type, KG.Experiment),
+            (exp, KG.experimentType, KG.Synthesis),
+        ]
+        for content_class, content_type in CONTENT_TYPES:
+            content = BNode()
+            text = f"{content_type} of experiment {exp_index} in paper {index}. " * 8
+            quads += [
+                (exp, KG.hasContent, content),
+                (content, RDF.type, content_class),
+                (content, KG.contentType, Literal(content_type)),
+                (content, KG.text, Literal(text)),
+            ]
+    corpus = (URIRef("urn:bench:corpus"), KG.hasPaper, paper, DATASET_DEFAULT_GRAPH_ID)
+    return [(s, p, o, paper) for s, p, o in quads] + [corpus]
+
+
+def write_config(base: Path, binary_snapshot: bool) -> str:
+    config_path = base / f"config_{binary_snapshot}.yaml"
+    config_path.write_text(
+        f"""
+storage:
+  graph_dir: "{(base / 'graphs').as_posix()}"
+  binary_snapshot: {str(binary_snapshot).lower()}
+""",
+        encoding="utf-8",
+    )
+    return str(config_path)
+
+
+def cold_start(config_path: str, repeat: int) -> float:
+    """GraphManager の生成（load_graph を含む）にかかる最短時間"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        GraphManager(config_path=config_path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(papers: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        gm = GraphManager(config_path=write_config(base, binary_snapshot=True))
+        gm._apply_changes(
+            added=[quad for i in range(papers) for quad in make_paper_quads(i)]
+        )
+        gm.compact()
+        snapshot_size = gm.snapshot_file.stat().st_size
+        text_size = gm.graph_file.stat().st_size + sum(
+            f.stat().st_size for f in gm.paper_dir.glob("*.nq")
+        )
+        triples = len(gm.g)
+        del gm
+
+        text = cold_start(write_config(base, binary_snapshot=False), repeat)
+        binary = cold_start(write_config(base, binary_snapshot=True), repeat)
+
+    print(
+        f"{papers:>6} papers / {triples:>8} triples | "
+        f"text {text:7.2f}s ({text_size / 1e6:6.1f} MB) | "
+        f"binary {binary:7.2f}s ({snapshot_size / 1e6:6.1f} MB) | "
+        f"x{text / binary:.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for papers in args.papers:
+        run(papers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
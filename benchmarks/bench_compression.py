@@ -0,0 +1,79 @@
+"""
+圧縮したスナップショット（storage.compression）のベンチマーク
+
+非圧縮・gzip・zstd（zstandard がインストールされている場合）で、
+スナップショットのディスク使用量・保存時間・起動時間（テキスト形式 / バイナリスナップショット）を比較する。
+
+    uv run python benchmarks/bench_compression.py --papers 1000 10000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from bench_cold_start import cold_start, make_paper_quads
+from kgpaper.graph_manager import GraphManager
+
+
+def write_config(base: Path, compression: str, binary_snapshot: bool) -> str:
+    config_path = base / f"config_{compression}_{binary_snapshot}.yaml"
+    config_path.write_text(
+        f"""
+storage:
+  graph_dir: "{(base / compression).as_posix()}"
+  compression: "{compression}"
+  binary_snapshot: {str(binary_snapshot).lower()}
+""",
+        encoding="utf-8",
+    )
+    return str(config_path)
+
+
+def compressions() -> list[str]:
+    methods = ["none", "gzip"]
+    try:
+        import zstandard  # noqa: F401
+
+        methods.append("zstd")
+    except ImportError:
+        pass
+    return methods
+
+
+def run(papers: int, repeat: int) -> None:
+    quads = [quad for i in range(papers) for quad in make_paper_quads(i)]
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        for compression in compressions():
+            gm = GraphManager(config_path=write_config(base, compression, True))
+            gm._apply_changes(added=quads)
+            start = time.perf_counter()
+            gm.compact()
+            save = time.perf_counter() - start
+            text_size = gm._existing(gm.graph_file).stat().st_size + sum(
+                f.stat().st_size for f in gm.paper_dir.iterdir()
+            )
+            snapshot_size = gm.snapshot_file.stat().st_size
+            del gm
+
+            text = cold_start(write_config(base, compression, False), repeat)
+            binary = cold_start(write_config(base, compression, True), repeat)
+            print(
+                f"{papers:>6} papers | {compression:<4} | "
+                f"text {text_size / 1e6:7.1f} MB / load {text:6.2f}s | "
+                f"binary {snapshot_size / 1e6:7.1f} MB / load {binary:6.2f}s | "
+                f"save {save:6.2f}s"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for papers in args.papers:
+        run(papers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+論文削除のベンチマーク
+
+N 件の論文を持つグラフから M 件の論文を削除する。削除対象の主語（論文・実験・
+コンテンツ）を SPARQL でたどる方法と、所有する主語の索引から引く方法を比較し、
+あわせて delete_paper の所要時間を計測する。
+
+    uv run python benchmarks/bench_delete.py --papers 10000 --delete 1000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from rdflib import URIRef
+from bench_cold_start import make_paper_quads, write_config
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import PREFIXES
+
+OWNED_QUERY = """
+SELECT ?s WHERE {
+    { BIND(?paper AS ?s) }
+    UNION { ?paper kg:hasExperiment ?s }
+    UNION { ?paper kg:hasExperiment/kg:hasContent ?s }
+}
+"""
+
+
+def run(papers: int, delete: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        gm = GraphManager(config_path=write_config(Path(tmp), binary_snapshot=True))
+        gm._apply_changes(
+            added=[quad for i in range(papers) for quad in make_paper_quads(i)]
+        )
+        gm.compact()
+        targets = [f"urn:uuid:bench-{i:06d}" for i in range(0, papers, papers // delete)]
+        targets = targets[:delete]
+
+        start = time.perf_counter()
+        by_query = [
+            {
+                row.s
+                for row in gm.g.query(
+                    OWNED_QUERY, initNs=PREFIXES, initBindings={"paper": URIRef(uri)}
+                )
+            }
+            for uri in targets
+        ]
+        query_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        by_index = [gm.owned_subjects(uri) for uri in targets]
+        index_time = time.perf_counter() - start
+        assert by_query == by_index
+
+        start = time.perf_counter()
+        with gm.transaction():
+            for uri in targets:
+                gm.delete_paper(uri)
+        delete_time = time.perf_counter() - start
+        assert gm.check_ownership() == []
+
+    print(
+        f"{papers:>6} papers, delete {len(targets)} | "
+        f"lookup SPARQL {query_time:7.3f}s / index {index_time:7.3f}s "
+        f"(x{query_time / index_time:.0f}) | delete_paper {delete_time:7.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, default=10000)
+    parser.add_argument("--delete", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.papers, args.delete)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+JSON-LD の取り込み（辞書 -> グラフ）のベンチマーク
+
+test_multidata.json の論文を複製した JSON-LD（抽出プロンプトの @context）を、
+文字列に変換して rdflib の汎用の JSON-LD パーサーで読み込む経路と、
+jsonld.parse_json_ld の直接トリプルにする経路で比較する。
+
+    uv run python benchmarks/bench_jsonld.py --papers 1000 10000
+"""
+
+import argparse
+import copy
+import json
+import time
+from pathlib import Path
+from rdflib import Graph
+from rdflib.compare import isomorphic
+from kgpaper.jsonld import parse_json_ld
+
+CORPUS = Path(__file__).resolve().parent.parent / "test_multidata.json"
+
+
+def make_documents(papers: int) -> list[dict]:
+    """test_multidata.json の論文を URI とタイトルを変えて papers 件に複製した JSON-LD"""
+    corpus = json.loads(CORPUS.read_text(encoding="utf-8"))
+    templates = corpus["hasPaper"]
+    documents = []
+    for index in range(papers):
+        paper = copy.deepcopy(templates[index % len(templates)])
+        paper["@context"] = corpus["@context"]
+        paper["@id"] = f"urn:uuid:bench-{index:06d}"
+        paper["paperTitle"] = f"{paper['paperTitle']} ({index})"
+        documents.append(paper)
+    return documents
+
+
+def parse_generic(data: dict) -> Graph:
+    graph = Graph()
+    graph.parse(data=json.dumps(data), format="json-ld")
+    return graph
+
+
+def measure(parse, documents: list[dict], repeat: int) -> tuple[float, int]:
+    best, triples = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        triples = sum(len(parse(document)) for document in documents)
+        best = min(best, time.perf_counter() - start)
+    return best, triples
+
+
+def run(papers: int, repeat: int) -> None:
+    documents = make_documents(papers)
+    assert isomorphic(parse_generic(documents[0]), parse_json_ld(documents[0]))
+    generic, triples = measure(parse_generic, documents, repeat)
+    fast, fast_triples = measure(parse_json_ld, documents, repeat)
+    assert fast_triples == triples
+    print(
+        f"{papers:>6} papers ({triples} triples) | "
+        f"generic {generic:6.2f}s | direct {fast:6.2f}s | x{generic / fast:5.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for papers in args.papers:
+        run(papers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
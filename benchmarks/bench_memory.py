@@ -0,0 +1,60 @@
+"""
+トリプルストアのメモリ使用量のベンチマーク
+
+rdflib 既定の Memory ストアと ArrayStore（storage.backend: array）に
+同じ論文データを読み込み、tracemalloc で計測した確保量を比較する。
+語彙（URIRef / Literal）のオブジェクトは計測前に作成済みのため、
+ストアが保持する構造（索引・辞書）の分だけが計測される。
+
+    uv run python benchmarks/bench_memory.py --papers 1000 10000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from rdflib import Dataset
+from bench_cold_start import make_paper_quads
+from kgpaper.array_store import ArrayStore
+
+
+def measure(make_dataset, quads: list) -> tuple[int, float]:
+    """データセットの構築に伴って確保されたバイト数と所要時間"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    dataset = make_dataset()
+    dataset.addN(quads)
+    len(dataset)  # ArrayStore の索引構築を含める
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del dataset
+    return size, elapsed
+
+
+def run(papers: int) -> None:
+    quads = [quad for i in range(papers) for quad in make_paper_quads(i)]
+    memory_size, memory_time = measure(lambda: Dataset(default_union=True), quads)
+    array_size, array_time = measure(
+        lambda: Dataset(store=ArrayStore(), default_union=True), quads
+    )
+    print(
+        f"{papers:>6} papers / {len(quads):>8} quads | "
+        f"Memory {memory_size / 1e6:7.1f} MB ({memory_size / len(quads):5.0f} B/quad, "
+        f"{memory_time:5.2f}s) | "
+        f"ArrayStore {array_size / 1e6:7.1f} MB ({array_size / len(quads):5.0f} B/quad, "
+        f"{array_time:5.2f}s) | x{memory_size / array_size:.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    for papers in args.papers:
+        run(papers)
+
+
+if __name__ == "__main__":
+    main()
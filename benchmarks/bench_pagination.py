@@ -0,0 +1,59 @@
+"""
+SPARQL 検索の全件取得（SparqlQuery.search）と先頭ページ（search_page）のベンチマーク
+
+Explore ページの初回表示（条件なし）で、全件を集約して返すまでの時間・ピークメモリと、
+先頭の1ページ（論文ごとの評価で limit 件に達した時点で止める）を返すまでの時間・ピークメモリを比較する。
+
+    uv run python benchmarks/bench_pagination.py --papers 100 1000
+"""
+
+import argparse
+import time
+import tracemalloc
+from rdflib import Dataset
+from bench_cold_start import make_paper_quads
+from kgpaper.ontology import PREFIXES
+from kgpaper.sparql_query import SparqlQuery
+
+
+def measure(func) -> tuple[float, int, int]:
+    """(秒, ピークメモリのバイト数, 行数)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, len(rows)
+
+
+def run(papers: int, limit: int) -> None:
+    graph = Dataset(default_union=True)
+    for prefix, namespace in PREFIXES.items():
+        graph.bind(prefix, namespace)
+    graph.addN(quad for i in range(papers) for quad in make_paper_quads(i))
+    query = SparqlQuery(graph)
+    query.search_page(limit=1)  # クエリのコンパイルを計測から除く
+    print(f"{papers} papers")
+    for name, func in (
+        ("search", query.search),
+        (f"search_page({limit})", lambda: query.search_page(limit=limit)[0]),
+    ):
+        elapsed, peak, rows = measure(func)
+        print(
+            f"  {name:<18} | {elapsed * 1000:9.2f} ms | peak {peak / 1024 / 1024:7.2f} MB | "
+            f"{rows} rows"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    for papers in args.papers:
+        run(papers, args.limit)
+
+
+if __name__ == "__main__":
+    main()
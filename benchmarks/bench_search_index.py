@@ -0,0 +1,51 @@
+"""
+SPARQL 検索と search 専用の索引（SearchIndex）による検索のベンチマーク
+
+Explore ページの代表的な検索条件ごとに、rdflib の SPARQL で評価した場合と、
+専用の索引のハッシュ索引の積から集約済みの行を作る場合の時間を比較する（索引の作成時間も表示する）。
+
+    uv run python benchmarks/bench_search_index.py --papers 100 1000
+"""
+
+import argparse
+import time
+from rdflib import Dataset
+from bench_cold_start import make_paper_quads
+from bench_sparql import QUERIES, best_of
+from kgpaper.ontology import PREFIXES
+from kgpaper.search_index import SearchIndex
+from kgpaper.sparql_query import SparqlQuery
+
+
+def run(papers: int, repeat: int) -> None:
+    graph = Dataset(default_union=True)
+    for prefix, namespace in PREFIXES.items():
+        graph.bind(prefix, namespace)
+    graph.addN(quad for i in range(papers) for quad in make_paper_quads(i))
+    start = time.perf_counter()
+    index = SearchIndex.build(graph)
+    print(f"{papers} papers | build index {(time.perf_counter() - start) * 1000:.2f} ms")
+    sparql = SparqlQuery(graph)
+    native = SparqlQuery(graph, search_index=index)
+    for name, filters in QUERIES.items():
+        sparql.search(**filters)  # クエリのコンパイルを計測から除く
+        sparql_time = best_of(lambda: sparql.search(**filters), repeat)
+        native_time = best_of(lambda: native.search(**filters), repeat)
+        rows = len(native.search(**filters))
+        print(
+            f"  {name:<16} | sparql {sparql_time * 1000:9.2f} ms | "
+            f"index {native_time * 1000:8.2f} ms | x{sparql_time / native_time:7.1f} | {rows} rows"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for papers in args.papers:
+        run(papers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+SPARQL 検索（SparqlQuery.search）のクエリのコンパイルと評価のベンチマーク
+
+Explore ページの代表的な検索条件ごとに、クエリのパースと代数への変換（prepareQuery）に
+かかる時間と、コンパイル済みのクエリの評価にかかる時間を比較する。
+
+    uv run python benchmarks/bench_sparql.py --papers 100 1000
+"""
+
+import argparse
+import time
+from rdflib import Dataset
+from bench_cold_start import make_paper_quads
+from kgpaper.ontology import PREFIXES
+from kgpaper.sparql_query import SEARCH_FILTERS, SparqlQuery, prepared_query, search_query
+
+# Explore ページの検索条件
+QUERIES = {
+    "no filter": {},
+    "title": {"paper_title": "paper 1"},
+    "experiment type": {"experiment_type": "kg:Synthesis"},
+    "content type": {"content_type": "method"},
+    "combined": {
+        "paper_title": "paper 1",
+        "experiment_type": "kg:Synthesis",
+        "content_type": "result",
+    },
+}
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(papers: int, repeat: int) -> None:
+    graph = Dataset(default_union=True)
+    for prefix, namespace in PREFIXES.items():
+        graph.bind(prefix, namespace)
+    graph.addN(quad for i in range(papers) for quad in make_paper_quads(i))
+    query = SparqlQuery(graph)
+    print(f"{papers} papers")
+    for name, filters in QUERIES.items():
+        active = tuple(key for key in SEARCH_FILTERS if key in filters)
+
+        def compile_query():
+            prepared_query.cache_clear()
+            search_query(active)
+
+        compile_time = best_of(compile_query, repeat)
+        search_query(active)  # 評価の計測ではコンパイル済みのクエリを使う
+        evaluate = best_of(lambda: query.search(**filters), repeat)
+        rows = len(query.search(**filters))
+        print(
+            f"  {name:<16} | compile {compile_time * 1000:7.2f} ms | "
+            f"evaluate {evaluate * 1000:9.2f} ms | compile share "
+            f"{compile_time / (compile_time + evaluate):6.1%} | {rows} rows"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for papers in args.papers:
+        run(papers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import threading
+from typing import Iterator
+import numpy as np
+from rdflib import Graph, URIRef
+from rdflib.store import Store
+
+# 索引ごとの列順（いずれも末尾はグラフ列で、同一トリプルの行が連続する）
+_INDEX_ORDERS = {"spo": "spoc", "pos": "posc", "osp": "ospc"}
+_MAX_ID = np.iinfo(np.int32).max
+
+# 未反映の追加がこの割合を超えたら挿入ではなく索引を作り直す
+_REBUILD_RATIO = 16
+
+
+def _dtype(order: str) -> np.dtype:
+    """列順どおりに整数IDを並べた構造化配列の型（比較が辞書式順になる）"""
+    return np.dtype([(column, np.int32) for column in order])
+
+
+def _build(order: str, columns: dict) -> np.ndarray:
+    """列ごとのID配列から、重複を除いて整列済みの索引配列を作る"""
+    keys = np.lexsort([columns[column] for column in reversed(order)])
+    rows = np.empty(len(keys), dtype=_dtype(order))
+    for column in order:
+        rows[column] = columns[column][keys]
+    if len(rows) > 1:
+        rows = rows[np.concatenate(([True], rows[1:] != rows[:-1]))]
+    return rows
+
+
+class ArrayStore(Store):
+    """
+    辞書符号化した NumPy 配列によるメモリ上のトリプルストア（rdflib Store 実装）。
+
+    語彙は1度だけ語彙辞書に登録して整数IDに置き換え、クワッドは SPO / POS / OSP
+    の3つの列順で整列した構造化配列として保持する。検索は索引の先頭列に対する
+    二分探索で行う。追加はバッファに溜めて次の読み出し時にまとめて反映する。
+
+    削除されたクワッドの語彙は辞書に残る（IDの再利用はしない）。
+    """
+
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self._terms = []
+        self._term_ids = {}
+        self._indexes = {
+            name: np.empty(0, dtype=_dtype(order))
+            for name, order in _INDEX_ORDERS.items()
+        }
+        self._pending = []
+        self._graph_ids = set()
+        self._graphs = {}
+        self._namespace = {}
+        self._prefix = {}
+        # Streamlit のスレッド間で共有されるため書き込みを直列化する
+        self._lock = threading.RLock()
+        super().__init__(configuration, identifier)
+
+    # --- 語彙の辞書符号化 ---
+
+    def _intern(self, term) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self._terms)
+            self._terms.append(term)
+        return term_id
+
+    def _graph(self, term_id: int) -> Graph:
+        graph = self._graphs.get(term_id)
+        if graph is None:
+            graph = Graph(store=self, identifier=self._terms[term_id])
+            self._graphs[term_id] = graph
+        return graph
+
+    def _context_id(self, context, create: bool = False) -> int | None:
+        identifier = getattr(context, "identifier", context)
+        if create:
+            context_id = self._intern(identifier)
+            self._graph_ids.add(context_id)
+            return context_id
+        return self._term_ids.get(identifier)
+
+    # --- 索引の更新 ---
+
+    def _flush(self) -> None:
+        """バッファに溜めた追加を索引へ反映する"""
+        if not self._pending:
+            return
+        added = np.array(self._pending, dtype=np.int32).reshape(-1, 4).T
+        self._pending = []
+        columns = dict(zip("spoc", added))
+
+        current = self._indexes["spo"]
+        if len(added[0]) * _REBUILD_RATIO > len(current):
+            columns = {
+                column: np.concatenate((current[column], columns[column]))
+                for column in "spoc"
+            }
+            for name, order in _INDEX_ORDERS.items():
+                self._indexes[name] = _build(order, columns)
+            return
+
+        for name, order in _INDEX_ORDERS.items():
+            index = self._indexes[name]
+            rows = _build(order, columns)
+            positions = np.searchsorted(index, rows)
+            found = positions < len(index)
+            found[found] = index[positions[found]] == rows[found]
+            self._indexes[name] = np.insert(index, positions[~found], rows[~found])
+
+    def _delete(self, rows: np.ndarray) -> None:
+        """索引に存在する行を全ての索引から削除する"""
+        for name, order in _INDEX_ORDERS.items():
+            index = self._indexes[name]
+            keys = _build(order, {column: rows[column] for column in "spoc"})
+            self._indexes[name] = np.delete(index, np.searchsorted(index, keys))
+
+    # --- 追加・削除 ---
+
+    def add(self, triple, context, quoted: bool = False) -> None:
+        Store.add(self, triple, context, quoted)
+        self.addN([(*triple, context)])
+
+    def addN(self, quads) -> None:
+        with self._lock:
+            context_ids = {}
+            for s, p, o, context in quads:
+                key = getattr(context, "identifier", context)
+                context_id = context_ids.get(key)
+                if context_id is None:
+                    context_id = context_ids[key] = self._context_id(key, create=True)
+                self._pending.append(
+                    (self._intern(s), self._intern(p), self._intern(o), context_id)
+                )
+
+    def remove(self, triple_pattern, context=None) -> None:
+        with self._lock:
+            self._flush()
+            rows = self._match(triple_pattern, context)
+            if rows is not None and len(rows):
+                self._delete(rows)
+
+    def add_graph(self, graph: Graph) -> None:
+        with self._lock:
+            self._context_id(graph, create=True)
+
+    def remove_graph(self, graph: Graph) -> None:
+        with self._lock:
+            self._flush()
+            context_id = self._context_id(graph)
+            if context_id is None:
+                return
+            for name, index in self._indexes.items():
+                self._indexes[name] = index[index["c"] != context_id]
+            self._graph_ids.discard(context_id)
+
+    # --- 検索 ---
+
+    def _match(self, triple_pattern, context) -> np.ndarray | None:
+        """パターンに一致する行を返す（未登録の語彙を含む場合は None）"""
+        ids = {}
+        for column, term in zip("spo", triple_pattern):
+            if term is None:
+                continue
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                return None
+            ids[column] = term_id
+
+        # 束縛された列が先頭に並ぶ索引を選ぶ
+        if "s" in ids and ("p" in ids or "o" not in ids):
+            name = "spo"
+        elif "p" in ids:
+            name = "pos"
+        elif ids:
+            name = "osp"
+        else:
+            name = "spo"
+        index = self._indexes[name]
+        order = _INDEX_ORDERS[name]
+        prefix = [ids[column] for column in order[: len(ids)]]
+
+        if prefix:
+            padding = 4 - len(prefix)
+            bounds = np.array(
+                [tuple(prefix + [-1] * padding), tuple(prefix + [_MAX_ID] * padding)],
+                dtype=index.dtype,
+            )
+            low, high = np.searchsorted(index, bounds)
+            rows = index[low:high]
+        else:
+            rows = index
+
+        if context is not None:
+            context_id = self._context_id(context)
+            if context_id is None:
+                return None
+            rows = rows[rows["c"] == context_id]
+        return rows
+
+    def triples(self, triple_pattern, context=None) -> Iterator:
+        with self._lock:
+            self._flush()
+            rows = self._match(triple_pattern, context)
+        if rows is None or len(rows) == 0:
+            return
+
+        columns = [rows[column].tolist() for column in "spoc"]
+        current_key, contexts = None, []
+        for s, p, o, c in zip(*columns):
+            key = (s, p, o)
+            if key != current_key:
+                if current_key is not None:
+                    yield self._triple(current_key), self._contexts_iter(contexts)
+                current_key, contexts = key, []
+            contexts.append(c)
+        yield self._triple(current_key), self._contexts_iter(contexts)
+
+    def _triple(self, key: tuple) -> tuple:
+        terms = self._terms
+        return terms[key[0]], terms[key[1]], terms[key[2]]
+
+    def _contexts_iter(self, context_ids: list) -> Iterator[Graph]:
+        return (self._graph(context_id) for context_id in context_ids)
+
+    def __len__(self, context=None) -> int:
+        with self._lock:
+            self._flush()
+            index = self._indexes["spo"]
+            if context is None:
+                if len(index) == 0:
+                    return 0
+                triples = index[["s", "p", "o"]]
+                return int(np.count_nonzero(triples[1:] != triples[:-1])) + 1
+            context_id = self._context_id(context)
+            if context_id is None:
+                return 0
+            return int(np.count_nonzero(index["c"] == context_id))
+
+    def contexts(self, triple=None) -> Iterator[Graph]:
+        if triple is None:
+            for context_id in list(self._graph_ids):
+                yield self._graph(context_id)
+            return
+        for _, contexts in self.triples(triple):
+            yield from contexts
+
+    # --- 名前空間 ---
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True) -> None:
+        with self._lock:
+            if not override:
+                if self.prefix(namespace) is not None or self.namespace(prefix):
+                    return
+            old_namespace = self._namespace.pop(prefix, None)
+            if old_namespace is not None:
+                self._prefix.pop(old_namespace, None)
+            old_prefix = self._prefix.pop(namespace, None)
+            if old_prefix is not None:
+                self._namespace.pop(old_prefix, None)
+            self._namespace[prefix] = namespace
+            self._prefix[namespace] = prefix
+
+    def namespace(self, prefix: str) -> URIRef | None:
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace: URIRef) -> str | None:
+        return self._prefix.get(namespace)
+
+    def namespaces(self) -> Iterator[tuple[str, URIRef]]:
+        yield from list(self._namespace.items())
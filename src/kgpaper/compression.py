@@ -0,0 +1,83 @@
+import gzip
+import io
+from pathlib import Path
+from typing import BinaryIO
+
+# 圧縮方式 -> ファイルの拡張子
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# gzip の圧縮レベル（9 は書き出しが遅い割にサイズがほとんど変わらない）
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def compression_of(path) -> str | None:
+    """拡張子から圧縮方式を判定する（非圧縮なら None）"""
+    suffix = Path(path).suffix.lower()
+    for method, method_suffix in COMPRESSION_SUFFIXES.items():
+        if suffix == method_suffix:
+            return method
+    return None
+
+
+def strip_compression(path) -> Path:
+    """圧縮の拡張子を除いたパス（knowledge_graph.ttl.gz -> knowledge_graph.ttl）"""
+    path = Path(path)
+    return path.with_suffix("") if compression_of(path) else path
+
+
+def compression_variants(path) -> list[Path]:
+    """非圧縮のパスと、各圧縮方式の拡張子を付けたパス"""
+    base = strip_compression(path)
+    return [base] + [
+        base.with_name(base.name + suffix) for suffix in COMPRESSION_SUFFIXES.values()
+    ]
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compression requires the zstandard package (uv add zstandard)"
+        ) from None
+    return zstandard
+
+
+def wrap_reader(file: BinaryIO, compression: str | None) -> BinaryIO:
+    """バイナリファイルを逐次展開しながら読むファイルオブジェクトで包む"""
+    if compression is None:
+        return file
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=file, mode="rb")
+    if compression == "zstd":
+        reader = _zstandard().ZstdDecompressor().stream_reader(file, closefd=False)
+        return io.BufferedReader(reader)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def open_file(path, mode: str = "rb", compression: str | None = "auto") -> BinaryIO:
+    """
+    圧縮ファイルをバイナリモードで開く。読み書きは逐次（解凍・圧縮）され、
+    ファイル全体をメモリに展開しない。
+
+    compression を省略すると拡張子から判定する（一時ファイルなど拡張子で
+    判定できない場合は明示する）。
+    """
+    if compression == "auto":
+        compression = compression_of(path)
+    if mode not in ("rb", "wb"):
+        raise ValueError(f"Unsupported mode: {mode}")
+    if compression is None:
+        return open(path, mode)
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL)
+    if compression == "zstd":
+        zstandard = _zstandard()
+        file = open(path, mode)
+        if mode == "rb":
+            reader = zstandard.ZstdDecompressor().stream_reader(file, closefd=True)
+            return io.BufferedReader(reader)
+        writer = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(file, closefd=True)
+        return io.BufferedWriter(writer)
+    raise ValueError(f"Unsupported compression: {compression}")
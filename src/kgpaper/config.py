@@ -50,6 +50,124 @@ class AppConfig:
     def default_format(self) -> str:
         return self.config.get("storage", {}).get("default_format", "json-ld")
 
+    @property
+    def storage_backend(self) -> str:
+        """
+        グラフの保存方式
+        （memory / array / mmap: ファイル + ジャーナル / sqlite: SQLiteトリプルストア）
+        """
+        backend = self.config.get("storage", {}).get("backend", "memory")
+        if backend not in ("memory", "array", "mmap", "sqlite"):
+            raise ValueError(f"Unsupported storage backend: {backend}")
+        return backend
+
+    @property
+    def compression(self) -> str | None:
+        """
+        スナップショット（論文シャード・knowledge_graph.ttl・バイナリスナップショット）の
+        圧縮方式（none / gzip / zstd、デフォルト: none）
+        """
+        compression = self.config.get("storage", {}).get("compression", "none")
+        if compression not in ("none", "gzip", "zstd"):
+            raise ValueError(f"Unsupported compression: {compression}")
+        return None if compression == "none" else compression
+
+    @property
+    def journal_enabled(self) -> bool:
+        """変更をジャーナルへ追記して永続化するか（デフォルト: True）"""
+        return self.config.get("storage", {}).get("journal", True)
+
+    @property
+    def journal_max_bytes(self) -> int:
+        """自動コンパクションを行うジャーナルサイズ（デフォルト: 16MB）"""
+        return self.config.get("storage", {}).get("journal_max_bytes", 16 * 1024 * 1024)
+
+    @property
+    def binary_snapshot_enabled(self) -> bool:
+        """起動高速化用のバイナリスナップショットを書き出すか（デフォルト: True）"""
+        return self.config.get("storage", {}).get("binary_snapshot", True)
+
+    @property
+    def lazy_load(self) -> bool:
+        """論文シャードを必要になった時点で読み込むか（デフォルト: False）"""
+        return self.config.get("storage", {}).get("lazy_load", False)
+
+    @property
+    def max_loaded_papers(self) -> int:
+        """lazy_load 時にメモリ上に保持する論文シャードの上限（デフォルト: 1000）"""
+        return self.config.get("storage", {}).get("max_loaded_papers", 1000)
+
+    @property
+    def background_write(self) -> bool:
+        """変更の永続化をバックグラウンドスレッドでまとめて行うか（デフォルト: False）"""
+        return self.config.get("storage", {}).get("background_write", False)
+
+    @property
+    def write_interval(self) -> float:
+        """バックグラウンド書き込みの最短間隔（秒、デフォルト: 1.0）"""
+        return self.config.get("storage", {}).get("write_interval", 1.0)
+
+    @property
+    def versioning_enabled(self) -> bool:
+        """
+        変更ごとの版の履歴（差分）を保存するか（デフォルト: False）。
+
+        有効にすると変更のたびに差分ファイルと版の一覧を書き出す
+        （保持する量は max_versions・versions_max_bytes で制限される）。
+        """
+        return self.config.get("storage", {}).get("versioning", False)
+
+    @property
+    def max_versions(self) -> int:
+        """保持する版の数の上限（デフォルト: 100）"""
+        return self.config.get("storage", {}).get("max_versions", 100)
+
+    @property
+    def versions_max_bytes(self) -> int:
+        """保持する版の合計サイズの上限（デフォルト: 64MB）"""
+        return self.config.get("storage", {}).get("versions_max_bytes", 64 * 1024 * 1024)
+
+    @property
+    def duplicate_policy(self) -> str:
+        """
+        既存の論文と重複する論文（同じ PDF・DOI・内容）を取り込む場合の扱い
+        （skip: 取り込まない / replace: 置き換える / merge: 新しい実験だけ追加する、デフォルト: merge）
+        """
+        policy = self.config.get("storage", {}).get("on_duplicate", "merge")
+        if policy not in ("skip", "replace", "merge"):
+            raise ValueError(f"Unsupported duplicate policy: {policy}")
+        return policy
+
+    @property
+    def skolemize(self) -> bool:
+        """取り込む実験・コンテンツの空白ノードを決定的な IRI に置き換えるか（デフォルト: True）"""
+        return self.config.get("storage", {}).get("skolemize", True)
+
+    @property
+    def import_workers(self) -> int:
+        """import_directory で並列にパースするプロセス数の上限（デフォルト: 4）"""
+        return self.config.get("storage", {}).get("import_workers", 4)
+
+    @property
+    def search_cache_entries(self) -> int:
+        """検索結果のキャッシュに保持する件数の上限（0 で無効。デフォルト: 256）"""
+        return self.config.get("search", {}).get("cache_entries", 256)
+
+    @property
+    def search_cache_bytes(self) -> int:
+        """検索結果のキャッシュの推定メモリ使用量の上限（デフォルト: 64MB）"""
+        return self.config.get("search", {}).get("cache_max_bytes", 64 * 1024 * 1024)
+
+    @property
+    def native_search(self) -> bool:
+        """
+        検索を SPARQL ではなく専用の索引（SearchIndex）で評価するか（デフォルト: False）。
+
+        初回の検索時にグラフ全体を走査して索引を作り、プロセスごとにメモリ上に保持する
+        （SQLite では他の接続の更新のたびに作り直す）。search_page の初回でも作る。
+        """
+        return self.config.get("search", {}).get("native_index", False)
+
     @property
     def upload_timeout(self) -> int:
         """ファイルアップロードのタイムアウト秒数（デフォルト: 300秒 = 5分）"""
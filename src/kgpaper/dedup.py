@@ -0,0 +1,89 @@
+import hashlib
+import re
+import unicodedata
+from rdflib import Graph, URIRef
+from .ontology import KG
+
+# 既存の論文と重複する論文を取り込む場合の扱い
+DUPLICATE_POLICIES = ("skip", "replace", "merge")
+
+_DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+
+
+def normalize_text(value: str) -> str:
+    """比較用に正規化する（NFKC・大文字小文字の区別なし・空白の連続を1つに）"""
+    return " ".join(unicodedata.normalize("NFKC", value).casefold().split())
+
+
+def normalize_doi(value: str) -> str:
+    """DOI を正規化する（https://doi.org/ や doi: の接頭辞を除き、小文字にする）"""
+    return _DOI_PREFIX.sub("", value.strip()).lower()
+
+
+def file_hash(path) -> str:
+    """ファイル（PDF など）の SHA-256 を16進文字列で返す"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _digest(parts) -> str:
+    return hashlib.sha1("\x1e".join(parts).encode("utf-8")).hexdigest()
+
+
+def _content_key(graph: Graph, content) -> str:
+    return "\x1f".join(
+        normalize_text(str(value))
+        for value in (
+            graph.value(content, KG.contentType, default=""),
+            graph.value(content, KG.text, default=""),
+        )
+    )
+
+
+def content_node_fingerprint(graph: Graph, content) -> str:
+    """コンテンツ（種別・本文）の正規化した指紋"""
+    return _digest([_content_key(graph, content)])
+
+
+def experiment_fingerprint(graph: Graph, experiment) -> str:
+    """実験の種別とコンテンツ（種別・本文）の正規化した指紋（ノードのラベルや URI に依存しない）"""
+    types = sorted(str(t) for t in graph.objects(experiment, KG.experimentType))
+    contents = sorted(
+        _content_key(graph, content) for content in graph.objects(experiment, KG.hasContent)
+    )
+    return _digest(["\x1f".join(types), *contents])
+
+
+def content_fingerprint(graph: Graph, paper: URIRef) -> str | None:
+    """論文のタイトルと全実験の指紋から作る内容の指紋（タイトルがなければ None）"""
+    title = graph.value(paper, KG.paperTitle)
+    if title is None:
+        return None
+    experiments = sorted(
+        experiment_fingerprint(graph, experiment)
+        for experiment in graph.objects(paper, KG.hasExperiment)
+    )
+    return _digest([normalize_text(str(title)), *experiments])
+
+
+def dedup_keys(graph: Graph, paper: URIRef) -> list[str]:
+    """
+    重複検出の索引キー。
+
+    - source:<sha256>: 元の PDF のハッシュ（kg:sourceHash）
+    - doi:<DOI>: 正規化した DOI
+    - content:<指紋>: 正規化した内容の指紋（マージで取り込んだ論文の指紋 kg:contentHash を含む）
+    """
+    keys = [f"source:{value}" for value in sorted(map(str, graph.objects(paper, KG.sourceHash)))]
+    doi = graph.value(paper, KG.paperDOI)
+    if doi is not None and normalize_doi(str(doi)):
+        keys.append(f"doi:{normalize_doi(str(doi))}")
+    fingerprints = set(map(str, graph.objects(paper, KG.contentHash)))
+    fingerprint = content_fingerprint(graph, paper)
+    if fingerprint is not None:
+        fingerprints.add(fingerprint)
+    keys.extend(f"content:{value}" for value in sorted(fingerprints))
+    return keys
@@ -1,10 +1,59 @@
+import hashlib
 import logging
 import json
+import multiprocessing
+import os
+import shutil
+import threading
 import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from rdflib import Graph, URIRef
+from typing import Callable, Iterator
+from rdflib import RDF, Dataset, Graph, Literal, URIRef
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from .compression import (
+    COMPRESSION_SUFFIXES,
+    compression_of,
+    compression_variants,
+    open_file,
+    strip_compression,
+    wrap_reader,
+)
 from .config import load_config
+from .dedup import (
+    DUPLICATE_POLICIES,
+    content_fingerprint,
+    dedup_keys,
+    experiment_fingerprint,
+    normalize_doi,
+    normalize_text,
+)
+from .journal import (
+    ChangeJournal,
+    JournalBatch,
+    bnodes_of,
+    durable_replace,
+    parse_nquads,
+)
+from .jsonld import parse_json_ld
+from .locking import FileLock, read_version, write_version
+from .manifest import PaperManifest, paper_summary, sort_papers
 from .ontology import KG, PREFIXES
+from .skolem import skolem_map, skolemize_quads
+from .snapshot import load_binary_snapshot, read_snapshot_base_id, write_binary_snapshot
+from .result_cache import shared_cache
+from .search_index import SearchIndex
+from .sparql_query import SparqlQuery, prepared_query, search_key
+from .sqlite_store import SQLiteStore
+from .streaming import JsonStream, iter_json_members, iter_line_chunks, resolves_to
+from .text_index import TextIndex
+from .transaction import Transaction
+from .validation import RequiredPropertyValidator
+from .versions import VersionStore
+from .writer import BackgroundWriter
 
 logger = logging.getLogger(__name__)
 
@@ -14,35 +63,793 @@ class GraphManager:
         self.config = load_config(config_path)
         self.graph_dir = self.config.graph_dir
         self.graph_dir.mkdir(parents=True, exist_ok=True)
-        self.graph_file = self.graph_dir / "knowledge_graph.ttl"
-        self.g = Graph()
+        # スナップショットの圧縮方式（圧縮する場合はファイル名に拡張子が付く）
+        self.compression = self.config.compression
+        suffix = COMPRESSION_SUFFIXES.get(self.compression, "")
+        self.graph_file = self.graph_dir / f"knowledge_graph.ttl{suffix}"
+        # 起動高速化用のバイナリスナップショット（テキスト形式と同時に書き出す）
+        self.snapshot_file = self.graph_dir / f"knowledge_graph.snap{suffix}"
+        # 論文ごとの名前付きグラフの保存先（1論文1ファイル）
+        self.paper_dir = self.graph_dir / "papers"
+        self.paper_dir.mkdir(exist_ok=True)
+        self.manifest = PaperManifest(self.graph_dir / "manifest.json")
+        # 論文タイトル・本文の全文索引（SQLite では保存せず、初回の全文検索時に作る）
+        self.text_index = TextIndex(self.graph_dir / "text_index.json")
+        self._text_index_version = None
+        # search 専用の索引（初回の検索時に作り、以降は変更を適用するたびに更新する）
+        self.search_index = SearchIndex()
+        self._search_index_version = None
+        # 検索結果のキャッシュ（プロセス内の全インスタンス・全セッションで共有）と、
+        # キャッシュのキーに含めるこのインスタンスのグラフの版（変更を適用するたびに進める）
+        self.result_cache = shared_cache(
+            self.config.search_cache_entries, self.config.search_cache_bytes
+        )
+        self._cache_token = uuid.uuid4().hex
+        self._changes = 0
+        self.journal = ChangeJournal(self.graph_dir / "knowledge_graph.journal.nq")
+        self.backend = self.config.storage_backend
+        self.db_file = self.graph_dir / "knowledge_graph.sqlite"
+        # Turtle から読み込んだ空白ノード（再読み込みでラベルが変わるため
+        # ジャーナルでは削除を表現できない）
+        self._unstable_bnodes = set()
+        # スナップショットへ未反映の名前付きグラフ
+        self._dirty_contexts = set()
+        # SQLite は初回作成時のみ既存のファイル形式のデータを取り込む
+        self._import_files = self.backend != "sqlite" or not self.db_file.exists()
+        # lazy_load では論文シャードを必要になった時点で読み込む
+        self.lazy = self.backend not in ("sqlite", "mmap") and self.config.lazy_load
+        # 読み込み済みの論文シャード（古い順）
+        self._loaded = OrderedDict()
+        # 変更の適用と永続化を直列化する（バックグラウンド書き込みスレッドと共有）
+        self._lock = threading.RLock()
+        # 適用済みで未永続化の変更
+        self._pending_batches = []
+        self.writer = None
+        # スレッドごとの実行中トランザクション
+        self._local = threading.local()
+        # 複数のプロセスで graph_dir を共有するための書き込みロックとディスク上のバージョン
+        # （保存・ジャーナル追記のたびに増える。SQLite ストアは SQLite 自身のロックに任せる）
+        self._file_lock = FileLock(self.graph_dir / "knowledge_graph.lock")
+        self.version_file = self.graph_dir / "knowledge_graph.version"
+        self.version = 0
+        # 適用済みのジャーナルの基準スナップショット
+        self._base_id = None
+        # 変更ごとの差分の履歴（checkout / rollback 用）と、記録待ちの差分
+        self.versions = None
+        if self.config.versioning_enabled:
+            self.versions = VersionStore(
+                self.graph_dir / "versions",
+                self.config.max_versions,
+                self.config.versions_max_bytes,
+            )
+        self._pending_versions = []
+        self.g = self._new_dataset()
         self._bind_prefixes()
         self.load_graph()
+        if self.backend != "sqlite" and self.config.background_write:
+            self.writer = BackgroundWriter(
+                weakref.WeakMethod(self._persist_pending), self.config.write_interval
+            )
+            # 参照されなくなった時点かプロセス終了時に、未保存の変更を書き出してスレッドを止める
+            # （atexit やスレッドがインスタンスを参照し続けないよう弱参照にする）
+            self._close_writer = weakref.finalize(self, self.writer.close)
+
+    def _new_dataset(self) -> Dataset:
+        if self.backend == "sqlite":
+            return Dataset(store=SQLiteStore(str(self.db_file)), default_union=True)
+        # NumPy は array / mmap バックエンドを選択した場合のみ読み込む
+        if self.backend == "array":
+            from .array_store import ArrayStore
+
+            return Dataset(store=ArrayStore(), default_union=True)
+        if self.backend == "mmap":
+            from .mmap_store import MmapStore
+
+            return Dataset(store=MmapStore(), default_union=True)
+        return Dataset(default_union=True)
 
     def _bind_prefixes(self):
         for prefix, namespace in PREFIXES.items():
             self.g.bind(prefix, namespace)
 
     def load_graph(self):
-        if self.graph_file.exists():
+        if not self._import_files:
+            return  # SQLite ストアは開くだけで読み込み済み
+        with self._file_lock:
+            self._load_graph_locked()
+
+    def _load_graph_locked(self):
+        self.version = read_version(self.version_file)
+        self._convert_paper_files()
+        # 別の圧縮方式で保存されたスナップショットは読み込んだ後で保存し直す
+        recompress = self._existing(self.graph_file) != self.graph_file
+        try:
+            if self.backend == "mmap":
+                self._open_mmap_snapshot()
+            elif self.lazy or not self._load_binary_snapshot():
+                self._load_text_snapshot(self.g)
+            self._unstable_bnodes = bnodes_of(self.g.default_graph)
+        except Exception as e:
+            logger.error(f"グラフ読み込み失敗: {e}", exc_info=True)
+            raise  # UI側でハンドリング可能にする
+        if self.backend != "sqlite":
+            self._load_manifest()
+            self._load_text_index()
+            if self.config.journal_enabled:
+                self._replay_journal()
+        # 旧形式（単一Turtle）に含まれる論文は名前付きグラフへ移行して保存し直す
+        # （SQLite では取り込んだ内容をここでコミットする）
+        if self._migrate_default_graph() or self.backend == "sqlite" or recompress:
+            self.compact()
+
+    def _load_text_snapshot(self, dataset: Dataset):
+        """テキスト形式のスナップショット（論文シャードと knowledge_graph.ttl）を読み込む"""
+        # N-Quads のパースはデフォルトグラフを空にするため、Turtle より先に読む
+        if not self.lazy:
+            for paper_file in self._paper_files():
+                with open_file(paper_file) as f:
+                    parse_nquads(dataset, source=f)
+        graph_file = self._existing(self.graph_file)
+        if graph_file.exists():
+            with open_file(graph_file) as f:
+                dataset.default_graph.parse(f, format="turtle")
+
+    @property
+    def mmap_file(self) -> Path:
+        """
+        mmap バックエンドが複数のプロセスで共有する読み取り専用スナップショット（圧縮しない）。
+
+        mmap 中のファイルは Windows では置換できないため、テキスト形式の世代ごとに
+        別のファイル名で公開する。
+        """
+        return self.graph_dir / f"knowledge_graph.{self._snapshot_id().replace(':', '-')}.mmap"
+
+    def _open_mmap_snapshot(self):
+        """
+        mmap スナップショットを開く。
+
+        テキスト形式と世代が異なる（他のプロセスが書き出す前・壊れている）場合は、
+        テキスト形式から作り直して公開してから開く（書き込みロックを保持した状態で呼ぶ）。
+        """
+        from .mmap_store import read_mmap_base_id, write_mmap_snapshot
+
+        mmap_file = self.mmap_file
+        if read_mmap_base_id(mmap_file) == self._snapshot_id():
             try:
-                self.g.parse(self.graph_file, format="turtle")
-            except Exception as e:
-                logger.error(f"グラフ読み込み失敗: {e}", exc_info=True)
-                raise  # UI側でハンドリング可能にする
+                self.g.store.open_snapshot(mmap_file)
+                return
+            except ValueError as e:
+                logger.warning(f"mmap スナップショットを使用できません: {e}")
+        logger.info("mmap スナップショットを作り直します")
+        dataset = Dataset()
+        self._load_text_snapshot(dataset)
+        write_mmap_snapshot(dataset, mmap_file, self._snapshot_id())
+        self.g.store.open_snapshot(mmap_file)
+        self._remove_stale_mmap()
+
+    def _remove_stale_mmap(self):
+        """
+        古い世代の mmap スナップショットを削除する。
+
+        POSIX では mmap 中の他のプロセスは削除後もそのまま読める。Windows では mmap 中の
+        ファイルは削除できないため残し、次の公開時に削除し直す。
+        """
+        current = self.mmap_file
+        for mmap_file in self.graph_dir.glob("knowledge_graph*.mmap"):
+            if mmap_file != current:
+                try:
+                    mmap_file.unlink()
+                except OSError:
+                    pass
+
+    def _existing(self, path: Path) -> Path:
+        """path か、別の圧縮方式で保存された同じファイルのうち存在するもの（なければ path）"""
+        if path.exists():
+            return path
+        for variant in compression_variants(path):
+            if variant.exists():
+                return variant
+        return path
+
+    def _remove_variants(self, path: Path, keep: bool = True):
+        """別の圧縮方式で保存された同じファイルを削除する（keep=False なら path 自身も）"""
+        for variant in compression_variants(path):
+            if variant != path or not keep:
+                variant.unlink(missing_ok=True)
+
+    def _paper_files(self) -> list[Path]:
+        """論文シャードのファイル（圧縮方式を問わない）"""
+        return sorted(
+            file for file in self.paper_dir.iterdir() if strip_compression(file).suffix == ".nq"
+        )
+
+    def _convert_paper_files(self):
+        """
+        別の圧縮方式で保存された論文シャードを現在の圧縮方式で書き直す。
+
+        内容はパースせずにバイト列のまま逐次変換する。書き直した場合は目録の
+        シャードファイルの位置が古くなるため、目録を作り直させる。
+        """
+        converted = False
+        for paper_file in self._paper_files():
+            if compression_of(paper_file) == self.compression:
+                continue
+            target = strip_compression(paper_file)
+            target = target.with_name(
+                target.name + COMPRESSION_SUFFIXES.get(self.compression, "")
+            )
+            tmp_file = target.with_name(target.name + ".tmp")
+            with open_file(paper_file) as src:
+                with open_file(tmp_file, "wb", self.compression) as dst:
+                    shutil.copyfileobj(src, dst)
+            durable_replace(tmp_file, target)
+            paper_file.unlink()
+            converted = True
+        if converted:
+            logger.info("論文シャードの圧縮方式を変更しました")
+            self.manifest.path.unlink(missing_ok=True)
+
+    # knowledge_graph.ttl の先頭に書くスナップショットの世代（Turtle のコメント）
+    GENERATION_HEADER = b"# kgpaper-generation: "
+
+    def _snapshot_id(self) -> str:
+        """
+        スナップショットの世代の識別子（ジャーナル・目録・索引・バイナリスナップショットの基準）。
+
+        コンパクションのたびに knowledge_graph.ttl の先頭へ書く UUID。ファイルの中身や
+        更新時刻が前の世代と同じでも区別できる。世代を持たない旧形式のファイルでは
+        サイズと更新時刻を使う。
+        """
+        graph_file = self._existing(self.graph_file)
+        try:
+            with open_file(graph_file) as f:
+                line = f.readline()
+            stat = graph_file.stat()
+        except FileNotFoundError:
+            return "none"
+        if line.startswith(self.GENERATION_HEADER):
+            return line[len(self.GENERATION_HEADER) :].strip().decode("ascii")
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _load_binary_snapshot(self) -> bool:
+        """
+        テキスト形式と同じ世代のバイナリスナップショットがあれば読み込む。
+
+        スナップショットに記録された Turtle の識別子が現在のものと一致しない
+        （Turtle の方が新しい）場合や、壊れている場合は False を返し、
+        テキスト形式からの読み込みにフォールバックさせる。
+        """
+        if self.backend == "sqlite" or not self.config.binary_snapshot_enabled:
+            return False
+        snapshot_file = self._existing(self.snapshot_file)
+        if read_snapshot_base_id(snapshot_file) != self._snapshot_id():
+            return False
+        try:
+            load_binary_snapshot(self.g, snapshot_file)
+        except ValueError as e:
+            logger.warning(f"バイナリスナップショットを使用できません: {e}")
+            return False
+        return True
+
+    def _load_manifest(self):
+        """論文の目録を読み込む。スナップショットと食い違う場合は作り直す"""
+        if self.manifest.load(self._snapshot_id()):
+            return
+        logger.info("論文の目録を作り直します")
+        self.manifest.clear()
+        self._scan_papers(self._update_manifest)
+        self.manifest.save(self._snapshot_id())
+
+    def _load_text_index(self):
+        """全文索引を読み込む。スナップショットと食い違う場合は作り直す"""
+        if self.text_index.load(self._snapshot_id()):
+            return
+        logger.info("全文索引を作り直します")
+        self.text_index.clear()
+        self._scan_papers(self._update_text_index)
+        self.text_index.save(self._snapshot_id())
+
+    def _scan_papers(self, update):
+        """論文の名前付きグラフを持つデータセットを update に渡す（lazy_load 時はシャードを1つずつ読む）"""
+        if self.lazy:
+            for paper_file in self._paper_files():
+                shard = Dataset()
+                with open_file(paper_file) as f:
+                    parse_nquads(shard, source=f)
+                update(shard)
+        else:
+            update(self.g)
+
+    def _update_manifest(self, dataset: Dataset, contexts=None):
+        """名前付きグラフの概要を目録へ反映する（contexts 省略時は全グラフ）"""
+        if contexts is None:
+            contexts = [graph.identifier for graph in dataset.graphs()]
+        for context in contexts:
+            if context == DATASET_DEFAULT_GRAPH_ID:
+                continue
+            shard_file = self._paper_file(context).relative_to(self.graph_dir)
+            self.manifest.update(
+                context, dataset.get_context(context), shard_file.as_posix()
+            )
+
+    def _update_text_index(self, dataset: Dataset, contexts=None):
+        """名前付きグラフの論文を全文索引へ反映する（contexts 省略時は全グラフ）"""
+        if contexts is None:
+            contexts = [graph.identifier for graph in dataset.graphs()]
+        for context in contexts:
+            if context != DATASET_DEFAULT_GRAPH_ID:
+                self.text_index.update(context, dataset.get_context(context))
+
+    def _ensure_text_index(self):
+        """
+        SQLite バックエンドの全文索引を用意する。
+
+        初回と、他のプロセス（接続）がデータベースを更新していた場合はストアから作り直す。
+        """
+        if self.backend != "sqlite":
+            return
+        version = self.g.store.data_version()
+        if self._text_index_version != version:
+            self.text_index.clear()
+            # Dataset.graphs() はデフォルトグラフを書き込むため、論文から名前付きグラフを引く
+            self._update_text_index(self.g, set(self.g.subjects(RDF.type, KG.Paper)))
+            self._text_index_version = version
+
+    def _ensure_search_index(self) -> bool:
+        """
+        search 専用の索引を用意する（使わない場合は False を返す）。
+
+        search.native_index が有効な場合に、初回の検索（search・search_page）時にグラフから作る。
+        lazy_load 時はメモリ上にない論文があるため使わない。SQLite バックエンドでは
+        他のプロセス（接続）がデータベースを更新していた場合に作り直す。
+        """
+        if not self.config.native_search or self.lazy:
+            return False
+        version = self.g.store.data_version() if self.backend == "sqlite" else 0
+        if self._search_index_version != version:
+            self.search_index = SearchIndex.build(self.g)
+            self._search_index_version = version
+        return True
+
+    def load_papers(self, paper_uris):
+        """
+        論文シャードを読み込む（lazy_load 時のみ）。
+
+        読み込み済みのシャードが max_loaded_papers を超えた場合は、
+        未保存の変更がないものを古い順にメモリから解放する。
+        """
+        if not self.lazy:
+            return
+        with self._lock:
+            requested = {URIRef(uri) for uri in paper_uris}
+            self._load_shards(requested)
+            # 未保存のシャードで上限を超えていても、要求されたシャードは解放しない
+            self._evict_shards(keep=requested)
+
+    def _load_shards(self, contexts):
+        for context in contexts:
+            if context == DATASET_DEFAULT_GRAPH_ID:
+                continue
+            if context in self._loaded:
+                self._loaded.move_to_end(context)
+                continue
+            paper_file = self._existing(self._paper_file(context))
+            if paper_file.exists():
+                # デフォルトグラフを消さないよう、一時データセット経由で追加する
+                shard = Dataset()
+                with open_file(paper_file) as f:
+                    parse_nquads(shard, source=f)
+                self.g.addN(shard.quads((None, None, None, None)))
+            self._loaded[context] = None
+
+    def _evict_shards(self, keep=()):
+        while len(self._loaded) > self.config.max_loaded_papers:
+            for context in self._loaded:
+                if context not in self._dirty_contexts and context not in keep:
+                    break
+            else:
+                return  # 残りはすべて未保存
+            del self._loaded[context]
+            self.g.remove_graph(context)
+
+    def _replay_journal(self):
+        """スナップショットの上にジャーナルの変更を再適用する"""
+        snapshot_id = self._snapshot_id()
+        if self.journal.base_id != snapshot_id:
+            # コンパクション後の古いジャーナル、またはスナップショットが外部で置換された
+            if self.journal.size > 0:
+                logger.warning("ジャーナルの基準スナップショットが一致しないため破棄します")
+            self.journal.reset(snapshot_id)
+        else:
+            for batch in self.journal.replay():
+                self._apply_changes(batch.added, batch.removed, batch.dropped)
+        self._base_id = snapshot_id
+
+    def refresh(self) -> bool:
+        """
+        他のプロセスが書き込んだ変更があれば取り込む。取り込んだ場合は True を返す。
+
+        ディスク上のバージョンファイルを読むだけで判定するため、読み取りのたびに呼べる。
+        ジャーナルの基準が同じならジャーナルの未適用部分だけを適用し、他のプロセスが
+        コンパクションしていればスナップショットから読み込み直す。
+        """
+        if self.backend == "sqlite" or self._transaction is not None:
+            return False
+        if read_version(self.version_file) == self.version:
+            return False
+        with self._lock, self._file_lock:
+            return self._sync()
+
+    def _sync(self) -> bool:
+        """ディスク上の新しいバージョンに追いつく（ロックを保持した状態で呼ぶ）"""
+        if self.backend == "sqlite":
+            return False
+        version = read_version(self.version_file)
+        if version == self.version:
+            return False
+        self.version = version
+
+        if (
+            self.config.journal_enabled
+            and self._base_id is not None
+            and self.journal.base_id == self._base_id == self._snapshot_id()
+        ):
+            batches = list(self.journal.replay(self.journal.end_offset))
+            logger.info(f"他のプロセスの変更を取り込みます: {len(batches)} batches")
+            for batch in batches:
+                self._apply_changes(batch.added, batch.removed, batch.dropped)
+        else:
+            logger.info("他のプロセスがスナップショットを更新したため読み込み直します")
+            self.g = self._new_dataset()
+            self._bind_prefixes()
+            self._loaded.clear()
+            self._dirty_contexts.clear()
+            self.manifest.clear()
+            self.text_index.clear()
+            self._search_index_version = None
+            self._load_graph_locked()
+            self._changes += 1
+
+        # 未永続化の変更は、ジャーナル上でも他のプロセスの変更の後に書かれるため適用し直す
+        for batch in self._pending_batches:
+            self._apply_changes(batch.added, batch.removed, batch.dropped)
+        return True
+
+    def _bump_version(self):
+        """ディスク上のバージョンを進める（ロックを保持した状態で呼ぶ）"""
+        self.version += 1
+        write_version(self.version_file, self.version)
+
+    def _paper_file(self, context) -> Path:
+        """名前付きグラフの保存先ファイル"""
+        digest = hashlib.sha1(context.n3().encode("utf-8")).hexdigest()
+        return self.paper_dir / f"{digest}.nq{COMPRESSION_SUFFIXES.get(self.compression, '')}"
 
     def save_graph(self):
-        self.g.serialize(destination=self.graph_file, format="turtle")
+        """
+        未保存の変更をスナップショットへ書き出す。
+
+        論文ごとの名前付きグラフは変更のあったものだけを書き直し、
+        デフォルトグラフ（論文に属さないトリプル）は Turtle で書き出す。
+        続けて論文の目録と、データセット全体のバイナリスナップショットを書き出す
+        （lazy_load 時はメモリ上にない論文があるためバイナリスナップショットは作らない）。
+        いずれも一時ファイルを fsync してから置換する。SQLite ストアではコミットのみ行う。
+        """
+        if self.backend == "sqlite":
+            self.g.commit()
+            self._record_versions()
+            return
+
+        with self._lock, self._file_lock:
+            self._sync()
+            self._record_versions()
+            for context in self._dirty_contexts - {DATASET_DEFAULT_GRAPH_ID}:
+                paper_file = self._paper_file(context)
+                graph = self.g.get_context(context)
+                if len(graph) == 0:
+                    self._remove_variants(paper_file, keep=False)
+                    continue
+                snapshot = Dataset()
+                snapshot.addN((s, p, o, context) for s, p, o in graph)
+                tmp_file = paper_file.with_name(paper_file.name + ".tmp")
+                with open_file(tmp_file, "wb", self.compression) as f:
+                    snapshot.serialize(destination=f, format="nquads")
+                durable_replace(tmp_file, paper_file)
+                self._remove_variants(paper_file)
 
-    def _escape_sparql_string(self, value: str) -> str:
-        """SPARQL文字列リテラル用にエスケープする"""
-        return value.replace("\\", "\\\\").replace('"', '\\"')
+            tmp_file = self.graph_file.with_name(self.graph_file.name + ".tmp")
+            with open_file(tmp_file, "wb", self.compression) as f:
+                f.write(self.GENERATION_HEADER + uuid.uuid4().hex.encode("ascii") + b"\n")
+                self.g.default_graph.serialize(destination=f, format="turtle")
+            durable_replace(tmp_file, self.graph_file)
+            self._remove_variants(self.graph_file)
+            self.manifest.save(self._snapshot_id())
+            self.text_index.save(self._snapshot_id())
 
-    def _validate_paper_title(self, title: str) -> str:
-        """論文タイトルのバリデーション"""
-        if not title or not title.strip():
-            raise ValueError("Paper title cannot be empty")
-        return title.strip()
+            if self.backend == "mmap":
+                from .mmap_store import write_mmap_snapshot
+
+                # 新しいスナップショットを公開して開き直す（メモリ上の差分は不要になる）
+                mmap_file = self.mmap_file
+                write_mmap_snapshot(self.g, mmap_file, self._snapshot_id())
+                self.g.store.open_snapshot(mmap_file)
+                self._remove_stale_mmap()
+                self._remove_variants(self.snapshot_file, keep=False)
+            elif self.config.binary_snapshot_enabled and not self.lazy:
+                write_binary_snapshot(self.g, self.snapshot_file, self._snapshot_id())
+                self._remove_variants(self.snapshot_file)
+            else:
+                self._remove_variants(self.snapshot_file, keep=False)
+
+            self._dirty_contexts.clear()
+            self._unstable_bnodes = bnodes_of(self.g.default_graph)
+            # 書き込み待ちの変更もスナップショットに含まれた
+            self._pending_batches.clear()
+            self._bump_version()
+
+    def compact(self):
+        """ジャーナルを新しいスナップショットに畳み込み、ジャーナルを空にする"""
+        with self._lock, self._file_lock:
+            self.save_graph()
+            if self.backend != "sqlite" and self.config.journal_enabled:
+                self.journal.reset(self._snapshot_id())
+                self._base_id = self._snapshot_id()
+
+    def flush(self):
+        """バックグラウンド書き込みが有効な場合、未保存の変更が永続化されるまで待つ"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self):
+        """未保存の変更を永続化し、バックグラウンド書き込みスレッドを停止する"""
+        if self.writer is not None:
+            self.writer = None
+            self._close_writer()
+
+    def _apply_changes(self, added=(), removed=(), dropped=()):
+        """クワッド単位の差分をデータセットに適用する"""
+        self._changes += 1
+        touched = {quad[3] for quad in removed} | {quad[3] for quad in added}
+        if self.lazy:
+            # 変更する論文のシャードは先に読み込んでおく（削除するグラフは不要）
+            self._load_shards(touched - set(dropped))
+            self._loaded.update((context, None) for context in dropped)
+        # search 専用の索引は変更されたノード（削除するグラフは削除前の主語）から更新する
+        nodes = set()
+        if self._search_index_version is not None:
+            for context in dropped:
+                nodes.update(self.g.get_context(context).subjects())
+            nodes.update(node for quad in (*added, *removed) for node in (quad[0], quad[2]))
+        for context in dropped:
+            self.g.remove_graph(context)
+            self._dirty_contexts.add(context)
+        for s, p, o, context in removed:
+            self.g.remove((s, p, o, context))
+            self._dirty_contexts.add(context)
+        self.g.addN(added)
+        self._dirty_contexts.update(quad[3] for quad in added)
+        if self.backend != "sqlite":
+            self._update_manifest(self.g, touched | set(dropped))
+        if self.backend != "sqlite" or self._text_index_version is not None:
+            self._update_text_index(self.g, touched | set(dropped))
+        if nodes:
+            self.search_index.update(self.g, nodes)
+        if self.lazy:
+            self._evict_shards()
+
+    def _commit(self, added: list = (), removed: list = (), dropped: list = ()):
+        """
+        差分をデータセットに適用して永続化する。
+
+        トランザクション中は適用して差分を記録するだけで、検証と永続化は
+        トランザクションの終了時にまとめて行う。バックグラウンド書き込みが
+        有効な場合は書き込み待ちに積んで通知するだけで、永続化は書き込み
+        スレッドがまとめて行う。
+        """
+        batch = JournalBatch(removed=list(removed), added=list(added), dropped=list(dropped))
+        with self._lock:
+            if self._transaction is not None:
+                self._apply_in_transaction(batch)
+                return
+
+            if self.backend == "sqlite":
+                # SQLite ストアでは1回の変更を1トランザクションとして書き込む
+                try:
+                    self._apply_versioned(batch)
+                except Exception:
+                    self.g.rollback()
+                    self._text_index_version = None  # 取り消した変更を索引から戻すため作り直す
+                    self._search_index_version = None
+                    self._changes += 1
+                    self._pending_versions.clear()
+                    raise
+                self.g.commit()
+                self._record_versions()
+                return
+
+            self._apply_versioned(batch)
+            self._queue_batch(batch)
+
+    def _apply_versioned(self, batch: JournalBatch):
+        """変更を適用し、版の履歴が有効なら実際の差分を記録待ちに積む"""
+        if self.versions is None:
+            self._apply_changes(batch.added, batch.removed, batch.dropped)
+            return
+        removed, added = self._effective_changes(batch)
+        self._apply_changes(batch.added, batch.removed, batch.dropped)
+        if removed or added:
+            self._pending_versions.append(
+                JournalBatch(removed=removed, added=added, dropped=[])
+            )
+
+    def _record_versions(self):
+        """記録待ちの差分を版として保存する"""
+        if not self._pending_versions:
+            return
+        with self._file_lock:
+            self.versions.record(self._pending_versions)
+            self._pending_versions = []
+
+    def _queue_batch(self, batch: JournalBatch):
+        """適用済みの変更を書き込み待ちに積み、永続化する（または書き込みスレッドに通知する）"""
+        self._pending_batches.append(batch)
+        if self.writer is None:
+            self._persist_pending()
+        else:
+            self.writer.notify()
+
+    @property
+    def _transaction(self) -> Transaction | None:
+        """現在のスレッドで実行中のトランザクション"""
+        return getattr(self._local, "transaction", None)
+
+    @contextmanager
+    def transaction(self):
+        """
+        複数の変更を1つのトランザクションにまとめる。
+
+            with gm.transaction():
+                gm.add_json_ld(paper1)
+                gm.delete_paper(uri)
+
+        ブロック内の変更はその場でグラフに反映されるが、永続化は終了時に1回だけ行う。
+        ブロックの間はロックを保持するため、他のスレッドの読み取り（get_all_papers・search 等の
+        公開メソッド）は終了まで待ち、途中の状態や取り消される変更を読むことはない
+        （self.g を直接読む場合はこの限りでない）。
+        終了時には追加分（デルタ）だけを対象に必須プロパティを検証し、検証エラーを
+        含めブロック内で例外が発生した場合はすべての変更を取り消して例外を再送出する。
+        入れ子にした場合は外側のトランザクションにまとめられる。
+        """
+        if self._transaction is not None:
+            yield self._transaction
+            return
+
+        with self._lock:
+            transaction = self._local.transaction = Transaction()
+            try:
+                yield transaction
+                # 追加・変更された主語だけを現在のグラフで検証する
+                self._validator.validate(self.g, transaction.added_subjects())
+            except BaseException:
+                self._local.transaction = None
+                self._rollback_transaction(transaction)
+                raise
+            self._local.transaction = None
+
+            if self.versions is not None and (transaction.added or transaction.removed):
+                self._pending_versions.append(transaction.as_batch())
+            if self.backend == "sqlite":
+                self.g.commit()
+                self._record_versions()
+            elif transaction.added or transaction.removed:
+                self._queue_batch(transaction.as_batch())
+
+    def _apply_in_transaction(self, batch: JournalBatch):
+        """変更を適用し、実際に削除・追加されたクワッドをトランザクションに記録する"""
+        removed, added = self._effective_changes(batch)
+        self._apply_changes(batch.added, batch.removed, batch.dropped)
+        self._transaction.record(removed, added)
+
+    def _effective_changes(self, batch: JournalBatch) -> tuple[list, list]:
+        """変更を適用した場合に実際に削除・追加されるクワッド (removed, added) を返す"""
+        if self.lazy:
+            # 取り消せるよう、削除するグラフのシャードも読み込んでおく
+            self._load_shards(
+                {quad[3] for quad in batch.removed}
+                | {quad[3] for quad in batch.added}
+                | set(batch.dropped)
+            )
+        dropped = set(batch.dropped)
+        removed = [
+            quad
+            for context in batch.dropped
+            for quad in self.g.quads((None, None, None, context))
+        ]
+        removed += [
+            quad for quad in batch.removed if quad[3] not in dropped and quad in self.g
+        ]
+        removed_set = set(removed)
+        added = [
+            quad
+            for quad in dict.fromkeys(batch.added)
+            if quad in removed_set or quad not in self.g
+        ]
+        return removed, added
+
+    def _rollback_transaction(self, transaction: Transaction):
+        if self.backend == "sqlite":
+            self.g.rollback()
+            self._text_index_version = None
+            self._search_index_version = None
+            self._changes += 1
+            return
+        inverse = transaction.inverse()
+        self._apply_changes(inverse.added, inverse.removed)
+
+    def _persist_pending(self):
+        """
+        書き込み待ちの変更をジャーナルへの追記（またはスナップショット）で永続化する。
+
+        失敗した場合、書き込み待ちの変更は残り、次回の呼び出しで再試行される。
+        """
+        with self._lock, self._file_lock:
+            if not self._pending_batches:
+                return
+            # 他のプロセスの変更を先に取り込み、その後ろに追記する
+            self._sync()
+            if not self.config.journal_enabled:
+                self.save_graph()
+                return
+            # Turtle 由来の空白ノードの削除はジャーナルで表現できないため
+            # スナップショットごと書き直す
+            if any(
+                bnodes_of(batch.removed) & self._unstable_bnodes
+                for batch in self._pending_batches
+            ):
+                self.compact()
+                return
+            self._record_versions()
+            self.journal.extend(self._pending_batches)
+            self._pending_batches = []
+            self._bump_version()
+            if self.journal.size > self.config.journal_max_bytes:
+                self.compact()
+
+    def _partition_by_paper(self, graph: Graph) -> list:
+        """
+        トリプルを所属する論文の名前付きグラフへ振り分けたクワッドを返す。
+
+        論文・その実験・実験のコンテンツを主語とするトリプルは論文のグラフへ、
+        それ以外（コーパスから論文への参照など）はデフォルトグラフへ入れる。
+        """
+        owner = {}
+        for paper in graph.subjects(RDF.type, KG.Paper):
+            owner[paper] = paper
+            for exp in graph.objects(paper, KG.hasExperiment):
+                owner.setdefault(exp, paper)
+                for cont in graph.objects(exp, KG.hasContent):
+                    owner.setdefault(cont, paper)
+        return [
+            (s, p, o, owner.get(s, DATASET_DEFAULT_GRAPH_ID)) for s, p, o in graph
+        ]
+
+    def _migrate_default_graph(self) -> bool:
+        """デフォルトグラフ上の論文を名前付きグラフへ移す。移した場合は True を返す"""
+        default = self.g.default_graph
+        moved = [
+            quad
+            for quad in self._partition_by_paper(default)
+            if quad[3] != DATASET_DEFAULT_GRAPH_ID
+        ]
+        if not moved:
+            return False
+
+        logger.info(f"旧形式のグラフを論文ごとの名前付きグラフへ移行します: {len(moved)} triples")
+        self._apply_changes(
+            added=moved,
+            removed=[(s, p, o, DATASET_DEFAULT_GRAPH_ID) for s, p, o, _ in moved],
+        )
+        return True
 
     # 各エンティティの必須プロパティ
     REQUIRED_PROPERTIES = {
@@ -53,36 +860,35 @@ class GraphManager:
         "kg:Discussion": ["kg:contentType", "kg:text"],
         "kg:Conclusion": ["kg:contentType", "kg:text"],
     }
+    _validator = RequiredPropertyValidator(REQUIRED_PROPERTIES)
+
+    def add_json_ld(
+        self,
+        json_data: dict,
+        on_duplicate: str | None = None,
+        source_hash: str | None = None,
+    ) -> dict:
+        """
+        Adds JSON-LD data to the graph.
 
-    def _validate_required_properties(self, graph: Graph):
-        """全エンティティの必須プロパティをチェック"""
-        for entity_type, props in self.REQUIRED_PROPERTIES.items():
-            for prop in props:
-                query = f"""
-                    SELECT ?entity WHERE {{
-                        ?entity a {entity_type} .
-                        FILTER NOT EXISTS {{ ?entity {prop} ?val }}
-                    }}
-                """
-                missing = list(graph.query(query, initNs=PREFIXES))
-                if missing:
-                    raise ValueError(f"{entity_type} must have {prop}")
-
-    def add_json_ld(self, json_data: dict):
-        """Adds JSON-LD data to the graph."""
+        登録済みの論文と重複する論文は on_duplicate（省略時は storage.on_duplicate）に従って
+        処理する。source_hash には元の PDF のハッシュ（dedup.file_hash）を渡すと論文に記録され、
+        同じ PDF の再登録を検出できる。
+        戻り値: {取り込んだ論文の URI: 重複した登録済みの論文の URI}
+        """
         # Check if @context is present, if not, might need to inject or assume
         # The prompt output should have @context.
 
-        # バリデーション: paperTitleが存在する場合はチェック
-        if "kg:paperTitle" in json_data:
-            self._validate_paper_title(json_data["kg:paperTitle"])
-        elif "paperTitle" in json_data:
-            self._validate_paper_title(json_data["paperTitle"])
+        # 抽出プロンプトの @context であれば文字列に変換せず直接トリプルにする
+        parsed = parse_json_ld(json_data)
+        if source_hash is not None:
+            for paper in set(parsed.subjects(RDF.type, KG.Paper)):
+                parsed.add((paper, KG.sourceHash, Literal(source_hash)))
 
-        # rdflib's parse can handle json-ld string
-        json_str = json.dumps(json_data)
-        self.g.parse(data=json_str, format="json-ld")
-        self.save_graph()
+        # バリデーション（論文タイトル・必須プロパティ。トランザクション中は終了時にまとめて行う）
+        if self._transaction is None:
+            self._validator.validate(parsed)
+        return self._ingest(parsed, on_duplicate)
 
     @staticmethod
     def validate_json_ld_structure(json_data: dict) -> None:
@@ -94,122 +900,1015 @@ class GraphManager:
         if "@type" not in json_data:
             raise ValueError("Missing @type in JSON-LD")
 
-    def import_graph(self, file_path: str):
-        """Imports an external RDF file."""
+    @classmethod
+    def _parse_import_file(cls, file_path: str, validate: bool = True) -> Graph:
+        """
+        インポートするRDFファイルを1回だけパースし、バリデーションしたグラフを返す。
+
+        .gz / .zst で圧縮されたファイルは逐次展開しながら読み込む。
+        """
+        name = str(strip_compression(file_path))
         # 拡張子チェックからxmlを削除
-        if file_path.endswith(".xml"):
+        if name.endswith(".xml"):
             raise ValueError("XML format is not supported")
 
-        format = "turtle" if file_path.endswith(".ttl") else "json-ld"
-
-        # JSON系の場合は構造バリデーション
-        if format == "json-ld":
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                self.validate_json_ld_structure(data)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON file: {e}")
+        format = "turtle" if name.endswith(".ttl") else "json-ld"
+        # 相対IRIの基底はファイルから直接パースした場合と揃える
+        public_id = Path(file_path).absolute().as_uri()
 
         try:
-            # 一時的なグラフにパースしてバリデーション
-            temp_graph = Graph()
-            temp_graph.parse(file_path, format=format)
-
-            # paperTitleのバリデーション
-            query = "SELECT ?title WHERE { ?s kg:paperTitle ?title }"
-            for row in temp_graph.query(query, initNs=PREFIXES):
-                self._validate_paper_title(str(row.title))
-
-            # 必須プロパティのバリデーション
-            self._validate_required_properties(temp_graph)
+            if format == "json-ld":
+                # JSON系の場合は構造バリデーションした辞書をそのままグラフにする
+                with open_file(file_path) as f:
+                    text = f.read().decode("utf-8")
+                try:
+                    data = json.loads(text)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON file: {e}")
+                cls.validate_json_ld_structure(data)
+                temp_graph = parse_json_ld(data, public_id=public_id)
+            else:
+                temp_graph = Graph()
+                with open_file(file_path) as f:
+                    temp_graph.parse(f, format=format, publicID=public_id)
 
-            # バリデーション成功後、本グラフに追加
-            self.g.parse(file_path, format=format)
-            self.save_graph()
+            if validate:
+                cls._validator.validate(temp_graph)
         except ValueError:
             raise  # バリデーションエラーはそのまま再送出
         except Exception as e:
             raise ValueError(f"Failed to import graph: {e}")
+        return temp_graph
 
-    def delete_paper(self, paper_uri: str):
+    def import_graph(self, file_path: str, on_duplicate: str | None = None) -> dict:
         """
-        Deletes a paper and its associated experiments/contents.
-        This requires a SPARQL DELETE WHERE/Update or selective removal.
-        Since rdflib Memory store doesn't support SPARQL Update efficiently always,
-        we can iterate and remove.
+        Imports an external RDF file.
+
+        戻り値: {取り込んだ論文の URI: 重複した登録済みの論文の URI}（add_json_ld と同じ）
         """
-        # Strategy: Find all sub-nodes (Experiment, Content) linked to this Paper
-        # and remove them.
+        # トランザクション中の検証は終了時にまとめて行う
+        temp_graph = self._parse_import_file(file_path, validate=self._transaction is None)
+        # バリデーション成功後、本グラフに追加
+        return self._ingest(temp_graph, on_duplicate)
 
-        paper_ref = URIRef(paper_uri)
+    def find_duplicate(self, source_hash: str | None = None, doi: str | None = None) -> str | None:
+        """
+        元の PDF のハッシュ（dedup.file_hash）または DOI が一致する登録済みの論文の URI。
+        PDF から抽出する前に登録済みかどうかを確かめるために使う。
+        """
+        keys = []
+        if source_hash:
+            keys.append(f"source:{source_hash}")
+        if doi and normalize_doi(doi):
+            keys.append(f"doi:{normalize_doi(doi)}")
+        self.refresh()
+        with self._lock:
+            found = self._find_duplicate(None, keys)
+        return str(found) if found is not None else None
 
-        # 1. Provide a query to find all related triples
-        # Pattern:
-        # ?paper ?p ?o .
-        # ?paper kg:hasExperiment ?exp . ?exp ?p2 ?o2 .
-        # ?exp kg:hasContent ?cont . ?cont ?p3 ?o3 .
+    def _find_duplicate(self, paper, keys: list[str], title=None) -> URIRef | None:
+        """同じ URI の論文、または重複検出のキーのいずれかを持つ登録済みの論文"""
+        if self.backend == "sqlite":
+            return self._query_duplicate(paper, keys, title)
+        if paper is not None and str(paper) in self.manifest.entries:
+            return paper
+        found = self.manifest.find(keys)
+        return URIRef(found) if found is not None else None
 
-        # We can use SPARQL to select distinct subjects to delete
-        query = """
-        SELECT DISTINCT ?s
-        WHERE {
-            BIND(?target_paper AS ?paper)
-            {
-                ?paper ?p ?o .
-                BIND(?paper AS ?s)
-            }
-            UNION
-            {
-                ?paper kg:hasExperiment ?exp .
-                ?exp ?p2 ?o2 .
-                BIND(?exp AS ?s)
-            }
-            UNION
-            {
-                ?paper kg:hasExperiment ?exp .
-                ?exp kg:hasContent ?cont .
-                ?cont ?p3 ?o3 .
-                BIND(?cont AS ?s)
-            }
+    def _query_duplicate(self, paper, keys: list[str], title=None) -> URIRef | None:
+        """SQLite では目録を持たないため、キーの種類ごとにグラフの索引を引いて照合する"""
+        if paper is not None and (paper, RDF.type, KG.Paper) in self.g:
+            return paper
+        for key in keys:
+            kind, value = key.split(":", 1)
+            if kind == "source":
+                candidates = self.g.subjects(KG.sourceHash, Literal(value))
+            elif kind == "doi":
+                candidates = (
+                    subject
+                    for subject, doi in self.g.subject_objects(KG.paperDOI)
+                    if normalize_doi(str(doi)) == value
+                )
+            else:
+                # 内容の指紋はタイトルが一致する論文についてだけ計算する
+                candidates = (
+                    subject
+                    for subject, other in self.g.subject_objects(KG.paperTitle)
+                    if title is not None
+                    and normalize_text(str(other)) == normalize_text(str(title))
+                    and key in dedup_keys(self.g.get_context(subject), subject)
+                )
+            found = next(iter(candidates), None)
+            if found is not None:
+                return found
+        return None
+
+    def _ingest(
+        self,
+        graph: Graph,
+        on_duplicate: str | None,
+        quads: list | None = None,
+        removed: list = (),
+        skolemize: bool = True,
+        ignore: set = frozenset(),
+    ) -> dict:
+        """
+        重複を処理したうえでグラフの論文を追加し、重複の対応を返す。
+
+        実験・コンテンツの空白ノードは、重複の処理（merge で付け替える論文が決まる）の後に
+        IRI へ置き換える（storage.skolemize。skolemize=False なら呼び出し側で後から置き換える）。
+        quads には論文のグラフへ振り分け済みのクワッドを、removed には合わせて削除する
+        クワッドを、ignore には重複として照合しない登録済みの論文を渡せる（逐次インポートのチャンク）。
+        """
+        added, dedup_removed, dropped, duplicates = self._deduplicate(
+            graph, on_duplicate, quads, ignore
+        )
+        if skolemize and self.config.skolemize:
+            added = skolemize_quads(added)
+        if duplicates:
+            logger.info(f"重複した論文を検出しました: {duplicates}")
+        self._commit(added=added, removed=list(removed) + dedup_removed, dropped=dropped)
+        return duplicates
+
+    def _deduplicate(
+        self, graph: Graph, on_duplicate: str | None = None, quads=None, ignore=frozenset()
+    ):
+        """
+        取り込むグラフの論文を登録済みの論文と照合し、重複した論文を方針に従って処理した
+        (追加・削除するクワッド, 削除するグラフ, {取り込んだ論文: 登録済みの論文}) を返す。
+
+        - skip: 重複した論文のトリプルを取り込まない
+        - replace: 登録済みの論文を削除してから取り込む
+        - merge: 登録済みの論文にない実験（内容の指紋で比較）とプロパティだけを追加する
+        skip / merge では、他のグラフからの参照（コーパスの hasPaper など）を登録済みの論文へ付け替える。
+        quads を省略するとグラフを論文ごとに振り分けたクワッドを使う。ignore の論文とは照合しない。
+        """
+        policy = on_duplicate or self.config.duplicate_policy
+        if policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"Unsupported duplicate policy: {policy}")
+        if quads is None:
+            quads = self._partition_by_paper(graph)
+        self.refresh()
+        duplicates = {}
+        for paper in set(graph.subjects(RDF.type, KG.Paper)):
+            title = graph.value(paper, KG.paperTitle)
+            existing = self._find_duplicate(paper, dedup_keys(graph, paper), title)
+            if existing is not None and existing not in ignore:
+                duplicates[paper] = existing
+        if not duplicates:
+            return quads, [], [], {}
+
+        added, removed, dropped = [], [], []
+        for paper, existing in duplicates.items():
+            if policy == "replace":
+                removed.extend(self._paper_references(existing))
+                dropped.append(existing)
+            elif policy == "merge":
+                added.extend(self._merge_quads(graph, paper, existing))
+        rename = {} if policy == "replace" else duplicates
+        for s, p, o, context in quads:
+            if context in rename:
+                continue
+            added.append((rename.get(s, s), p, rename.get(o, o), context))
+        return added, removed, dropped, {str(k): str(v) for k, v in duplicates.items()}
+
+    def _merge_quads(self, graph: Graph, paper, existing: URIRef) -> list:
+        """merge: 取り込む論文のうち登録済みの論文にない実験とプロパティを、登録済みの論文のクワッドにする"""
+        if self.lazy:
+            self.load_papers([existing])
+        current = self.g.get_context(existing)
+        known = {
+            experiment_fingerprint(current, experiment)
+            for experiment in current.objects(existing, KG.hasExperiment)
+        }
+        present = set(current.predicates(existing))
+        quads = []
+        merged = False
+        for p, o in graph.predicate_objects(paper):
+            if p == KG.hasExperiment:
+                fingerprint = experiment_fingerprint(graph, o)
+                if fingerprint in known:
+                    continue
+                known.add(fingerprint)
+                merged = True
+                quads.append((existing, p, o, existing))
+                quads.extend(
+                    (*triple, existing)
+                    for node in (o, *graph.objects(o, KG.hasContent))
+                    for triple in graph.triples((node, None, None))
+                )
+            elif p == KG.sourceHash or p not in present:
+                quads.append((existing, p, o, existing))
+
+        # 取り込んだ論文（と変わる前の登録済みの論文）の指紋を記録し、再登録も検出できるようにする
+        fingerprints = {content_fingerprint(graph, paper)}
+        if merged:
+            fingerprints.add(content_fingerprint(current, existing))
+        else:
+            fingerprints.discard(content_fingerprint(current, existing))
+        stored = set(map(str, current.objects(existing, KG.contentHash)))
+        quads.extend(
+            (existing, KG.contentHash, Literal(fingerprint), existing)
+            for fingerprint in sorted(fingerprints - stored - {None})
+        )
+        return quads
+
+    IMPORT_SUFFIXES = (".ttl", ".jsonld", ".json")
+
+    def import_directory(
+        self, path: str, workers: int | None = None, on_duplicate: str | None = None
+    ) -> dict:
+        """
+        ディレクトリ以下の RDF ファイル（.ttl / .jsonld / .json。.gz / .zst の圧縮も可）を
+        まとめてインポートする。
+
+        各ファイルのパースとバリデーションはプロセスプールで並列に行い、ワーカーは
+        N-Triples 文字列を返す。ワーカーは spawn で起動し（スレッドやロックを持つ親プロセスを
+        fork しない）、数は workers（省略時は storage.import_workers と CPU 数の小さい方）とする。成功したファイルのトリプルは1回の変更としてまとめて
+        追加・保存する。失敗したファイルはスキップし、エラーとして報告する。
+        登録済みの論文と重複する論文は on_duplicate に従って処理する（add_json_ld と同じ）。
+
+        戻り値: {"imported": [ファイル], "errors": {ファイル: メッセージ}, "triples": 件数,
+        "duplicates": {取り込んだ論文: 登録済みの論文}}
+        """
+        files = [
+            str(file)
+            for file in sorted(Path(path).rglob("*"))
+            if file.is_file()
+            and strip_compression(file).suffix.lower() in self.IMPORT_SUFFIXES
+        ]
+        workers = workers or min(self.config.import_workers, os.cpu_count() or 1)
+
+        if workers == 1 or len(files) <= 1:
+            results = map(_import_worker, files)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(files)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                results = list(executor.map(_import_worker, files))
+
+        imported, errors = [], {}
+        merged = Graph()
+        for file, (ntriples, error) in zip(files, results):
+            if error is not None:
+                logger.warning(f"インポート失敗: {file}: {error}")
+                errors[file] = error
+                continue
+            merged.parse(data=ntriples, format="nt")
+            imported.append(file)
+
+        duplicates = self._ingest(merged, on_duplicate) if len(merged) else {}
+        return {
+            "imported": imported,
+            "errors": errors,
+            "triples": len(merged),
+            "duplicates": duplicates,
         }
+
+    STREAM_FORMATS = {".nt": "nt", ".nq": "nquads", ".jsonld": "json-ld", ".json": "json-ld"}
+
+    def import_stream(
+        self,
+        file_path: str,
+        chunk_size: int = 100,
+        chunk_lines: int = 10000,
+        progress: Callable[[int, int], None] | None = None,
+        on_duplicate: str | None = None,
+    ) -> dict:
+        """
+        大きなファイルを逐次読み込みながらインポートする。
+
+        各チャンクは他のインポートと同じく、登録済みの論文との重複を on_duplicate
+        （省略時は storage.on_duplicate）に従って処理し、空白ノードを IRI に置き換えてから
+        コミットする（storage.skolemize）。
+
+        - JSON-LD（kg:PaperCorpus）: hasPaper の論文を1件ずつパース・検証し、
+          chunk_size 件ごとにコミットする。不正な論文はスキップして errors に報告する。
+          論文一覧より前に @context と @id がない場合は一覧全体を読み込んでから処理する。
+        - N-Triples / N-Quads: chunk_lines 行ずつパースしてコミットする。必須プロパティは
+          後続のチャンクで補われる場合があるため最後まで読んでから判定し、欠けていた
+          エンティティを errors に報告する（トリプル自体はインポート済み）。
+          実験・コンテンツはチャンクをまたいで現れうるため、空白ノードは最後まで読んでから
+          論文ごとに置き換える。
+
+        登録済みの論文と同じ URI の論文はチャンクに分けずに最後にまとめて照合する。
+        DOI などのキーでの重複は論文の型（kg:Paper）を含むチャンクの内容で照合し、
+        その論文の後続のチャンクにも同じ対応を適用する（skip / merge では読み飛ばす）。
+
+        照合の対象は取り込みを始める前から登録済みの論文で、同じファイル内の論文どうしは
+        （一括の取り込みと同じく）重複として扱わない。
+
+        .gz / .zst で圧縮されたファイルは逐次展開しながら読み込む。
+        progress にはコミットのたびに (読み込み済みバイト数, ファイルサイズ) が渡される
+        （圧縮ファイルでは圧縮後のバイト数）。
+
+        戻り値: {"papers": 件数, "triples": 件数, "errors": {論文・エンティティ: メッセージ},
+                 "duplicates": {取り込んだ論文の URI: 重複した登録済みの論文の URI}}
+        """
+        format = self.STREAM_FORMATS.get(strip_compression(file_path).suffix.lower())
+        if format is None:
+            raise ValueError(f"Unsupported format for streaming import: {file_path}")
+
+        policy = on_duplicate or self.config.duplicate_policy
+        if policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"Unsupported duplicate policy: {policy}")
+
+        total = os.path.getsize(file_path)
+        report = {"papers": 0, "triples": 0, "errors": {}, "duplicates": {}}
+        imported = set()  # この取り込みで追加した論文（重複の照合から除く）
+        held = {}  # 登録済みの URI の論文 -> 最後にまとめて照合するクワッド
+        renamed = {}  # 前のチャンクで重複として処理した論文 -> 登録済みの論文
+
+        def ingest(quads: list, removed: list = ()):
+            graph = Graph()
+            graph += ((s, p, o) for s, p, o, _ in quads)
+            duplicates = self._ingest(
+                graph, policy, quads, removed, skolemize=format == "json-ld", ignore=imported
+            )
+            if policy != "replace":
+                renamed.update({URIRef(k): URIRef(v) for k, v in duplicates.items()})
+            report["duplicates"].update(duplicates)
+
+        def commit(graph: Graph, done: int, quads=None, removed: list = ()):
+            if len(graph):
+                if quads is None:
+                    quads = self._partition_by_paper(graph)
+                report["triples"] += len(quads) - len(removed)
+                if renamed and policy != "replace":
+                    quads = [
+                        (renamed.get(s, s), p, renamed.get(o, o), c)
+                        for s, p, o, c in quads
+                        if c not in renamed
+                    ]
+                # 登録済みの URI の論文は後続のチャンクにも続きうるため、内容がそろう最後に照合する
+                contexts = {quad[3] for quad in quads} - {DATASET_DEFAULT_GRAPH_ID} - imported
+                registered = {
+                    c for c in contexts if c in held or self._find_duplicate(c, []) is not None
+                }
+                for quad in quads:
+                    if quad[3] in registered:
+                        held.setdefault(quad[3], []).append(quad)
+                quads = [quad for quad in quads if quad[3] not in registered]
+                if quads or removed:
+                    ingest(quads, removed)
+                imported.update(contexts - registered)
+            if progress is not None:
+                # 圧縮ファイルでは展開後のバイト数ではなくファイル上の位置を渡す
+                progress(raw.tell() if compression else done, total)
+
+        compression = compression_of(file_path)
+        invalid = {}
+        with open(file_path, "rb") as raw, wrap_reader(raw, compression) as f:
+            if format == "json-ld":
+                self._stream_corpus(f, commit, report, chunk_size)
+            else:
+                invalid = self._stream_lines(f, format, commit, report, chunk_lines)
+        if held:
+            quads = [quad for quads in held.values() for quad in quads]
+            # 保留した論文からのリンクより後に現れ、デフォルトグラフに入れた実験・コンテンツを移す
+            removed = []
+            links = [(o, c) for _, p, o, c in quads if p in (KG.hasExperiment, KG.hasContent)]
+            while links:
+                node, paper = links.pop()
+                default = list(self.g.quads((node, None, None, DATASET_DEFAULT_GRAPH_ID)))
+                for s, p, o, _ in default:
+                    removed.append((s, p, o, DATASET_DEFAULT_GRAPH_ID))
+                    quads.append((s, p, o, paper))
+                    if p in (KG.hasExperiment, KG.hasContent):
+                        links.append((o, paper))
+            ingest(quads, removed)
+            # 保留した論文を取り込んだ後のグラフで検証し直す
+            subjects = set(invalid) | {quad[0] for quad in quads}
+            subjects = {subject for subject in subjects if (subject, None, None) in self.g}
+            invalid = {}
+            for violation in self._validator.violations(self.g, subjects):
+                invalid.setdefault(violation.subject, violation.message)
+        for entity, message in invalid.items():
+            report["errors"][str(entity)] = message
+        if format != "json-ld" and self.config.skolemize:
+            self._skolemize_papers(sorted(imported | set(held) | set(renamed.values())))
+        return report
+
+    def _stream_corpus(self, file, commit, report: dict, chunk_size: int):
+        """kg:PaperCorpus の JSON-LD を論文1件ずつインポートする"""
+        stream = JsonStream(file)
+        header = {}
+
+        def is_paper_list(key: str) -> bool:
+            # 論文1件ごとのパースにはコーパスの @context と @id が必要
+            context = header.get("@context")
+            return (
+                "@id" in header
+                and isinstance(context, dict)
+                and resolves_to(key, context, KG.hasPaper)
+            )
+
+        chunk, count = Graph(), 0
+        for key, value, is_item in iter_json_members(stream, is_paper_list):
+            if not is_item:
+                header[key] = value
+                continue
+            count += 1
+            try:
+                chunk += self._parse_corpus_paper(header, key, value)
+                report["papers"] += 1
+            except Exception as e:
+                paper_id = value.get("@id") if isinstance(value, dict) else None
+                logger.warning(f"インポート失敗: {paper_id or f'#{count}'}: {e}")
+                report["errors"][paper_id or f"#{count}"] = str(e)
+            if count % chunk_size == 0:
+                commit(chunk, stream.bytes_read)
+                chunk = Graph()
+
+        # コーパス自身のトリプル（論文一覧を逐次処理できなかった場合は一覧も含む）
+        self.validate_json_ld_structure(header)
+        try:
+            graph = parse_json_ld(header)
+        except Exception as e:
+            raise ValueError(f"Failed to import graph: {e}")
+        self._validator.validate(graph)
+        report["papers"] += len(set(graph.subjects(RDF.type, KG.Paper)))
+        commit(chunk + graph, stream.bytes_read)
+
+    def _parse_corpus_paper(self, header: dict, key: str, paper) -> Graph:
+        """コーパスの論文1件を、コーパスからの参照と合わせてグラフにする"""
+        if not isinstance(paper, dict):
+            raise ValueError("Paper entry must be a dictionary")
+        document = {"@context": header["@context"], "@id": header["@id"], key: [paper]}
+        if "@type" in header:
+            document["@type"] = header["@type"]
+        try:
+            graph = parse_json_ld(document)
+        except Exception as e:
+            raise ValueError(f"Failed to import graph: {e}")
+        self._validator.validate(graph)
+        return graph
+
+    def _stream_lines(self, file, format: str, commit, report: dict, chunk_lines: int) -> dict:
+        """N-Triples / N-Quads をチャンクごとにインポートし、必須プロパティの欠けたエンティティを返す"""
+        # 外部ファイルの空白ノードのラベルを既存の空白ノードと区別する
+        bnode_prefix = f"{uuid.uuid4().hex}_"
+        invalid = {}  # エンティティ -> 違反（後続のチャンクで補われれば消える）
+
+        for text, done in iter_line_chunks(file, chunk_lines):
+            chunk = Dataset()
+            try:
+                parse_nquads(chunk, data=text, bnode_prefix=bnode_prefix)
+            except Exception as e:
+                raise ValueError(f"Failed to import graph: {e}")
+            removed = []
+            if format == "nt":
+                quads, removed = self._partition_stream_chunk(chunk.default_graph)
+            else:
+                quads = list(chunk.quads((None, None, None, None)))
+            graph = Graph()
+            graph += ((s, p, o) for s, p, o, _ in quads)
+
+            report["papers"] += sum(
+                1 for quad in quads if quad[1] == RDF.type and quad[2] == KG.Paper
+            )
+            commit(graph, done, quads, removed)
+
+            # このチャンクに現れた主語（重複として取り込まなかったものを除く）を、
+            # 取り込み済みのトリプルと合わせて検証する
+            subjects = {quad[0] for quad in quads if (quad[0], None, None) in self.g}
+            for subject in subjects:
+                invalid.pop(subject, None)
+            for violation in self._validator.violations(self.g, subjects):
+                invalid.setdefault(violation.subject, violation.message)
+        return invalid
+
+    def _partition_stream_chunk(self, graph: Graph) -> tuple[list, list]:
+        """
+        チャンクのトリプルを論文のグラフへ振り分け、(追加, 削除) のクワッドを返す。
+
+        チャンク内で論文をたどれない実験・コンテンツは、既存のグラフと
+        リンク元（hasExperiment / hasContent）から所属する論文を探す。
+        前のチャンクで所属が分からずデフォルトグラフに入れたトリプルは、
+        論文の型やリンク元が現れた時点で論文のグラフへ移す。
+        """
+        quads = self._partition_by_paper(graph)
+        owners = {s: c for s, _, _, c in quads if c != DATASET_DEFAULT_GRAPH_ID}
+
+        def owner(node) -> URIRef:
+            if node not in owners:
+                owners[node] = DATASET_DEFAULT_GRAPH_ID  # 循環参照の防止
+                contexts = [self.paper_of(node) or DATASET_DEFAULT_GRAPH_ID]
+                for prop in (KG.hasExperiment, KG.hasContent):
+                    contexts += [quad[3] for quad in self.g.quads((None, prop, node, None))]
+                    contexts += [owner(parent) for parent in graph.subjects(prop, node)]
+                owners[node] = next(
+                    (c for c in contexts if c != DATASET_DEFAULT_GRAPH_ID),
+                    DATASET_DEFAULT_GRAPH_ID,
+                )
+            return owners[node]
+
+        moved, removed = [], []
+
+        def adopt(node, paper):
+            # デフォルトグラフにある node とその実験・コンテンツのトリプルを移す
+            owners[node] = paper
+            for s, p, o, _ in list(self.g.quads((node, None, None, DATASET_DEFAULT_GRAPH_ID))):
+                removed.append((s, p, o, DATASET_DEFAULT_GRAPH_ID))
+                moved.append((s, p, o, paper))
+                if p in (KG.hasExperiment, KG.hasContent) and owners.get(
+                    o, DATASET_DEFAULT_GRAPH_ID
+                ) == DATASET_DEFAULT_GRAPH_ID:
+                    adopt(o, paper)
+
+        adopted = set()
+        changed = True
+        while changed:
+            changed = False
+            for s, p, o, _ in quads:
+                if p == RDF.type and o == KG.Paper:
+                    target = s
+                elif p in (KG.hasExperiment, KG.hasContent):
+                    target = o
+                else:
+                    continue
+                paper = owner(s)
+                if target not in adopted and paper != DATASET_DEFAULT_GRAPH_ID:
+                    adopted.add(target)
+                    adopt(target, paper)
+                    changed = True
+            if changed:
+                # 所属が分かった論文に合わせて、未解決だった主語を調べ直す
+                owners = {
+                    node: c for node, c in owners.items() if c != DATASET_DEFAULT_GRAPH_ID
+                }
+
+        added = moved + [(s, p, o, owner(s)) for s, p, o, _ in quads]
+        return added, removed
+
+    def delete_paper(self, paper_uri: str):
         """
+        Deletes a paper and its associated experiments/contents.
+        論文・実験・コンテンツは論文IRIをキーとする名前付きグラフにまとめて
+        格納されているため、そのグラフを丸ごと削除する。
+        """
+        paper_ref = URIRef(paper_uri)
+        self._commit(removed=self._paper_references(paper_ref), dropped=[paper_ref])
 
-        results = self.g.query(query, initBindings={"target_paper": paper_ref})
-        subjects_to_remove = [row.s for row in results]
+    def _paper_references(self, paper_ref: URIRef) -> list:
+        """
+        他のグラフにある論文への参照（コーパスの hasPaper など）と、
+        名前付きグラフ外に直接追加された論文自身のトリプル（論文の削除時に一緒に削除する）
+        """
+        return [
+            quad
+            for pattern in ((paper_ref, None, None, None), (None, None, paper_ref, None))
+            for quad in self.g.quads(pattern)
+            if quad[3] != paper_ref
+        ]
 
-        for s in subjects_to_remove:
-            self.g.remove((s, None, None))
+    def skolemize_existing(self) -> int:
+        """
+        既存のグラフの実験・コンテンツの空白ノードを決定的な IRI に置き換える（一度だけ行う移行）。
 
-        # Also remove incoming links to the paper? (e.g. lists)
-        self.g.remove((None, None, paper_ref))
+        論文を max_loaded_papers 件ずつ置き換えて保存し、置き換えた空白ノードの数を返す
+        （コマンドラインからは uv run python -m kgpaper.skolem --config config.yaml）。
+        """
+        self.refresh()
+        if self.backend == "sqlite":
+            papers = [
+                graph.identifier
+                for graph in self.g.graphs()
+                if graph.identifier != DATASET_DEFAULT_GRAPH_ID
+            ]
+        else:
+            papers = [URIRef(uri) for uri in self.manifest.entries]
+        renamed = self._skolemize_papers(papers)
+        logger.info(f"空白ノードを IRI に置き換えました: {renamed} nodes")
+        return renamed
 
-        self.save_graph()
+    def _skolemize_papers(self, papers: list) -> int:
+        """論文の実験・コンテンツの空白ノードを IRI に置き換え、置き換えた数を返す"""
+        renamed = 0
+        batch_size = self.config.max_loaded_papers
+        for start in range(0, len(papers), batch_size):
+            batch = papers[start : start + batch_size]
+            if self.lazy:
+                self.load_papers(batch)
+            removed, added = [], []
+            for paper in batch:
+                graph = self.g.get_context(paper)
+                mapping = skolem_map(graph)
+                renamed += len(mapping)
+                for s, p, o in list(graph) if mapping else ():
+                    if s in mapping or o in mapping:
+                        removed.append((s, p, o, paper))
+                        added.append((mapping.get(s, s), p, mapping.get(o, o), paper))
+            if removed:
+                self._commit(removed=removed, added=added)
+                if self.lazy:
+                    # 変更したシャードは保存するまで解放できないため、次の論文を読む前に書き出す
+                    self.compact()
+        return renamed
 
     def clear_all(self):
         """Clears the entire graph."""
-        self.g = Graph()
-        self._bind_prefixes()
-        self.save_graph()  # Overwrite with empty
+        # lazy_load 時は未読み込みの論文シャードも削除対象に含める
+        with self._lock:
+            contexts = {graph.identifier for graph in self.g.graphs()}
+            contexts.update(URIRef(uri) for uri in self.manifest.entries)
+            if self._transaction is not None:
+                self._commit(dropped=list(contexts))
+                return
+            self._apply_versioned(JournalBatch(removed=[], added=[], dropped=list(contexts)))
+            self.compact()  # Overwrite with empty
+
+    def list_versions(self) -> list[dict]:
+        """
+        保持している版の一覧（古い順）。
+
+        各版は id・作成日時・追加/削除したクワッド数・変更した論文・差分のバイト数を持ち、
+        最後の版が現在の状態に対応する。checkout / rollback の版は戻した先の版（restores）も持つ。
+        """
+        self._require_versions()
+        with self._lock:
+            self._record_versions()
+            return self.versions.entries()
+
+    def checkout(self, version: int):
+        """
+        グラフを版 version の状態に戻す。
+
+        最新の版から version より新しい版の差分を打ち消し合わせた正味の差分を
+        1回の変更として適用するため、かかる時間は差分の大きさに比例する。
+        戻す操作自体も戻した先（restores）を記録した新しい版になるため、さらに checkout で取り消せる。
+        """
+        self._require_versions()
+        with self._lock, self._file_lock:
+            self.refresh()
+            self._record_versions()
+            head = self.versions.head
+            net = Transaction()
+            for delta in reversed(self.versions.deltas_after(version)):
+                net.record(removed=delta.added, added=delta.removed)
+            if net.added or net.removed:
+                self._commit(added=list(net.added), removed=list(net.removed))
+                self._record_versions()
+                if self.versions.head != head:
+                    self.versions.mark_restore(self.versions.head, version)
+
+    def rollback(self):
+        """
+        直前の変更を取り消す（現在の状態になった変更の版の1つ前の状態に戻す）。
+
+        checkout / rollback の版は戻した先の状態として扱うため、繰り返すと変更を
+        1つずつさかのぼる（取り消しを取り消すには checkout を使う）。
+        """
+        self._require_versions()
+        with self._lock, self._file_lock:
+            self.refresh()
+            self._record_versions()
+            state = self.versions.state_of(self.versions.head)
+            if state == 0:
+                raise ValueError("No version to roll back")
+            self.checkout(state - 1)
+
+    def _require_versions(self):
+        if self.versions is None:
+            raise ValueError("Versioning is disabled (storage.versioning: false)")
+
+    def owned_subjects(self, paper_uri: str) -> set:
+        """論文が所有する主語（論文・実験・コンテンツ）の集合"""
+        with self._lock:
+            if self.backend == "sqlite":
+                # SQLite ではグラフ列の索引で名前付きグラフを直接引く
+                return set(self.g.get_context(URIRef(paper_uri)).subjects())
+            return self.manifest.owned_subjects(paper_uri)
+
+    def paper_of(self, subject) -> URIRef | None:
+        """主語を所有する論文（どの論文にも属さない場合は None）"""
+        with self._lock:
+            if self.backend == "sqlite":
+                return next(
+                    (
+                        quad[3]
+                        for quad in self.g.quads((subject, None, None, None))
+                        if quad[3] != DATASET_DEFAULT_GRAPH_ID
+                    ),
+                    None,
+                )
+            owner = self.manifest.owner(subject)
+        return URIRef(owner) if owner is not None else None
+
+    def paper_stats(self, paper_uri: str) -> dict:
+        """論文の概要（タイトル・DOI・実験数・コンテンツ数・トリプル数・主語数）"""
+        self.refresh()
+        with self._lock:
+            if self.backend == "sqlite":
+                entry = paper_summary(self.g.get_context(URIRef(paper_uri)), URIRef(paper_uri))
+            else:
+                entry = self.manifest.entries.get(str(paper_uri))
+        if entry is None or entry["triples"] == 0:
+            raise ValueError(f"Paper not found: {paper_uri}")
+        stats = {key: value for key, value in entry.items() if key not in ("file", "keys")}
+        stats["subjects"] = len(entry["subjects"])
+        return stats
+
+    def export_paper(
+        self, paper_uri: str, format: str = "turtle", destination: str | None = None
+    ) -> str | None:
+        """
+        論文の名前付きグラフ（論文・実験・コンテンツ）をシリアライズする。
+
+        destination を指定するとファイルへ書き出し（.gz / .zst なら逐次圧縮する）、
+        None を返す。
+        """
+        self.refresh()
+        paper_ref = URIRef(paper_uri)
+        with self._lock:
+            if self.lazy:
+                self.load_papers([paper_ref])
+            graph = self.g.get_context(paper_ref)
+            if len(graph) == 0:
+                raise ValueError(f"Paper not found: {paper_uri}")
+            if destination is None:
+                return graph.serialize(format=format)
+            with open_file(destination, "wb") as f:
+                graph.serialize(destination=f, format=format)
+
+    def check_ownership(self) -> list[str]:
+        """
+        論文 -> 所有する主語の索引とグラフの整合性を確認し、問題の一覧を返す（空なら整合）。
+
+        目録に記録された主語と名前付きグラフの実際の主語の食い違い、
+        複数の論文に所有される主語、逆引き索引の誤り、目録にない論文グラフを検出する。
+        """
+        self.refresh()
+        problems = []
+        owners = {}
+        with self._lock:
+            if self.backend == "sqlite":
+                papers = {
+                    str(graph.identifier): set(graph.subjects())
+                    for graph in self.g.graphs()
+                    if graph.identifier != DATASET_DEFAULT_GRAPH_ID and len(graph)
+                }
+            else:
+                papers = {}
+                for paper in self.manifest.entries:
+                    paper_ref = URIRef(paper)
+                    if self.lazy and paper_ref not in self._loaded:
+                        shard = Dataset()
+                        with open_file(self._existing(self._paper_file(paper_ref))) as f:
+                            parse_nquads(shard, source=f)
+                        graph = shard.get_context(paper_ref)
+                    else:
+                        graph = self.g.get_context(paper_ref)
+                    actual = set(graph.subjects())
+                    expected = self.manifest.owned_subjects(paper)
+                    if actual != expected:
+                        problems.append(
+                            f"{paper}: 索引の主語 {len(expected)} 件とグラフの主語 "
+                            f"{len(actual)} 件が一致しません"
+                        )
+                    papers[paper] = expected
+                for graph in self.g.graphs():
+                    if (
+                        graph.identifier != DATASET_DEFAULT_GRAPH_ID
+                        and len(graph)
+                        and str(graph.identifier) not in self.manifest.entries
+                    ):
+                        problems.append(f"{graph.identifier}: 索引にない論文グラフです")
+
+            for paper, subjects in papers.items():
+                for subject in subjects:
+                    if subject in owners:
+                        problems.append(
+                            f"{subject}: {owners[subject]} と {paper} の両方に属しています"
+                        )
+                        continue
+                    owners[subject] = paper
+                    if self.paper_of(subject) != URIRef(paper):
+                        problems.append(f"{subject}: 逆引き索引の論文が {paper} ではありません")
+        return problems
+
+    def get_all_papers(
+        self,
+        sort: str | None = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """
+        論文の一覧（URI・タイトル・文書種別・元ファイル・DOI・実験数・コンテンツ数）。
+
+        sort（CATALOG_SORT_KEYS のいずれか）で並べ替え、offset / limit でページ分割する。
+        ファイル形式のバックエンドでは保守している論文の目録から返すため、クエリを評価しない。
+        """
+        self.refresh()
+        with self._lock:
+            if self.backend == "sqlite":
+                return sort_papers(self._query_papers(self.g), sort, descending, offset, limit)
+            unmigrated = self._unmigrated_papers()
+            if not unmigrated:
+                return self.manifest.papers(sort, descending, offset, limit)
+            return sort_papers(
+                self.manifest.papers() + unmigrated, sort, descending, offset, limit
+            )
+
+    def count_papers(self) -> int:
+        """get_all_papers が返す論文の総数（ページ数の計算用）"""
+        self.refresh()
+        with self._lock:
+            if self.backend == "sqlite":
+                return len(self._query_papers(self.g))
+            return self.manifest.count() + len(self._unmigrated_papers())
+
+    def _unmigrated_papers(self) -> list[dict]:
+        """
+        名前付きグラフを介さずデフォルトグラフへ直接追加された論文（次回起動時に移行される）。
+        通常は存在しないため、索引で kg:Paper の有無を確かめてからクエリを評価する。
+        """
+        default = self.g.default_graph
+        if next(default.triples((None, RDF.type, KG.Paper)), None) is None:
+            return []
+        listed = self.manifest.entries
+        return [
+            paper for paper in self._query_papers(default) if paper["uri"] not in listed
+        ]
 
-    def get_all_papers(self):
-        """Returns list of paper metadata for management UI."""
-        query = """
-        SELECT ?paper ?title ?type ?source
+    # get_all_papers のクエリ（目録に載っていない論文の一覧に使う）
+    PAPERS_QUERY = """
+        SELECT ?paper ?title ?type ?source ?doi
+               (COUNT(DISTINCT ?experiment) AS ?experiments)
+               (COUNT(DISTINCT ?content) AS ?contents)
         WHERE {
             ?paper a kg:Paper ;
                    kg:paperTitle ?title .
             OPTIONAL { ?paper kg:documentType ?type }
             OPTIONAL { ?paper kg:sourceFile ?source }
+            OPTIONAL { ?paper kg:paperDOI ?doi }
+            OPTIONAL {
+                ?paper kg:hasExperiment ?experiment .
+                OPTIONAL { ?experiment kg:hasContent ?content }
+            }
         }
+        GROUP BY ?paper ?title ?type ?source ?doi
         """
-        results = self.g.query(query)
+
+    def _query_papers(self, graph: Graph) -> list[dict]:
+        results = graph.query(prepared_query(self.PAPERS_QUERY))
         return [
             {
                 "uri": str(row.paper),
                 "title": str(row.title),
                 "type": str(row.type) if row.type else "",
                 "source": str(row.source) if row.source else "",
+                "doi": str(row.doi) if row.doi else "",
+                "experiments": int(row.experiments),
+                "contents": int(row.contents),
             }
             for row in results
         ]
+
+    @property
+    def cache_version(self) -> tuple:
+        """
+        検索結果のキャッシュのキーに含めるグラフの版。
+
+        このインスタンスで変更を適用する（他のプロセスの変更の取り込みを含む）たびに変わる。
+        SQLite では他の接続がコミットした変更も data_version で反映する。
+        """
+        if self.backend == "sqlite":
+            return self._cache_token, self._changes, self.g.store.data_version()
+        return self._cache_token, self._changes
+
+    def search(self, **filters) -> list[dict]:
+        """
+        SparqlQuery.search を実行する（条件は paper_title・source_context・experiment_type・
+        content_type・text_query）。
+
+        結果は正規化した条件（search_key）とグラフの版（cache_version）をキーとして
+        プロセス全体で共有するキャッシュに保持し、グラフが変わるまで再利用する。
+        返すリストと各行はキャッシュと共有されるため、呼び出し側で変更しないこと。
+        """
+        self.refresh()
+        normalized = search_key(**filters)
+        with self._lock:
+            key = (self.cache_version, normalized)
+
+        def compute():
+            # 検索中に変更が適用されないようロックを保持する（版を決めた後の変更を含む結果は
+            # 古い版のキーで保持されるが、新しい版のキーで古い結果が返ることはない）
+            with self._lock:
+                return self._search(**dict(normalized))
+
+        return self.result_cache.get_or_compute(key, compute)
+
+    def search_page(
+        self, limit: int = 100, cursor: str | None = None, **filters
+    ) -> tuple[list[dict], str | None]:
+        """
+        search と同じ条件の行を安定した順序で cursor の次から limit 件返す（SparqlQuery.search_page）。
+
+        戻り値は (行, 続きのカーソル)。続きがなければカーソルは None。
+        ページは search と同じくグラフの版ごとにキャッシュされるため、返す行は変更しないこと。
+        """
+        self.refresh()
+        normalized = search_key(**filters)
+        with self._lock:
+            key = (self.cache_version, normalized, limit, cursor)
+
+        def compute():
+            with self._lock:
+                query, options = self._paged_query(dict(normalized))
+                return query.search_page(limit, cursor, **options)
+
+        return self.result_cache.get_or_compute(key, compute)
+
+    def iter_search(self, cursor: str | None = None, **filters) -> Iterator[dict]:
+        """
+        search と同じ条件の行を安定した順序で1件ずつ返す（SparqlQuery.iter_search）。
+
+        行は1件ずつロックを取って読み出すため、途中で適用された変更はまだ読んでいない論文にだけ反映される。
+        lazy_load 時は対象の論文を max_loaded_papers 件ずつ読み込みながら返す。
+        """
+        self.refresh()
+        with self._lock:
+            query, options = self._paged_query(dict(search_key(**filters)))
+            rows = query.iter_search(cursor=cursor, **options)
+        while True:
+            with self._lock:
+                row = next(rows, None)
+            if row is None:
+                return
+            yield row
+
+    def _paged_query(self, filters: dict) -> tuple[SparqlQuery, dict]:
+        """iter_search / search_page の SparqlQuery と引数（ロックを保持した状態で呼ぶ）"""
+        query = self._query(filters.get("text_query"))
+        if not self.lazy:
+            return query, filters
+        papers = self._lazy_candidates(filters.get("paper_title"), self.manifest.entries)
+        return query, {
+            **filters,
+            "papers": papers,
+            "load_papers": self.load_papers,
+            "batch_size": self.config.max_loaded_papers,
+        }
+
+    def _query(self, text_query: str | None) -> SparqlQuery:
+        """検索に使う索引を用意した SparqlQuery（ロックを保持した状態で呼ぶ）"""
+        if text_query:
+            self._ensure_text_index()
+            return SparqlQuery(self.g, self.text_index)
+        search_index = self.search_index if self._ensure_search_index() else None
+        return SparqlQuery(self.g, self.text_index, search_index)
+
+    def _lazy_candidates(self, paper_title: str | None, papers) -> list[str]:
+        """目録のタイトルで絞り込んだ論文（lazy_load 時の検索対象）"""
+        return [
+            uri
+            for uri in papers
+            if (entry := self.manifest.entries.get(uri)) is not None
+            and entry["title"] is not None
+            and (not paper_title or paper_title.lower() in entry["title"].lower())
+        ]
+
+    def _search(
+        self, paper_title: str | None = None, text_query: str | None = None, **filters
+    ):
+        """
+        SparqlQuery.search を実行する。
+
+        text_query を指定すると全文索引で候補のコンテンツを引いてから条件を適用し、
+        スコアの高い順で返す。
+        lazy_load 時は目録のタイトル（text_query 指定時は全文索引の候補）で対象論文を絞り込み、
+        max_loaded_papers 件ずつシャードを読み込みながら検索する。
+        """
+        query = self._query(text_query)
+        if not self.lazy:
+            return query.search(paper_title=paper_title, text_query=text_query, **filters)
+
+        if text_query:
+            papers = dict.fromkeys(paper for _, paper, _ in self.text_index.search(text_query))
+        else:
+            papers = self.manifest.entries
+        candidates = self._lazy_candidates(paper_title, papers)
+        results = {}
+        batch_size = self.config.max_loaded_papers
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start : start + batch_size]
+            self.load_papers(batch)
+            batch_papers = set(batch)
+            for row in query.search(paper_title=paper_title, text_query=text_query, **filters):
+                if row["paper_uri"] in batch_papers:
+                    results.setdefault(row["content_uri"], row)
+        if text_query:
+            return sorted(results.values(), key=lambda row: -row["score"])
+        return list(results.values())
+
+
+def _import_worker(file_path: str) -> tuple[str | None, str | None]:
+    """import_directory のワーカー: (N-Triples 文字列, エラーメッセージ) を返す"""
+    try:
+        graph = GraphManager._parse_import_file(file_path)
+    except ValueError as e:
+        return None, str(e)
+    return graph.serialize(format="nt"), None
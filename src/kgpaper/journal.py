@@ -0,0 +1,233 @@
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+from rdflib import BNode, Dataset
+from rdflib.util import from_n3
+
+logger = logging.getLogger(__name__)
+
+
+class _LabelPreservingContext(dict):
+    """空白ノードのラベルをパース後もそのまま維持するための bnode_context"""
+
+    def __init__(self, prefix: str = ""):
+        super().__init__()
+        self.prefix = prefix
+
+    def get(self, key, default=None):
+        return self.prefix + key
+
+
+def durable_replace(tmp_path: Path, path: Path) -> None:
+    """
+    一時ファイルを fsync してから置換し、置換後のディレクトリエントリも永続化する。
+
+    クラッシュしても path には置換前か置換後のどちらかの内容だけが残る。
+    """
+    with open(tmp_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if os.name == "posix":
+        fd = os.open(Path(path).parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def parse_nquads(
+    dataset: Dataset, source=None, data: str | None = None, bnode_prefix: str = ""
+) -> None:
+    """
+    空白ノードのラベルを維持したまま N-Quads を Dataset に読み込む。
+
+    bnode_prefix を指定するとラベルの先頭に付ける（外部ファイルのラベルが
+    既存の空白ノードと衝突しないようにするため）。
+    rdflib の N-Quads パーサは読み込み先のデフォルトグラフを作り直すため、
+    デフォルトグラフの内容は呼び出し後に読み込むこと。
+    """
+    dataset.parse(
+        source=source,
+        data=data,
+        format="nquads",
+        bnode_context=_LabelPreservingContext(bnode_prefix),
+    )
+
+
+class JournalBatch(NamedTuple):
+    """1回のコミットで記録された変更（適用順: dropped → removed → added）"""
+
+    removed: list
+    added: list
+    dropped: list
+
+
+class ChangeJournal:
+    """
+    追記専用の変更ジャーナル（N-Quads形式のWAL）。
+
+    1回の変更は削除グラフ・削除・追加ブロックとコミット行からなるバッチとして
+    追記され、fsync されるまで確定しない。ファイル先頭のヘッダ行には
+    ジャーナルの基準となるスナップショットの識別子を記録する。
+
+        #B <snapshot_id>
+        #G
+        <graph>
+        #D
+        <s> <p> <o> <graph> .
+        #A
+        <s> <p> <o> <graph> .
+        #C <seq>
+    """
+
+    HEADER_MARK = "#B"
+    DROP_MARK = "#G"
+    REMOVE_MARK = "#D"
+    ADD_MARK = "#A"
+    COMMIT_MARK = "#C"
+    SECTIONS = (DROP_MARK, REMOVE_MARK, ADD_MARK)
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._seq = 0
+        # 直前の replay() で読み終えた位置（最後のコミット行の直後）
+        self.end_offset = 0
+
+    @property
+    def size(self) -> int:
+        """ジャーナルのバイト数（存在しない場合は0）"""
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def base_id(self) -> str | None:
+        """ヘッダに記録された基準スナップショットの識別子"""
+        try:
+            with open(self.path, "rb") as f:
+                header = f.readline().decode("utf-8").rstrip("\n")
+        except FileNotFoundError:
+            return None
+        if not header.startswith(self.HEADER_MARK + " "):
+            return None
+        return header[len(self.HEADER_MARK) + 1 :]
+
+    def reset(self, snapshot_id: str) -> None:
+        """ジャーナルを空にし、新しい基準スナップショットを記録する"""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(f"{self.HEADER_MARK} {snapshot_id}\n".encode("utf-8"))
+        durable_replace(tmp_path, self.path)
+        self._seq = 0
+        self.end_offset = self.size
+
+    def append(
+        self, added: Iterable = (), removed: Iterable = (), dropped: Iterable = ()
+    ) -> None:
+        """
+        1回分の変更をバッチとして追記し、fsync で永続化する。
+
+        added/removed はクワッド (s, p, o, graph)、dropped は削除する
+        名前付きグラフの識別子。
+        """
+        self.extend(
+            [JournalBatch(removed=list(removed), added=list(added), dropped=list(dropped))]
+        )
+
+    def extend(self, batches: Iterable[JournalBatch]) -> None:
+        """複数のバッチをまとめて追記し、1回の fsync で永続化する"""
+        chunks = []
+        for batch in batches:
+            dropped_nt = "".join(f"{graph.n3()}\n" for graph in batch.dropped)
+            removed_nq = self._serialize(batch.removed)
+            added_nq = self._serialize(batch.added)
+            if not dropped_nt and not removed_nq and not added_nq:
+                continue
+
+            self._seq += 1
+            if dropped_nt:
+                chunks.append(f"{self.DROP_MARK}\n{dropped_nt}")
+            if removed_nq:
+                chunks.append(f"{self.REMOVE_MARK}\n{removed_nq}")
+            if added_nq:
+                chunks.append(f"{self.ADD_MARK}\n{added_nq}")
+            chunks.append(f"{self.COMMIT_MARK} {self._seq}\n")
+        if not chunks:
+            return
+
+        with open(self.path, "ab") as f:
+            f.write("".join(chunks).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            self.end_offset = f.tell()
+
+    def replay(self, start: int = 0) -> Iterator[JournalBatch]:
+        """
+        コミット済みのバッチを順に返す。
+
+        start を指定すると、そのバイト位置（以前の end_offset）以降のバッチだけを返す。
+        読み終えた位置は end_offset に記録する。
+        末尾の未コミット部分（書き込み途中のクラッシュ）は切り詰める。
+        """
+        self.end_offset = start
+        if not self.path.exists():
+            return
+
+        section = None
+        buffers = {mark: [] for mark in self.SECTIONS}
+
+        with open(self.path, "rb") as f:
+            if start:
+                f.seek(start)
+                offset = valid_length = start
+            else:
+                offset = valid_length = len(f.readline())  # ヘッダ行
+            for raw in f:
+                offset += len(raw)
+                if not raw.endswith(b"\n"):
+                    break  # 書き込み途中で中断した行
+                line = raw.decode("utf-8").rstrip("\n")
+                if line in self.SECTIONS:
+                    section = line
+                elif line.startswith(self.COMMIT_MARK):
+                    self._seq = int(line.split()[1])
+                    yield JournalBatch(
+                        removed=self._parse(buffers[self.REMOVE_MARK]),
+                        added=self._parse(buffers[self.ADD_MARK]),
+                        dropped=[from_n3(term) for term in buffers[self.DROP_MARK]],
+                    )
+                    buffers = {mark: [] for mark in self.SECTIONS}
+                    section = None
+                    valid_length = self.end_offset = offset
+                elif section is not None:
+                    buffers[section].append(line)
+
+        self.end_offset = valid_length
+        if valid_length < self.size:
+            logger.warning(f"未コミットのジャーナル末尾を破棄します: {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_length)
+
+    def _serialize(self, quads: Iterable) -> str:
+        quads = list(quads)
+        if not quads:
+            return ""
+        ds = Dataset()
+        ds.addN(quads)
+        return ds.serialize(format="nquads").strip("\n") + "\n"
+
+    def _parse(self, lines: list[str]) -> list:
+        if not lines:
+            return []
+        ds = Dataset()
+        parse_nquads(ds, data="\n".join(lines))
+        return list(ds.quads((None, None, None, None)))
+
+
+def bnodes_of(statements: Iterable) -> set:
+    """トリプル・クワッド群に含まれる空白ノードの集合を返す"""
+    return {
+        term for statement in statements for term in statement if isinstance(term, BNode)
+    }
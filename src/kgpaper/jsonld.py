@@ -0,0 +1,153 @@
+import json
+from urllib.parse import urlsplit
+from rdflib import RDF, BNode, Graph, Literal, URIRef
+
+# rdflib の JSON-LD パーサーが接頭辞として扱う IRI の末尾
+_GEN_DELIMS = (":", "/", "?", "#", "[", "]", "@")
+# IRI に含まれる場合は汎用のパーサーに任せる文字
+_UNSAFE_IRI_CHARS = frozenset(' <>"{}|\\^`')
+
+
+class _Unsupported(Exception):
+    """高速経路で扱えない JSON-LD（汎用のパーサーで処理する）"""
+
+
+class JsonLdConverter:
+    """
+    KGpaper のスキーマ（Paper -> hasExperiment -> hasContent）の JSON-LD を、
+    文字列への変換と rdflib の汎用の展開処理を経ずに辞書から直接トリプルにする。
+
+    扱うのは、抽出プロンプトが出力する形の JSON-LD だけである:
+    @context は項目の定義（文字列か @id / @type だけの辞書）からなり、
+    ノードは @id（絶対 IRI かコンパクト IRI）・@type・プロパティを持ち、値は文字列か
+    入れ子のノードとそれらの配列。それ以外（@vocab・@language・@graph・@value・
+    数値など）を含む場合は _Unsupported を送出し、parse_json_ld が汎用のパーサーに任せる。
+    展開の規則は rdflib の JSON-LD パーサーと同じ結果になるように合わせている。
+    """
+
+    def __init__(self, context):
+        if not isinstance(context, dict):
+            raise _Unsupported("context")
+        self._definitions = context
+        # 項目 -> (IRI, 型の強制（"@id"・データ型の IRI・None）)
+        self.terms: dict[str, tuple[str, str | None]] = {}
+        for name, definition in context.items():
+            if name.startswith("@") or ":" in name:
+                raise _Unsupported(name)
+            if isinstance(definition, str):
+                self.terms[name] = (self._expand_definition(definition), None)
+            elif isinstance(definition, dict) and set(definition) <= {"@id", "@type"}:
+                idref = definition.get("@id")
+                coercion = definition.get("@type")
+                if not isinstance(idref, str) or not isinstance(coercion, (str, type(None))):
+                    raise _Unsupported(name)
+                if coercion is not None and coercion != "@id":
+                    coercion = self._expand_definition(coercion)
+                self.terms[name] = (self._expand_definition(idref), coercion)
+            else:
+                raise _Unsupported(name)
+        # 接頭辞として使える項目（IRI が区切り文字で終わるもの）
+        self.prefixes = {
+            name: iri for name, (iri, _) in self.terms.items() if iri.endswith(_GEN_DELIMS)
+        }
+        # 述語・型として使う項目の URIRef（ノードごとに作り直さない）
+        self._predicates = {name: URIRef(iri) for name, (iri, _) in self.terms.items()}
+        self._types: dict[str, URIRef] = {}
+
+    def _expand_definition(self, value: str, depth: int = 0) -> str:
+        """@context 内の値の展開（@context 内の項目はすべて接頭辞として使える）"""
+        if value.startswith("@") or depth > 8:
+            raise _Unsupported(value)
+        prefix, sep, local = value.partition(":")
+        if not sep:
+            raise _Unsupported(value)
+        if local.startswith("//"):
+            return self._check_iri(value)
+        definition = self._definitions.get(prefix)
+        if isinstance(definition, dict):
+            definition = definition.get("@id")
+        if not isinstance(definition, str):
+            return self._check_iri(value)
+        return self._expand_definition(definition, depth + 1) + local
+
+    @staticmethod
+    def _check_iri(iri: str) -> str:
+        if not urlsplit(iri).scheme or _UNSAFE_IRI_CHARS.intersection(iri):
+            raise _Unsupported(iri)
+        return iri
+
+    def _expand(self, value: str, use_terms: bool) -> str:
+        """項目・コンパクト IRI・絶対 IRI を展開する（相対 IRI と空白ノードは扱わない）"""
+        if use_terms and value in self.terms:
+            return self.terms[value][0]
+        prefix, sep, local = value.partition(":")
+        if not sep or prefix == "_":
+            raise _Unsupported(value)
+        if not local.startswith("//") and prefix in self.prefixes:
+            return self.prefixes[prefix] + local
+        return self._check_iri(value)
+
+    def convert(self, node: dict) -> Graph:
+        graph = Graph()
+        self._node(node, graph.add)
+        return graph
+
+    def _node(self, node: dict, add) -> URIRef | BNode:
+        if "@id" in node:
+            if not isinstance(node["@id"], str):
+                raise _Unsupported("@id")
+            subject = URIRef(self._expand(node["@id"], use_terms=False))
+        else:
+            subject = BNode()
+        for key, value in node.items():
+            if key in ("@id", "@context"):
+                continue
+            if key == "@type":
+                for type_ in value if isinstance(value, list) else [value]:
+                    if not isinstance(type_, str):
+                        raise _Unsupported("@type")
+                    if type_ not in self._types:
+                        self._types[type_] = URIRef(self._expand(type_, use_terms=True))
+                    add((subject, RDF.type, self._types[type_]))
+                continue
+            if key.startswith("@"):
+                raise _Unsupported(key)
+            if key in self.terms:
+                predicate, coercion = self._predicates[key], self.terms[key][1]
+            elif ":" in key:
+                predicate, coercion = URIRef(self._expand(key, use_terms=False)), None
+            else:
+                continue  # @context にない項目は JSON-LD の展開で捨てられる
+            for item in value if isinstance(value, list) else [value]:
+                add((subject, predicate, self._value(item, coercion, add)))
+        return subject
+
+    def _value(self, item, coercion: str | None, add):
+        if isinstance(item, dict):
+            if any(key.startswith("@") and key not in ("@id", "@type") for key in item):
+                raise _Unsupported("value object")
+            return self._node(item, add)
+        if not isinstance(item, str):
+            raise _Unsupported(type(item).__name__)  # 数値・真偽値・null・入れ子の配列
+        if coercion == "@id":
+            return URIRef(self._expand(item, use_terms=False))
+        if coercion is not None:
+            return Literal(item, datatype=URIRef(coercion))
+        return Literal(item)
+
+
+def parse_json_ld(data, public_id: str | None = None) -> Graph:
+    """
+    JSON-LD（辞書）をグラフにする。
+
+    KGpaper のスキーマの形であれば JsonLdConverter で直接トリプルにし、
+    それ以外は文字列に変換して rdflib の汎用の JSON-LD パーサーで読み込む。
+    """
+    if isinstance(data, dict) and "@context" in data:
+        try:
+            return JsonLdConverter(data["@context"]).convert(data)
+        except _Unsupported:
+            pass
+    graph = Graph()
+    graph.parse(data=json.dumps(data), format="json-ld", publicID=public_id)
+    return graph
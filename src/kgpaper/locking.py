@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from pathlib import Path
+from .journal import durable_replace
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    プロセス間で書き込みを直列化するアドバイザリロック（ロックファイルへの排他ロック）。
+
+    同じインスタンスは同一プロセス内で再入可能で、最も外側の release() で解放する。
+    複数のサーバープロセスが同じ graph_dir を共有する場合に、保存やジャーナルの
+    追記が互いの書き込みを上書きしないようにする。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = self._lock_file()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def _lock_file(self) -> int:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                return fd
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    return fd
+                except OSError:
+                    time.sleep(0.05)  # LK_LOCK は約10秒で諦めるため待ち続ける
+        except BaseException:
+            os.close(fd)
+            raise
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def read_version(path: Path) -> int:
+    """ディスク上のグラフのバージョン（ファイルがなければ0）"""
+    try:
+        return int(Path(path).read_text(encoding="utf-8").strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def write_version(path: Path, version: int) -> None:
+    """グラフのバージョンを書き込む（ロックを保持した状態で呼ぶこと）"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(f"{version}\n", encoding="utf-8")
+    durable_replace(tmp_path, path)
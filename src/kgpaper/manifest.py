@@ -0,0 +1,250 @@
+import json
+from bisect import bisect_left, insort
+from pathlib import Path
+from rdflib import Graph, URIRef
+from rdflib.term import Node
+from rdflib.util import from_n3
+from .dedup import dedup_keys
+from .journal import durable_replace
+from .ontology import KG
+
+
+def paper_summary(graph: Graph, paper: URIRef) -> dict:
+    """論文の名前付きグラフから目録に載せる概要を作る"""
+
+    def value(prop) -> str | None:
+        found = graph.value(paper, prop)
+        return str(found) if found is not None else None
+
+    experiments = set(graph.objects(paper, KG.hasExperiment))
+    contents = {
+        content for exp in experiments for content in graph.objects(exp, KG.hasContent)
+    }
+    return {
+        "title": value(KG.paperTitle),
+        "doi": value(KG.paperDOI),
+        "type": value(KG.documentType),
+        "source": value(KG.sourceFile),
+        "experiments": len(experiments),
+        "contents": len(contents),
+        "triples": len(graph),
+        # 論文が所有する主語（論文・実験・コンテンツ）。空白ノードはラベルで保持する
+        "subjects": sorted(subject.n3() for subject in set(graph.subjects())),
+        # 重複検出の索引キー（元の PDF のハッシュ・DOI・内容の指紋）
+        "keys": dedup_keys(graph, paper),
+    }
+
+
+# get_all_papers で並べ替えに使えるキー
+CATALOG_SORT_KEYS = ("title", "type", "source", "doi", "experiments", "contents", "uri")
+
+
+def catalog_row(uri: str, entry: dict) -> dict:
+    """目録の項目を get_all_papers 形式の行にする"""
+    return {
+        "uri": uri,
+        "title": entry["title"],
+        "type": entry["type"] or "",
+        "source": entry["source"] or "",
+        "doi": entry.get("doi") or "",
+        "experiments": entry.get("experiments", 0),
+        "contents": entry.get("contents", 0),
+    }
+
+
+def check_sort_key(sort: str | None) -> None:
+    if sort is not None and sort not in CATALOG_SORT_KEYS:
+        raise ValueError(
+            f"Unsupported sort key: {sort} (available: {', '.join(CATALOG_SORT_KEYS)})"
+        )
+
+
+def sort_key(row: dict, sort: str) -> tuple:
+    """行の並べ替えキー（文字列は大文字小文字を区別せず、値のない行は昇順で末尾。同順位は URI 順）"""
+    value = row[sort]
+    if isinstance(value, str):
+        return (value == "", value.casefold(), row["uri"])
+    return (False, value, row["uri"])
+
+
+def sort_papers(
+    papers: list[dict],
+    sort: str | None = None,
+    descending: bool = False,
+    offset: int = 0,
+    limit: int | None = None,
+) -> list[dict]:
+    """get_all_papers 形式の行を並べ替えてページ分割する（sort が None なら並べ替えない）"""
+    check_sort_key(sort)
+    if sort is not None:
+        papers = sorted(papers, key=lambda row: sort_key(row, sort), reverse=descending)
+    return papers[offset : None if limit is None else offset + limit]
+
+
+def _discard(index: dict, key, paper: str) -> None:
+    """索引のキーから論文を外す（論文がなくなったキーは消す）"""
+    papers = index.get(key)
+    if papers is not None:
+        papers.discard(paper)
+        if not papers:
+            del index[key]
+
+
+class PaperManifest:
+    """
+    論文シャード（papers/<hash>.nq）の目録。
+
+    論文ごとにタイトル・DOI・文書種別・元ファイル・実験数・コンテンツ数・所有する主語と
+    シャードファイルの位置を保持し、論文一覧をシャードを読まずに返せるようにする。
+    所有する主語からは主語 -> 論文の逆引き索引を、重複検出のキーからはキー -> 論文の索引を
+    メモリ上に作り、更新のたびに保守する。
+    論文一覧の並べ替え順も、キーごとに初回の要求時に作って更新のたびに差し替える。
+    ファイルには対応するスナップショットの識別子を記録し、食い違う場合は使わない。
+    """
+
+    VERSION = 3
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+        # 主語 -> 所有する論文、キー -> キーを持つ論文（同じ値を持つ論文が複数ありうるため集合）。
+        # 論文を置き換える更新はどの順序で適用されても索引が崩れない
+        self._owners: dict[Node, set[str]] | None = None
+        self._keys: dict[str, set[str]] | None = None
+        # 並べ替えキー -> タイトルを持つ論文の (並べ替えキー, URI) の昇順リスト
+        self._orders: dict[str, list[tuple]] = {}
+
+    def load(self, base_id: str) -> bool:
+        """base_id が一致する目録を読み込む。読み込めた場合は True を返す"""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if data.get("version") != self.VERSION or data.get("base_id") != base_id:
+            return False
+        self.entries = data["papers"]
+        self._owners = None
+        self._keys = None
+        self._orders = {}
+        return True
+
+    def clear(self) -> None:
+        """目録を空にする"""
+        self.entries = {}
+        self._owners = None
+        self._keys = None
+        self._orders = {}
+
+    def save(self, base_id: str) -> None:
+        """一時ファイル経由で目録を書き出す"""
+        data = {"version": self.VERSION, "base_id": base_id, "papers": self.entries}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        durable_replace(tmp_path, self.path)
+
+    def update(self, paper: URIRef, graph: Graph, shard_file: str) -> None:
+        """論文の概要を更新する（グラフが空なら目録から外す）"""
+        old = self.entries.pop(str(paper), None)
+        if old is not None and self._owners is not None:
+            for subject in self.owned_subjects(str(paper), old):
+                _discard(self._owners, subject, str(paper))
+        if old is not None and self._keys is not None:
+            for key in old.get("keys", ()):
+                _discard(self._keys, key, str(paper))
+        if old is not None:
+            self._reorder(str(paper), old, insert=False)
+        if len(graph) == 0:
+            return
+        entry = paper_summary(graph, paper) | {"file": shard_file}
+        self.entries[str(paper)] = entry
+        if self._owners is not None:
+            for subject in self.owned_subjects(str(paper), entry):
+                self._owners.setdefault(subject, set()).add(str(paper))
+        if self._keys is not None:
+            for key in entry["keys"]:
+                self._keys.setdefault(key, set()).add(str(paper))
+        self._reorder(str(paper), entry, insert=True)
+
+    def _reorder(self, uri: str, entry: dict, insert: bool) -> None:
+        """作成済みの並べ替え順へ論文を挿入する（insert=False なら取り除く）"""
+        if entry["title"] is None:
+            return
+        row = catalog_row(uri, entry)
+        for sort, order in self._orders.items():
+            key = sort_key(row, sort)
+            if insert:
+                insort(order, key)
+                continue
+            index = bisect_left(order, key)
+            if index < len(order) and order[index] == key:
+                del order[index]
+
+    def owned_subjects(self, paper: str, entry: dict | None = None) -> set[Node]:
+        """論文が所有する主語の集合"""
+        entry = entry if entry is not None else self.entries.get(str(paper))
+        if entry is None:
+            return set()
+        return {from_n3(subject) for subject in entry.get("subjects", ())}
+
+    def owner(self, subject: Node) -> str | None:
+        """主語を所有する論文（逆引き索引は初回の呼び出し時に作る）"""
+        if self._owners is None:
+            self._owners = {}
+            for paper, entry in self.entries.items():
+                for owned in self.owned_subjects(paper, entry):
+                    self._owners.setdefault(owned, set()).add(paper)
+        papers = self._owners.get(subject)
+        return min(papers) if papers else None
+
+    def find(self, keys) -> str | None:
+        """重複検出のキーのいずれかを持つ論文（索引は初回の呼び出し時に作る）"""
+        if self._keys is None:
+            self._keys = {}
+            for paper, entry in self.entries.items():
+                for key in entry.get("keys", ()):
+                    self._keys.setdefault(key, set()).add(paper)
+        return next((min(self._keys[key]) for key in keys if key in self._keys), None)
+
+    def count(self) -> int:
+        """タイトルを持つ論文の数"""
+        return sum(1 for entry in self.entries.values() if entry["title"] is not None)
+
+    def papers(
+        self,
+        sort: str | None = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """
+        タイトルを持つ論文の一覧（get_all_papers 形式）。
+
+        sort を指定すると保守している並べ替え順から offset 件目以降の limit 件だけを
+        行にするため、論文数によらず1ページ分のコストで返せる。
+        """
+        check_sort_key(sort)
+        if sort is None:
+            rows = [
+                catalog_row(uri, entry)
+                for uri, entry in self.entries.items()
+                if entry["title"] is not None
+            ]
+            return sort_papers(rows, offset=offset, limit=limit)
+        order = self._order(sort)
+        if descending:
+            stop = len(order) - offset
+            start = stop - limit if limit is not None else 0
+            keys = reversed(order[max(start, 0) : max(stop, 0)])
+        else:
+            keys = order[offset : None if limit is None else offset + limit]
+        return [catalog_row(key[-1], self.entries[key[-1]]) for key in keys]
+
+    def _order(self, sort: str) -> list[tuple]:
+        """並べ替えキーの昇順リスト（初回の要求時に作り、以降は update で保守する）"""
+        if sort not in self._orders:
+            self._orders[sort] = sorted(
+                sort_key(catalog_row(uri, entry), sort)
+                for uri, entry in self.entries.items()
+                if entry["title"] is not None
+            )
+        return self._orders[sort]
@@ -0,0 +1,483 @@
+import json
+import mmap
+import struct
+import threading
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+from rdflib import BNode, Dataset, Graph, Literal, URIRef
+from rdflib.store import Store
+from .array_store import _INDEX_ORDERS, _MAX_ID, _build, _dtype
+from .journal import durable_replace
+
+# ファイル形式（各セクションは8バイト境界に揃え、そのまま NumPy 配列として mmap する）
+#   ヘッダ      : magic(8) version(H) reserved(H) term_count(I) graph_count(I)
+#                 reserved(I) quad_count(Q) blob_length(Q)
+#   base_id     : 長さ(I) + UTF-8
+#   属性表      : 長さ(I) + JSON（[datatype, lang] のリスト）
+#   語彙の位置  : term_count + 1 個の uint64（語彙本文内のバイト位置）
+#   語彙の種類  : term_count バイト（U / B / L）
+#   語彙の属性  : term_count 個の uint16（属性表のインデックス、0 は属性なし）
+#   語彙の本文  : 全語彙を連結した UTF-8
+#   グラフ      : graph_count 個の int32（名前付きグラフの語彙ID）
+#   索引        : SPOC / POSC / OSPC の順に整列した quad_count 行の int32 x 4 を3つ
+# 語彙IDは (種類, 属性, 本文) の昇順に振るため、語彙の検索は二分探索で行える。
+MAGIC = b"KGPMMAP\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sHHIIIQQ")
+_U32 = struct.Struct("<I")
+_KINDS = {URIRef: ord("U"), BNode: ord("B"), Literal: ord("L")}
+
+
+def _align(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+
+def _kind(term) -> int:
+    if isinstance(term, Literal):
+        return _KINDS[Literal]
+    return _KINDS[BNode] if isinstance(term, BNode) else _KINDS[URIRef]
+
+
+def _extra_key(term) -> tuple:
+    if isinstance(term, Literal):
+        return (str(term.datatype) if term.datatype else None, term.language)
+    return (None, None)
+
+
+def write_mmap_snapshot(dataset: Dataset, path: Path, base_id: str) -> None:
+    """
+    データセット全体を mmap 用のスナップショットとして書き出す。
+
+    一時ファイルに書いてから置換する。mmap 中のファイルは Windows では置換できないため、
+    呼び出し側は世代ごとに別のファイル名で公開し、他のプロセスは古いファイルを
+    使い続けたまま、次に開いたときに新しいスナップショットを読む。
+    """
+    term_ids = {}
+    terms = []
+    quads = []
+    for quad in dataset.quads((None, None, None, None)):
+        for term in quad:
+            term_id = term_ids.get(term)
+            if term_id is None:
+                term_id = term_ids[term] = len(terms)
+                terms.append(term)
+            quads.append(term_id)
+    graph_terms = {graph.identifier for graph in dataset.graphs()}
+    for term in graph_terms - term_ids.keys():
+        term_ids[term] = len(terms)
+        terms.append(term)
+
+    extra_ids = {(None, None): 0}
+    keys = []
+    for term in terms:
+        extra = extra_ids.setdefault(_extra_key(term), len(extra_ids))
+        keys.append((_kind(term), extra, str(term).encode("utf-8")))
+    # 語彙IDを (種類, 属性, 本文) の昇順に振り直す
+    ranking = sorted(range(len(terms)), key=keys.__getitem__)
+    remap = np.empty(len(terms), dtype=np.int32)
+    remap[ranking] = np.arange(len(terms), dtype=np.int32)
+
+    offsets = np.zeros(len(terms) + 1, dtype=np.uint64)
+    if terms:
+        offsets[1:] = np.cumsum([len(keys[i][2]) for i in ranking])
+    blob = b"".join(keys[i][2] for i in ranking)
+    kinds = bytes(keys[i][0] for i in ranking)
+    extras = np.array([keys[i][1] for i in ranking], dtype=np.uint16)
+    graphs = np.sort(
+        remap[np.array([term_ids[term] for term in graph_terms], dtype=np.int64)]
+    ).astype(np.int32)
+
+    rows = remap[np.array(quads, dtype=np.int64)].reshape(-1, 4).T
+    columns = dict(zip("spoc", rows))
+    indexes = [_build(order, columns) for order in _INDEX_ORDERS.values()]
+
+    extra_table = [list(key) for key in sorted(extra_ids, key=extra_ids.get)]
+    base = base_id.encode("utf-8")
+    table = json.dumps(extra_table).encode("utf-8")
+    sections = [
+        _align(
+            _HEADER.pack(
+                MAGIC, VERSION, 0, len(terms), len(graphs), 0, len(indexes[0]), len(blob)
+            )
+            + _U32.pack(len(base))
+            + base
+            + _U32.pack(len(table))
+            + table
+        ),
+        offsets.tobytes(),
+        _align(kinds),
+        _align(extras.tobytes()),
+        _align(blob),
+        _align(graphs.tobytes()),
+        *(index.tobytes() for index in indexes),
+    ]
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.writelines(sections)
+    durable_replace(tmp_path, path)
+
+
+def read_mmap_base_id(path: Path) -> str | None:
+    """mmap スナップショットに記録された base_id を返す（読めない場合は None）"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size + _U32.size)
+            magic, version = _HEADER.unpack_from(header)[:2]
+            if magic != MAGIC or version != VERSION:
+                return None
+            (length,) = _U32.unpack_from(header, _HEADER.size)
+            return f.read(length).decode("utf-8")
+    except (OSError, struct.error, UnicodeDecodeError):
+        return None
+
+
+class MmapSnapshot:
+    """
+    mmap したスナップショット（読み取り専用）。
+
+    配列はファイルのページを直接参照するため、同じファイルを開いた複数のプロセスは
+    OS のページキャッシュを共有する。語彙は参照されたものだけを復元してキャッシュする。
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = self._mmap
+        try:
+            magic, version, _, term_count, graph_count, _, quad_count, blob_length = (
+                _HEADER.unpack_from(buffer)
+            )
+        except struct.error:
+            raise ValueError(f"mmap snapshot is truncated: {path}")
+        if magic != MAGIC:
+            raise ValueError(f"Not a mmap snapshot: {path}")
+        if version != VERSION:
+            raise ValueError(f"Unsupported mmap snapshot version: {version}")
+
+        offset = _HEADER.size
+        (length,) = _U32.unpack_from(buffer, offset)
+        self.base_id = buffer[offset + 4 : offset + 4 + length].decode("utf-8")
+        offset += 4 + length
+        (length,) = _U32.unpack_from(buffer, offset)
+        extra_table = json.loads(buffer[offset + 4 : offset + 4 + length])
+        offset += 4 + length
+        offset += -offset % 8
+
+        def section(dtype, count: int) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes + (-array.nbytes % 8)
+            return array
+
+        self._extras_table = [
+            (URIRef(datatype) if datatype else None, lang) for datatype, lang in extra_table
+        ]
+        self._extra_ids = {
+            (datatype, lang): index for index, (datatype, lang) in enumerate(extra_table)
+        }
+        self._offsets = section(np.uint64, term_count + 1)
+        self._kinds = section(np.uint8, term_count)
+        self._extras = section(np.uint16, term_count)
+        self._blob_offset = offset
+        offset += blob_length + (-blob_length % 8)
+        self.graph_ids = section(np.int32, graph_count)
+        self.indexes = {
+            name: section(_dtype(order), quad_count) for name, order in _INDEX_ORDERS.items()
+        }
+        if offset > len(buffer):
+            raise ValueError(f"mmap snapshot is truncated: {path}")
+        self.term_count = term_count
+        self._terms = {}
+        self._term_ids = {}
+
+    def close(self) -> None:
+        """マッピングを閉じる（以降は語彙・索引を参照できない）"""
+        # マッピングを参照する配列を先に手放す（参照が残っている間は閉じられない）
+        self._offsets = self._kinds = self._extras = self.graph_ids = None
+        self.indexes = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # 呼び出し側に配列が残っている場合は、それが解放された時点で解放される
+
+    def _key(self, term_id: int) -> tuple:
+        start = self._blob_offset + int(self._offsets[term_id])
+        end = self._blob_offset + int(self._offsets[term_id + 1])
+        return int(self._kinds[term_id]), int(self._extras[term_id]), self._mmap[start:end]
+
+    def term(self, term_id: int):
+        """語彙IDから RDF 語彙を復元する"""
+        term = self._terms.get(term_id)
+        if term is None:
+            kind, extra, value = self._key(term_id)
+            value = value.decode("utf-8")
+            if kind == _KINDS[Literal]:
+                datatype, lang = self._extras_table[extra]
+                term = Literal(value, lang=lang, datatype=datatype)
+            elif kind == _KINDS[BNode]:
+                term = BNode(value)
+            else:
+                term = URIRef(value)
+            self._terms[term_id] = term
+        return term
+
+    def term_id(self, term) -> int | None:
+        """RDF 語彙の語彙ID（スナップショットにない場合は None）を二分探索で求める"""
+        if term in self._term_ids:
+            return self._term_ids[term]
+        term_id = None
+        extra = self._extra_ids.get(_extra_key(term))
+        if extra is not None:
+            key = (_kind(term), extra, str(term).encode("utf-8"))
+            low, high = 0, self.term_count
+            while low < high:
+                middle = (low + high) // 2
+                if self._key(middle) < key:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low < self.term_count and self._key(low) == key:
+                term_id = low
+        self._term_ids[term] = term_id
+        return term_id
+
+    def match(self, triple_pattern, context_id: int | None) -> np.ndarray | None:
+        """パターンに一致する行を返す（スナップショットにない語彙を含む場合は None）"""
+        ids = {}
+        for column, term in zip("spo", triple_pattern):
+            if term is None:
+                continue
+            term_id = self.term_id(term)
+            if term_id is None:
+                return None
+            ids[column] = term_id
+
+        # 束縛された列が先頭に並ぶ索引を選ぶ（ArrayStore と同じ）
+        if "s" in ids and ("p" in ids or "o" not in ids):
+            name = "spo"
+        elif "p" in ids:
+            name = "pos"
+        elif ids:
+            name = "osp"
+        else:
+            name = "spo"
+        index = self.indexes[name]
+        prefix = [ids[column] for column in _INDEX_ORDERS[name][: len(ids)]]
+        if prefix:
+            padding = 4 - len(prefix)
+            bounds = np.array(
+                [tuple(prefix + [-1] * padding), tuple(prefix + [_MAX_ID] * padding)],
+                dtype=index.dtype,
+            )
+            low, high = np.searchsorted(index, bounds)
+            rows = index[low:high]
+        else:
+            rows = index
+        if context_id is not None:
+            rows = rows[rows["c"] == context_id]
+        return rows
+
+
+class MmapStore(Store):
+    """
+    mmap したスナップショットを土台にするトリプルストア（rdflib Store 実装）。
+
+    スナップショットは読み取り専用で複数のプロセスが共有し、その後の変更
+    （ジャーナルの再生など）はプロセスごとのメモリ上の差分として重ねる。
+    差分は追加分（メモリ上の Dataset）と、スナップショットから削除したクワッド・
+    グラフの語彙IDで表す。スナップショットを開き直すと差分は空になる。
+    """
+
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self.snapshot = None
+        self._added = Dataset()
+        self._removed = set()
+        self._dropped = set()
+        self._graphs = {}
+        self._namespace = {}
+        self._prefix = {}
+        # Streamlit のスレッド間で共有されるため差分の更新を直列化する
+        self._lock = threading.RLock()
+        super().__init__(configuration, identifier)
+
+    def open_snapshot(self, path: Path) -> None:
+        """
+        スナップショットを開き直し、メモリ上の差分を捨てる。
+
+        前のスナップショットのマッピングは閉じるため、読み取り中のイテレータがない
+        （GraphManager のロックを保持した）状態で呼ぶ。
+        """
+        with self._lock:
+            previous, self.snapshot = self.snapshot, MmapSnapshot(path)
+            self._added = Dataset()
+            self._removed = set()
+            self._dropped = set()
+        if previous is not None:
+            previous.close()
+
+    def _graph(self, identifier) -> Graph:
+        graph = self._graphs.get(identifier)
+        if graph is None:
+            graph = self._graphs[identifier] = Graph(store=self, identifier=identifier)
+        return graph
+
+    def _snapshot_context_id(self, identifier) -> int | None:
+        if self.snapshot is None or identifier is None:
+            return None
+        return self.snapshot.term_id(identifier)
+
+    def _snapshot_rows(self, triple_pattern, identifier):
+        """スナップショットの一致する行のうち、削除されていないものを (s, p, o, c) で返す"""
+        if self.snapshot is None:
+            return []
+        context_id = None
+        if identifier is not None:
+            context_id = self.snapshot.term_id(identifier)
+            if context_id is None or context_id in self._dropped:
+                return []
+        rows = self.snapshot.match(triple_pattern, context_id)
+        if rows is None or len(rows) == 0:
+            return []
+        if self._dropped:
+            rows = rows[~np.isin(rows["c"], list(self._dropped))]
+        keys = zip(*(rows[column].tolist() for column in "spoc"))
+        if not self._removed:
+            return keys
+        return (key for key in keys if key not in self._removed)
+
+    def _snapshot_key(self, quad) -> tuple | None:
+        """クワッドのスナップショット上の語彙ID（いずれかの語彙がない場合は None）"""
+        if self.snapshot is None:
+            return None
+        key = tuple(self.snapshot.term_id(term) for term in quad)
+        return None if None in key else key
+
+    # --- 追加・削除 ---
+
+    def add(self, triple, context, quoted: bool = False) -> None:
+        Store.add(self, triple, context, quoted)
+        self.addN([(*triple, context)])
+
+    def addN(self, quads) -> None:
+        with self._lock:
+            for s, p, o, context in quads:
+                identifier = getattr(context, "identifier", context)
+                key = self._snapshot_key((s, p, o, identifier))
+                if key is not None:
+                    if key in self._removed:
+                        self._removed.discard(key)
+                        continue
+                    if key[3] not in self._dropped and any(
+                        True for _ in self._snapshot_rows((s, p, o), identifier)
+                    ):
+                        continue  # スナップショットに存在する
+                self._added.add((s, p, o, identifier))
+
+    def remove(self, triple_pattern, context=None) -> None:
+        with self._lock:
+            identifier = getattr(context, "identifier", context)
+            self._removed.update(list(self._snapshot_rows(triple_pattern, identifier)))
+            s, p, o = triple_pattern
+            self._added.remove((s, p, o, identifier))
+
+    def add_graph(self, graph: Graph) -> None:
+        with self._lock:
+            self._added.graph(graph.identifier)
+
+    def remove_graph(self, graph: Graph) -> None:
+        with self._lock:
+            context_id = self._snapshot_context_id(graph.identifier)
+            if context_id is not None:
+                self._dropped.add(context_id)
+            self._added.remove_graph(graph.identifier)
+
+    # --- 検索 ---
+
+    def triples(self, triple_pattern, context=None) -> Iterator:
+        identifier = getattr(context, "identifier", context)
+        s, p, o = triple_pattern
+        with self._lock:
+            added = {}
+            for qs, qp, qo, qc in self._added.quads((s, p, o, identifier)):
+                added.setdefault((qs, qp, qo), []).append(qc)
+            rows = list(self._snapshot_rows(triple_pattern, identifier))
+        snapshot = self.snapshot
+
+        current_key, contexts = None, []
+        for rs, rp, ro, rc in rows:
+            key = (rs, rp, ro)
+            if key != current_key:
+                if current_key is not None:
+                    yield self._merge(snapshot, current_key, contexts, added)
+                current_key, contexts = key, []
+            contexts.append(rc)
+        if current_key is not None:
+            yield self._merge(snapshot, current_key, contexts, added)
+        for triple, identifiers in added.items():
+            yield triple, (self._graph(identifier) for identifier in identifiers)
+
+    def _merge(self, snapshot: MmapSnapshot, key: tuple, context_ids: list, added: dict):
+        """スナップショットのトリプルに、同じトリプルの追加分のグラフを合わせる"""
+        triple = tuple(snapshot.term(term_id) for term_id in key)
+        identifiers = [snapshot.term(context_id) for context_id in context_ids]
+        identifiers += added.pop(triple, [])
+        return triple, (self._graph(identifier) for identifier in identifiers)
+
+    def __len__(self, context=None) -> int:
+        identifier = getattr(context, "identifier", context)
+        with self._lock:
+            if identifier is not None:
+                count = sum(1 for _ in self._snapshot_rows((None, None, None), identifier))
+                return count + len(self._added.get_context(identifier))
+            return sum(1 for _ in self.triples((None, None, None)))
+
+    def contexts(self, triple=None) -> Iterator[Graph]:
+        if triple is not None:
+            for _, contexts in self.triples(triple):
+                yield from contexts
+            return
+        with self._lock:
+            identifiers = {
+                graph.identifier for graph in self._added.graphs() if len(graph)
+            }
+            if self.snapshot is not None:
+                identifiers.update(
+                    self.snapshot.term(context_id)
+                    for context_id in self.snapshot.graph_ids.tolist()
+                    if context_id not in self._dropped
+                )
+        for identifier in identifiers:
+            yield self._graph(identifier)
+
+    # --- 名前空間 ---
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True) -> None:
+        with self._lock:
+            if not override:
+                if self.prefix(namespace) is not None or self.namespace(prefix):
+                    return
+            old_namespace = self._namespace.pop(prefix, None)
+            if old_namespace is not None:
+                self._prefix.pop(old_namespace, None)
+            old_prefix = self._prefix.pop(namespace, None)
+            if old_prefix is not None:
+                self._namespace.pop(old_prefix, None)
+            self._namespace[prefix] = namespace
+            self._prefix[namespace] = prefix
+
+    def namespace(self, prefix: str) -> URIRef | None:
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace: URIRef) -> str | None:
+        return self._prefix.get(namespace)
+
+    def namespaces(self) -> Iterator[tuple[str, URIRef]]:
+        yield from list(self._namespace.items())
@@ -47,6 +47,8 @@ PROP_PAPER_TITLE = KG.paperTitle
 PROP_PAPER_DOI = KG.paperDOI
 PROP_SOURCE_FILE = KG.sourceFile
 PROP_EXTRACTED_AT = KG.extractedAt
+PROP_SOURCE_HASH = KG.sourceHash  # 元の PDF の SHA-256（重複検出用）
+PROP_CONTENT_HASH = KG.contentHash  # マージで取り込んだ論文の内容の指紋（重複検出用）
 
 PROP_HAS_DOCUMENT_PART = KG.hasDocumentPart
 PROP_DOCUMENT_TYPE = KG.documentType  # "main" or "support"
@@ -0,0 +1,122 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+def estimate_size(value) -> int:
+    """検索結果（リスト・辞書・文字列などの入れ子）のおおよそのメモリ使用量（バイト）"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class ResultCache:
+    """
+    検索結果のキャッシュ（スレッドセーフ）。
+
+    件数（max_entries）と推定メモリ使用量の合計（max_bytes）の上限を超えたら、
+    最近使われていないものから捨てる。キーにはグラフの版を含めるため、
+    グラフが変わると古い結果は参照されなくなり、上限に応じて捨てられる。
+    同じキーを同時に計算しようとした場合は、最初の1つの結果を待って共有する。
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # キー -> (結果, 推定サイズ)（古い順）
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self._bytes = 0
+        # 計算中のキー -> 完了を通知するイベント
+        self._pending: dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """保持している結果の推定メモリ使用量の合計"""
+        return self._bytes
+
+    def configure(self, max_entries: int, max_bytes: int) -> None:
+        """上限を変更し、超えた分を捨てる"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value) -> None:
+        """結果を保持する（1件で上限を超える結果は保持しない）"""
+        size = estimate_size(value)
+        with self._lock:
+            self._store(key, value, size)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        """キーの結果を返す。なければ compute() で計算して保持する"""
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # 他のスレッドが計算中: 完了を待ってから結果を引き直す（失敗した場合は自分で計算する）
+            pending.wait()
+        try:
+            value = compute()
+            size = estimate_size(value)
+            with self._lock:
+                self._store(key, value, size)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def _store(self, key: Hashable, value, size: int) -> None:
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+
+# プロセス全体で共有するキャッシュ（Streamlit の全セッションで共有される）
+_shared = ResultCache()
+
+
+def shared_cache(max_entries: int, max_bytes: int) -> ResultCache:
+    """プロセス全体で共有する検索結果のキャッシュ（上限は最後に指定した値にする）"""
+    _shared.configure(max_entries, max_bytes)
+    return _shared
@@ -0,0 +1,252 @@
+import json
+from heapq import heapify, heappop
+from rdflib import RDF, XSD, Graph, Literal
+from rdflib.term import Node
+from .ontology import KG
+from .sparql_query import experiment_type_iri
+
+
+def _plain(value: Node) -> bool:
+    """CONTAINS で文字列として比較できるリテラルか"""
+    return isinstance(value, Literal) and value.datatype in (None, XSD.string)
+
+
+def _simple(value: Node) -> bool:
+    """= で検索語（言語タグ・データ型なしのリテラル）と文字列として比較できるリテラルか"""
+    return isinstance(value, Literal) and value.datatype is None and value.language is None
+
+
+class SearchIndex:
+    """
+    Paper -> Experiment -> Content のパターン（SparqlQuery.search）専用の索引。
+
+    コンテンツごとに集約済みの行の材料（論文・タイトル・実験・実験タイプ・コンテンツタイプ・
+    本文・sourceContext）を持ち、タイトル・実験タイプ・コンテンツタイプ・sourceContext・論文の
+    ハッシュ索引（値 -> コンテンツの集合）の積を小さい順に取って検索する。
+    SPARQL と同じ結果になるのは各コンテンツの経路と値が1つに決まる場合だけなので、
+    そうでないコンテンツ（irregular）が1つでもあれば supported() は False になる。
+    """
+
+    def __init__(self):
+        self.clear()
+
+    @classmethod
+    def build(cls, graph: Graph) -> "SearchIndex":
+        """グラフ内のすべてのコンテンツから索引を作る"""
+        index = cls()
+        index.update(graph, set(graph.objects(None, KG.hasContent)))
+        return index
+
+    def clear(self):
+        # コンテンツ -> 行の材料（経路と値が1つに決まるもの）
+        self.records: dict[Node, dict] = {}
+        # 経路か値が複数あるコンテンツ
+        self.irregular: set[Node] = set()
+        # 論文・実験 -> その下のコンテンツ（変更されたノードから更新対象を引く）
+        self._owners: dict[Node, set[Node]] = {}
+        # コンテンツ -> その上の論文・実験
+        self._links: dict[Node, set[Node]] = {}
+        # 値 -> コンテンツ
+        self.by_paper: dict[Node, set[Node]] = {}
+        self.by_title: dict[str, set[Node]] = {}
+        self.by_experiment_type: dict[Node, set[Node]] = {}
+        self.by_content_type: dict[str, set[Node]] = {}
+        self.by_source_context: dict[str, set[Node]] = {}
+
+    def supported(self) -> bool:
+        """SPARQL と同じ結果を返せるか（irregular なコンテンツがないか）"""
+        return not self.irregular
+
+    def update(self, graph: Graph, nodes):
+        """
+        変更されたノード（クワッドの主語・目的語）に関係するコンテンツを作り直す。
+
+        変更前にノードの下にあったコンテンツと、変更後のグラフでノードから
+        たどれるコンテンツ（ノード自身・実験の下・論文の実験の下）が対象。
+        """
+        contents = set()
+        for node in nodes:
+            if isinstance(node, Literal):
+                continue
+            contents.update(self._owners.get(node, ()))
+            if node in self._links or (None, KG.hasContent, node) in graph:
+                contents.add(node)
+            contents.update(graph.objects(node, KG.hasContent))
+            for exp in graph.objects(node, KG.hasExperiment):
+                contents.update(graph.objects(exp, KG.hasContent))
+        for cont in contents:
+            self._remove(cont)
+            self._add(graph, cont)
+
+    def search(
+        self,
+        paper_title: str | None = None,
+        source_context: str | None = None,
+        experiment_type: str | None = None,
+        content_type: str | None = None,
+    ) -> list[dict]:
+        """SparqlQuery.search と同じ行を (論文, コンテンツ) の順で返す"""
+        contents, source_context = self._match(
+            paper_title, source_context, experiment_type, content_type
+        )
+        contents = sorted(contents, key=lambda cont: self.records[cont]["key"])
+        return [self._row(cont, source_context) for cont in contents]
+
+    def iter_search(self, cursor: str | None = None, **filters):
+        """
+        search の行を row_cursor の次から返す（SparqlQuery.iter_search と同じ順序）。
+
+        条件に一致するコンテンツのうちカーソルより後のものをヒープにし、返す行だけを
+        取り出して作るため、ページごとに全行を作って並べ替えることはない。
+        """
+        contents, source_context = self._match(**filters)
+        after = tuple(json.loads(cursor)) if cursor else None
+        keys = [self.records[cont]["key"] + (cont,) for cont in contents]
+        if after is not None:
+            keys = [key for key in keys if key[:2] > after]
+        heapify(keys)
+        while keys:
+            yield self._row(heappop(keys)[-1], source_context)
+
+    def _match(
+        self,
+        paper_title: str | None = None,
+        source_context: str | None = None,
+        experiment_type: str | None = None,
+        content_type: str | None = None,
+    ) -> tuple:
+        """条件に一致するコンテンツの集合と、行の集約に使う sourceContext の条件"""
+        if source_context == "All":
+            source_context = None
+        postings = []
+        if paper_title:
+            title = paper_title.lower()
+            postings.append(self._union(self.by_title, lambda value: title in value.lower()))
+        if source_context:
+            postings.append(
+                self._union(self.by_source_context, lambda value: source_context in value)
+            )
+        if experiment_type and experiment_type != "All":
+            iri = experiment_type_iri(experiment_type)
+            postings.append(
+                self._union(
+                    self.by_experiment_type,
+                    lambda value: value == iri or str(value) == experiment_type,
+                )
+            )
+        if content_type and content_type != "All":
+            postings.append(self.by_content_type.get(content_type, set()))
+
+        if postings:
+            # 小さい集合から順に積を取る
+            postings.sort(key=len)
+            contents = set(postings[0])
+            for posting in postings[1:]:
+                if not contents:
+                    break
+                contents &= posting
+        else:
+            contents = self.records.keys()
+        return contents, source_context
+
+    @staticmethod
+    def _union(index: dict, match) -> set:
+        result = set()
+        for value, contents in index.items():
+            if match(value):
+                result |= contents
+        return result
+
+    def _row(self, cont: Node, source_context: str | None) -> dict:
+        record = self.records[cont]
+        sources = record["sources"]
+        if source_context:
+            # SPARQL では FILTER に一致した sourceContext だけが集約される
+            sources = [value for value in sources if source_context in value]
+        return {
+            "paper_uri": str(record["paper"]),
+            "paper_title": record["title"],
+            "experiment_uri": str(record["experiment"]),
+            "experiment_type": str(record["experiment_type"]).split("/")[-1],
+            "content_uri": str(cont),
+            "content_type": record["content_type"],
+            "text": record["text"],
+            "source_context": ", ".join(sources),
+        }
+
+    def _add(self, graph: Graph, cont: Node):
+        links = []
+        for exp in graph.subjects(KG.hasContent, cont):
+            links.extend((paper, exp) for paper in graph.subjects(KG.hasExperiment, exp))
+        owners = {node for link in links for node in link}
+        if not owners:
+            return
+        self._links[cont] = owners
+        for node in owners:
+            self._owners.setdefault(node, set()).add(cont)
+
+        # search の SPARQL が返す (論文, タイトル, 実験, 実験タイプ) の組
+        paths = [
+            (paper, title, exp, exp_type)
+            for paper, exp in links
+            if (paper, RDF.type, KG.Paper) in graph
+            for title in graph.objects(paper, KG.paperTitle)
+            for exp_type in graph.objects(exp, KG.experimentType)
+        ]
+        content_types = list(graph.objects(cont, KG.contentType))
+        texts = list(graph.objects(cont, KG.text))
+        if not paths or not content_types or not texts:
+            return  # 検索結果に現れない
+        sources = list(graph.objects(cont, KG.sourceContext))
+        if (
+            len(paths) > 1
+            or len(content_types) > 1
+            or len(texts) > 1
+            or not _plain(paths[0][1])
+            or not _simple(content_types[0])
+            or not all(_plain(value) for value in sources)
+        ):
+            self.irregular.add(cont)
+            return
+
+        paper, title, exp, exp_type = paths[0]
+        record = {
+            # 行の並び順 (論文, コンテンツ) のキー
+            "key": (str(paper), str(cont)),
+            "paper": paper,
+            "title": str(title),
+            "experiment": exp,
+            "experiment_type": exp_type,
+            "content_type": str(content_types[0]),
+            "text": str(texts[0]),
+            "sources": sorted({str(value) for value in sources}),
+        }
+        self.records[cont] = record
+        self.by_paper.setdefault(paper, set()).add(cont)
+        self.by_title.setdefault(record["title"], set()).add(cont)
+        self.by_experiment_type.setdefault(exp_type, set()).add(cont)
+        self.by_content_type.setdefault(record["content_type"], set()).add(cont)
+        for value in record["sources"]:
+            self.by_source_context.setdefault(value, set()).add(cont)
+
+    def _remove(self, cont: Node):
+        for node in self._links.pop(cont, ()):
+            self._discard(self._owners, node, cont)
+        self.irregular.discard(cont)
+        record = self.records.pop(cont, None)
+        if record is None:
+            return
+        self._discard(self.by_paper, record["paper"], cont)
+        self._discard(self.by_title, record["title"], cont)
+        self._discard(self.by_experiment_type, record["experiment_type"], cont)
+        self._discard(self.by_content_type, record["content_type"], cont)
+        for value in record["sources"]:
+            self._discard(self.by_source_context, value, cont)
+
+    @staticmethod
+    def _discard(index: dict, key, cont: Node):
+        contents = index.get(key)
+        if contents is not None:
+            contents.discard(cont)
+            if not contents:
+                del index[key]
@@ -0,0 +1,74 @@
+"""
+実験・コンテンツの空白ノードを決定的な IRI に置き換える（スコーレム化）。
+
+    uv run python -m kgpaper.skolem --config config.yaml
+
+で既存のグラフを一度だけ移行する。
+"""
+
+import argparse
+from collections import Counter
+from rdflib import BNode, Graph, URIRef
+from .dedup import content_node_fingerprint, experiment_fingerprint
+from .ontology import KG
+
+# IRI に含める指紋の桁数（16進）
+HASH_LENGTH = 12
+
+
+def _child_iri(parent: URIRef, kind: str, fingerprint: str, ordinal: int) -> URIRef:
+    # 親の IRI に断片識別子を付ける（既に # を含む場合は - でつなぐ）
+    separator = "-" if "#" in parent else "#"
+    suffix = f"-{ordinal}" if ordinal else ""
+    return URIRef(f"{parent}{separator}{kind}-{fingerprint[:HASH_LENGTH]}{suffix}")
+
+
+def skolem_map(graph) -> dict[BNode, URIRef]:
+    """
+    空白ノードの実験・コンテンツ -> IRI の対応。
+
+    実験は「論文の IRI + 実験の指紋」、コンテンツは「実験の IRI + コンテンツの指紋」から作り、
+    同じ親の下で指紋が同じノードには出現順の番号を付けて区別する。指紋は内容
+    （種別・本文）だけから計算するため、同じ論文を抽出し直しても同じ IRI になる。
+    親が空白ノードのまま残る（論文が空白ノードなど）場合は置き換えない。
+    """
+    mapping = {}
+    for kind, predicate, fingerprint in (
+        ("experiment", KG.hasExperiment, experiment_fingerprint),
+        ("content", KG.hasContent, content_node_fingerprint),
+    ):
+        seen = Counter()
+        for parent, node in sorted(graph.subject_objects(predicate)):
+            parent = mapping.get(parent, parent)
+            if not isinstance(node, BNode) or node in mapping or isinstance(parent, BNode):
+                continue
+            digest = fingerprint(graph, node)
+            mapping[node] = _child_iri(parent, kind, digest, seen[parent, digest])
+            seen[parent, digest] += 1
+    return mapping
+
+
+def skolemize_quads(quads: list) -> list:
+    """クワッドの実験・コンテンツの空白ノードを IRI に置き換える（グラフをまたいで対応を作る）"""
+    graph = Graph()
+    graph += ((s, p, o) for s, p, o, _ in quads)
+    mapping = skolem_map(graph)
+    if not mapping:
+        return quads
+    return [
+        (mapping.get(s, s), p, mapping.get(o, o), context) for s, p, o, context in quads
+    ]
+
+
+def main() -> None:
+    from .graph_manager import GraphManager
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", default="config.yaml")
+    args = parser.parse_args()
+    renamed = GraphManager(args.config).skolemize_existing()
+    print(f"{renamed} blank nodes skolemized")
+
+
+if __name__ == "__main__":
+    main()
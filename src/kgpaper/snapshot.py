@@ -0,0 +1,178 @@
+import json
+import struct
+import zlib
+from array import array
+from pathlib import Path
+from rdflib import BNode, Dataset, Literal, URIRef
+from .compression import compression_of, open_file
+from .journal import durable_replace
+
+# ファイル形式
+#   ヘッダ      : magic(8) version(H) reserved(H) term_count(I) quad_count(I)
+#   base_id     : 長さ(I) + UTF-8
+#   語彙の種類  : term_count バイト（U / B / L）
+#   語彙の属性  : term_count 個の uint16（属性表のインデックス、0 は属性なし）
+#   属性表      : 長さ(I) + JSON（[datatype, lang] のリスト）
+#   語彙の長さ  : term_count 個の uint32（文字数）
+#   語彙の本文  : 長さ(I) + 全語彙を連結した UTF-8
+#   クワッド    : quad_count * 4 個の uint32（s, p, o, graph の語彙ID）
+#   チェックサム: それ以前の全バイトの CRC32(I)
+MAGIC = b"KGPSNAP\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sHHII")
+_U32 = struct.Struct("<I")
+
+
+def _pack_blob(data: bytes) -> bytes:
+    return _U32.pack(len(data)) + data
+
+
+def write_binary_snapshot(dataset: Dataset, path: Path, base_id: str) -> None:
+    """
+    データセット全体をバイナリスナップショットとして書き出す。
+
+    base_id には同時に書き出したテキスト形式のスナップショットの識別子を記録し、
+    読み込み時にテキスト側と食い違っていないかの判定に使う。
+    path の拡張子が .gz / .zst の場合は圧縮して書き出す。
+    """
+    term_ids = {}
+    kinds = bytearray()
+    extras = array("H")
+    extra_ids = {(None, None): 0}
+    lengths = array("I")
+    values = []
+    quads = array("I")
+
+    def intern(term) -> int:
+        term_id = term_ids.get(term)
+        if term_id is not None:
+            return term_id
+        term_id = term_ids[term] = len(kinds)
+        if isinstance(term, Literal):
+            kinds.append(ord("L"))
+            key = (
+                str(term.datatype) if term.datatype else None,
+                term.language,
+            )
+            extras.append(extra_ids.setdefault(key, len(extra_ids)))
+        else:
+            kinds.append(ord("B") if isinstance(term, BNode) else ord("U"))
+            extras.append(0)
+        value = str(term)
+        lengths.append(len(value))
+        values.append(value)
+        return term_id
+
+    for s, p, o, context in dataset.quads((None, None, None, None)):
+        quads.extend((intern(s), intern(p), intern(o), intern(context)))
+
+    extra_table = [list(key) for key in sorted(extra_ids, key=extra_ids.get)]
+    body = b"".join(
+        [
+            _HEADER.pack(MAGIC, VERSION, 0, len(kinds), len(quads) // 4),
+            _pack_blob(base_id.encode("utf-8")),
+            bytes(kinds),
+            extras.tobytes(),
+            _pack_blob(json.dumps(extra_table).encode("utf-8")),
+            lengths.tobytes(),
+            _pack_blob("".join(values).encode("utf-8")),
+            quads.tobytes(),
+        ]
+    )
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open_file(tmp_path, "wb", compression_of(path)) as f:
+        f.write(body)
+        f.write(_U32.pack(zlib.crc32(body)))
+    durable_replace(tmp_path, path)
+
+
+def read_snapshot_base_id(path: Path) -> str | None:
+    """スナップショットに記録された base_id を返す（読めない場合は None）"""
+    try:
+        with open_file(path) as f:
+            header = f.read(_HEADER.size + _U32.size)
+            magic, version, _, _, _ = _HEADER.unpack_from(header)
+            if magic != MAGIC or version != VERSION:
+                return None
+            (length,) = _U32.unpack_from(header, _HEADER.size)
+            return f.read(length).decode("utf-8")
+    except (OSError, EOFError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def load_binary_snapshot(dataset: Dataset, path: Path) -> None:
+    """
+    バイナリスナップショットをデータセットに読み込む。
+
+    形式・バージョン・チェックサムが一致しない場合は ValueError を送出する。
+    """
+    try:
+        with open_file(path) as f:
+            data = f.read()
+    except (OSError, EOFError) as e:
+        raise ValueError(f"Binary snapshot is unreadable: {path}: {e}")
+    if len(data) < _HEADER.size + _U32.size:
+        raise ValueError(f"Binary snapshot is truncated: {path}")
+    body, (checksum,) = data[:-4], _U32.unpack(data[-4:])
+    magic, version, _, term_count, quad_count = _HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError(f"Not a binary snapshot: {path}")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary snapshot version: {version}")
+    if zlib.crc32(body) != checksum:
+        raise ValueError(f"Binary snapshot checksum mismatch: {path}")
+
+    view = memoryview(body)
+    offset = _HEADER.size
+
+    def read_blob() -> bytes:
+        nonlocal offset
+        (length,) = _U32.unpack_from(view, offset)
+        offset += _U32.size
+        blob = bytes(view[offset : offset + length])
+        offset += length
+        return blob
+
+    def read_array(typecode: str, count: int) -> array:
+        nonlocal offset
+        values = array(typecode)
+        values.frombytes(view[offset : offset + count * values.itemsize])
+        offset += count * values.itemsize
+        return values
+
+    read_blob()  # base_id
+    kinds = bytes(view[offset : offset + term_count])
+    offset += term_count
+    extras = read_array("H", term_count)
+    extra_table = [
+        (URIRef(datatype) if datatype else None, lang)
+        for datatype, lang in json.loads(read_blob())
+    ]
+    lengths = read_array("I", term_count)
+    text = read_blob().decode("utf-8")
+    quads = read_array("I", quad_count * 4)
+
+    terms = []
+    position = 0
+    for kind, extra, length in zip(kinds, extras, lengths):
+        value = text[position : position + length]
+        position += length
+        if kind == 76:  # "L"
+            datatype, lang = extra_table[extra]
+            terms.append(Literal(value, lang=lang, datatype=datatype))
+        elif kind == 66:  # "B"
+            terms.append(BNode(value))
+        else:
+            terms.append(URIRef(value))
+
+    # グラフの Graph オブジェクトは語彙IDごとに1つだけ作り、ストアへ直接追加する
+    # （Dataset.addN はクワッドごとに Graph を生成し直すため遅い）
+    contexts = {
+        term_id: dataset.get_context(terms[term_id]) for term_id in set(quads[3::4])
+    }
+    dataset.store.addN(
+        (terms[s], terms[p], terms[o], contexts[c])
+        for s, p, o, c in zip(quads[0::4], quads[1::4], quads[2::4], quads[3::4])
+    )
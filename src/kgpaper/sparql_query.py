@@ -1,15 +1,119 @@
-from rdflib import Graph
+import json
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import islice, product
+from typing import Callable, Iterable, Iterator
+from rdflib import RDF, Graph, Literal, URIRef
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.sparql import Query
 from .ontology import KG, PREFIXES
+from .text_index import TextIndex
+
+# search のクエリのテンプレート（{filters} に有効なフィルターの FILTER 句が入る）
+SEARCH_TEMPLATE = """
+SELECT ?paper ?title ?exp ?expType ?cont ?contType ?srcCtx ?text
+WHERE {{
+    ?paper a kg:Paper ;
+           kg:paperTitle ?title .
+
+    ?paper kg:hasExperiment ?exp .
+    ?exp kg:experimentType ?expType .
+
+    ?exp kg:hasContent ?cont .
+    ?cont kg:contentType ?contType ;
+          kg:text ?text .
+    OPTIONAL {{ ?cont kg:sourceContext ?srcCtx }}
+
+    {filters}
+}}
+"""
+
+# search のフィルター -> FILTER 句（値はクエリに埋め込まず initBindings で束縛する）
+SEARCH_FILTERS = {
+    "paper_title": "FILTER(CONTAINS(LCASE(?title), LCASE(?titleQuery)))",
+    "source_context": "FILTER(CONTAINS(?srcCtx, ?srcCtxQuery))",
+    # データがURIの場合（例: <.../Synthesis>）と、Literalの場合（例: "kg:Synthesis"）の両方に対応
+    "experiment_type": "FILTER(?expType = ?expTypeIri || STR(?expType) = ?expTypeQuery)",
+    "content_type": "FILTER(?contType = ?contTypeQuery)",
+}
+
+
+@lru_cache(maxsize=128)
+def prepared_query(text: str) -> Query:
+    """
+    クエリをパースして代数に変換したもの。
+
+    同じテンプレートは1回だけ変換し、値は評価時に initBindings で渡す。
+    """
+    return prepareQuery(text, initNs=PREFIXES)
+
+
+def search_query(filters: tuple[str, ...]) -> Query:
+    """有効なフィルター（SEARCH_FILTERS のキー）の組に対応する search のクエリ"""
+    return prepared_query(
+        SEARCH_TEMPLATE.format(filters="\n    ".join(SEARCH_FILTERS[name] for name in filters))
+    )
+
+
+def experiment_type_iri(experiment_type: str) -> URIRef | None:
+    """UI の実験タイプ（kg:Synthesis 形式、または <IRI>）を IRI にする（展開できなければ None）"""
+    if experiment_type.startswith("<") and experiment_type.endswith(">"):
+        return URIRef(experiment_type[1:-1])
+    prefix, sep, local = experiment_type.partition(":")
+    if sep and prefix in PREFIXES:
+        return URIRef(PREFIXES[prefix] + local)
+    return None
+
+
+def search_key(
+    paper_title: str | None = None,
+    source_context: str | None = None,
+    experiment_type: str | None = None,
+    content_type: str | None = None,
+    text_query: str | None = None,
+) -> tuple:
+    """
+    search の条件を正規化したタプル（条件にならない項目を除いた (名前, 値) の名前順）。
+
+    同じ結果になる条件は同じタプルになり、dict(key) をそのまま search に渡せる。
+    """
+    filters = {
+        "paper_title": paper_title,
+        "source_context": source_context,
+        "experiment_type": experiment_type,
+        "content_type": content_type,
+        "text_query": text_query,
+    }
+    return tuple(
+        (name, value)
+        for name, value in sorted(filters.items())
+        # "All" は paper_title 以外では条件なしと同じ
+        if value and (value != "All" or name == "paper_title")
+    )
+
+
+def row_cursor(row: dict) -> str:
+    """
+    iter_search の行の並び順の位置を表すカーソル（その行の次から再開する）。
+
+    text_query の行は (スコアの降順, コンテンツ)、それ以外は (論文, コンテンツ) の順に並ぶ。
+    """
+    if "score" in row:
+        return json.dumps([row["score"], row["content_uri"]])
+    return json.dumps([row["paper_uri"], row["content_uri"]])
 
 
 class SparqlQuery:
-    def __init__(self, graph: Graph):
+    def __init__(self, graph: Graph, text_index: TextIndex | None = None, search_index=None):
         self.g = graph
+        # text_query の候補を引く全文索引（省略時は検索のたびにグラフから作る）
+        self.text_index = text_index
+        # search 専用の索引（search_index.SearchIndex。使えない場合は SPARQL で評価する）
+        self.search_index = search_index
 
-    def _escape_sparql_string(self, value: str) -> str:
-        """SPARQL文字列リテラル用にエスケープする"""
-        # バックスラッシュを先にエスケープ、次にダブルクォート
-        return value.replace("\\", "\\\\").replace('"', '\\"')
+    def _native(self) -> bool:
+        """search 専用の索引で SPARQL と同じ結果を返せるか"""
+        return self.search_index is not None and self.search_index.supported()
 
     def search(
         self,
@@ -17,76 +121,166 @@ class SparqlQuery:
         source_context: str | None = None,
         experiment_type: str | None = None,
         content_type: str | None = None,
+        text_query: str | None = None,
     ):
         """
         Executes a SPARQL query with optional filters.
         Returns a list of dicts with result data.
-        """
 
-        # Base query structure to retrieve nodes for visualization
-        # We want triples that form the path: Paper -> Experiment -> Content
-        # But for visualization, we might just want the list of matching contents
-        # or triples to build a subgraph.
+        クエリは有効なフィルターの組ごとに1回だけコンパイルし（prepared_query）、
+        フィルターの値は initBindings で渡す。
+        text_query を指定すると、全文索引（論文タイトルとコンテンツの本文の BM25）から
+        候補のコンテンツを引き、そこからグラフをたどって他の条件を適用する。
+        結果はスコアの高い順で、各行に "score" が付く。
+        search_index が使える場合は SPARQL を評価せず、索引から (論文, コンテンツ) の順で返す。
+        """
+        if text_query:
+            return self._search_text(
+                text_query, paper_title, source_context, experiment_type, content_type
+            )
+        if self._native():
+            return self.search_index.search(
+                paper_title, source_context, experiment_type, content_type
+            )
 
-        # Let's return a table of data suitable for filtering,
+        # Return a table of data suitable for filtering (Paper -> Experiment -> Content),
         # and also include URIs to build the graph later.
+        filters, bindings = self._bindings(
+            paper_title, source_context, experiment_type, content_type
+        )
+        results = self.g.query(search_query(filters), initBindings=bindings)
+        return self._aggregate(results)
+
+    def search_page(
+        self, limit: int = 100, cursor: str | None = None, **filters
+    ) -> tuple[list[dict], str | None]:
+        """
+        iter_search の cursor の次から limit 件の行と、続きのカーソル（続きがなければ None）を返す。
+        """
+        rows = list(islice(self.iter_search(cursor=cursor, **filters), limit + 1))
+        if len(rows) <= limit:
+            return rows, None
+        return rows[:limit], row_cursor(rows[limit - 1])
 
+    def iter_search(
+        self,
+        paper_title: str | None = None,
+        source_context: str | None = None,
+        experiment_type: str | None = None,
+        content_type: str | None = None,
+        text_query: str | None = None,
+        cursor: str | None = None,
+        papers: Iterable[str] | None = None,
+        load_papers: Callable[[list[str]], None] | None = None,
+        batch_size: int = 100,
+    ) -> Iterator[dict]:
+        """
+        search と同じ条件・同じ形の行を、安定した順序で1件ずつ返す。
+
+        論文の URI 順に論文1件ずつクエリを評価し（?paper を束縛すると論文からたどって結合される）、
+        論文内ではコンテンツの URI 順に返す。text_query を指定した場合はスコアの高い順。
+        全件を集約してから返す search と違い、先頭の行はすぐに返り、保持するのは1論文分だけになる。
+        cursor（row_cursor）を指定するとその行の次から再開する。
+        papers は対象の論文（省略時はグラフ内のすべての論文）、load_papers は batch_size 件ごとに
+        これから評価する論文の URI を渡して呼ぶ関数（lazy_load のシャード読み込み用）。
+        """
+        if not text_query and papers is None and load_papers is None and self._native():
+            yield from self.search_index.iter_search(
+                cursor,
+                paper_title=paper_title,
+                source_context=source_context,
+                experiment_type=experiment_type,
+                content_type=content_type,
+            )
+            return
+        after = json.loads(cursor) if cursor else None
+        if text_query:
+            yield from self._iter_text(
+                text_query,
+                (paper_title, source_context, experiment_type, content_type),
+                after,
+                papers,
+                load_papers,
+                batch_size,
+            )
+            return
+
+        filters, bindings = self._bindings(
+            paper_title, source_context, experiment_type, content_type
+        )
+        query = search_query(filters)
+        if papers is None:
+            papers = (str(paper) for paper in self.g.subjects(RDF.type, KG.Paper))
+        papers = sorted(set(papers))
+        if after is not None:
+            papers = papers[bisect_left(papers, after[0]) :]
+        for start in range(0, len(papers), batch_size):
+            batch = papers[start : start + batch_size]
+            if load_papers is not None:
+                load_papers(batch)
+            for paper in batch:
+                paper_uri = URIRef(paper)
+                # タイトルが一致しない論文はクエリを評価しない
+                if paper_title and not any(
+                    paper_title.lower() in str(title).lower()
+                    for title in self.g.objects(paper_uri, KG.paperTitle)
+                ):
+                    continue
+                rows = self._aggregate(
+                    self.g.query(query, initBindings={**bindings, "paper": paper_uri})
+                )
+                for row in sorted(rows, key=lambda row: row["content_uri"]):
+                    if after is None or [paper, row["content_uri"]] > after:
+                        yield row
+
+    def _bindings(
+        self,
+        paper_title: str | None,
+        source_context: str | None,
+        experiment_type: str | None,
+        content_type: str | None,
+    ) -> tuple[tuple[str, ...], dict]:
+        """有効なフィルター（SEARCH_FILTERS のキー）の組と、その値の initBindings"""
         filters = []
+        bindings = {}
         if paper_title:
-            escaped_title = self._escape_sparql_string(paper_title)
-            filters.append(f'FILTER(CONTAINS(LCASE(?title), LCASE("{escaped_title}")))')
+            filters.append("paper_title")
+            bindings["titleQuery"] = Literal(paper_title)
         if source_context and source_context != "All":
-            escaped_src = self._escape_sparql_string(source_context)
-            filters.append(f'FILTER(CONTAINS(?srcCtx, "{escaped_src}"))')
+            filters.append("source_context")
+            bindings["srcCtxQuery"] = Literal(source_context)
         if experiment_type and experiment_type != "All":
-            # UIからはkg:Synthesis形式で来る。
-            # データがURIの場合（例: <.../Synthesis>）と、Literalの場合（例: "kg:Synthesis"）の両方に対応
-            filters.append(
-                f'FILTER(?expType = {experiment_type} || STR(?expType) = "{experiment_type}")'
-            )
+            filters.append("experiment_type")
+            bindings["expTypeQuery"] = Literal(experiment_type)
+            iri = experiment_type_iri(experiment_type)
+            if iri is not None:
+                bindings["expTypeIri"] = iri
         if content_type and content_type != "All":
-            escaped_cont = self._escape_sparql_string(content_type)
-            filters.append(f'FILTER(?contType = "{escaped_cont}")')
-
-        filter_str = "\n".join(filters)
-
-        query = f"""
-        SELECT ?paper ?title ?exp ?expType ?cont ?contType ?srcCtx ?text
-        WHERE {{
-            ?paper a kg:Paper ;
-                   kg:paperTitle ?title .
-            
-            ?paper kg:hasExperiment ?exp .
-            ?exp kg:experimentType ?expType .
-            
-            ?exp kg:hasContent ?cont .
-            ?cont kg:contentType ?contType ;
-                  kg:text ?text .
-            OPTIONAL {{ ?cont kg:sourceContext ?srcCtx }}
-                  
-            {filter_str}
-        }}
-        """
-
-        results = self.g.query(query, initNs=PREFIXES)
+            filters.append("content_type")
+            bindings["contTypeQuery"] = Literal(content_type)
+        return tuple(filters), bindings
 
+    def _aggregate(self, results) -> list[dict]:
+        """
+        (paper, title, exp, expType, cont, contType, srcCtx, text) の行をコンテンツごとに集約する
+        """
         # 集約用辞書: content_uri -> data dict
         aggregated_data = {}
 
-        for row in results:
-            content_uri = str(row.cont)
-            src_ctx = str(row.srcCtx) if row.srcCtx else ""
+        for paper, title, exp, exp_type, cont, cont_type, src, text in results:
+            content_uri = str(cont)
+            src_ctx = str(src) if src else ""
 
             if content_uri not in aggregated_data:
                 aggregated_data[content_uri] = {
-                    "paper_uri": str(row.paper),
-                    "paper_title": str(row.title),
-                    "experiment_uri": str(row.exp),
-                    "experiment_type": str(row.expType).split("/")[-1],
+                    "paper_uri": str(paper),
+                    "paper_title": str(title),
+                    "experiment_uri": str(exp),
+                    "experiment_type": str(exp_type).split("/")[-1],
                     "content_uri": content_uri,
-                    "content_type": str(row.contType),
+                    "content_type": str(cont_type),
                     "source_contexts": set(),  # Setで重複排除して集める
-                    "text": str(row.text),
+                    "text": str(text),
                 }
 
             if src_ctx:
@@ -103,6 +297,111 @@ class SparqlQuery:
 
         return data
 
+    def _search_text(
+        self,
+        text_query: str,
+        paper_title: str | None,
+        source_context: str | None,
+        experiment_type: str | None,
+        content_type: str | None,
+    ) -> list[dict]:
+        """全文索引の候補から search と同じ条件・同じ形の行を作る（スコアの高い順）"""
+        index = self.text_index if self.text_index is not None else TextIndex.build(self.g)
+        hits = index.search(text_query)
+        filters = (paper_title, source_context, experiment_type, content_type)
+        scores = {str(cont): score for cont, _, score in hits}
+        data = self._aggregate(
+            row for cont, _, _ in hits for row in self._text_rows(cont, *filters)
+        )
+        for item in data:
+            item["score"] = scores[item["content_uri"]]
+        return data
+
+    def _iter_text(
+        self,
+        text_query: str,
+        filters: tuple,
+        after: list | None,
+        papers: Iterable[str] | None,
+        load_papers: Callable[[list[str]], None] | None,
+        batch_size: int,
+    ) -> Iterator[dict]:
+        """iter_search の text_query: 全文索引の候補を (スコアの降順, コンテンツ) の順にたどる"""
+        index = self.text_index if self.text_index is not None else TextIndex.build(self.g)
+        hits = sorted(
+            ((-score, str(cont), cont, paper) for cont, paper, score in index.search(text_query)),
+            key=lambda hit: hit[:2],
+        )
+        if papers is not None:
+            papers = set(papers)
+            hits = [hit for hit in hits if hit[3] in papers]
+        if after is not None:
+            hits = hits[bisect_left(hits, (-after[0], after[1]), key=lambda hit: hit[:2]) :]
+            if hits and hits[0][:2] == (-after[0], after[1]):
+                hits = hits[1:]
+        for start in range(0, len(hits), batch_size):
+            batch = hits[start : start + batch_size]
+            if load_papers is not None:
+                load_papers(list(dict.fromkeys(hit[3] for hit in batch)))
+            for score, _, cont, _ in batch:
+                for row in self._aggregate(self._text_rows(cont, *filters)):
+                    row["score"] = -score
+                    yield row
+
+    def _text_rows(
+        self,
+        cont,
+        paper_title: str | None,
+        source_context: str | None,
+        experiment_type: str | None,
+        content_type: str | None,
+    ) -> Iterator[tuple]:
+        """search の SPARQL と同じパターン・FILTER をコンテンツからたどって評価した行"""
+        if source_context == "All":
+            source_context = None
+        if experiment_type == "All":
+            experiment_type = None
+        if content_type == "All":
+            content_type = None
+        experiment_uri = experiment_type_iri(experiment_type) if experiment_type else None
+
+        g = self.g
+        cont_types = [
+            value
+            for value in g.objects(cont, KG.contentType)
+            if not content_type
+            or (isinstance(value, Literal) and value.language is None
+                and str(value) == content_type)
+        ]
+        texts = list(g.objects(cont, KG.text))
+        srcs = [
+            value
+            for value in g.objects(cont, KG.sourceContext)
+            if not source_context or source_context in str(value)
+        ]
+        if not source_context and not srcs:
+            srcs = [None]  # OPTIONAL
+        for exp in g.subjects(KG.hasContent, cont):
+            exp_types = [
+                value
+                for value in g.objects(exp, KG.experimentType)
+                if not experiment_type
+                or value == experiment_uri
+                or str(value) == experiment_type
+            ]
+            for paper in g.subjects(KG.hasExperiment, exp):
+                if (paper, RDF.type, KG.Paper) not in g:
+                    continue
+                titles = [
+                    value
+                    for value in g.objects(paper, KG.paperTitle)
+                    if not paper_title or paper_title.lower() in str(value).lower()
+                ]
+                for title, exp_type, cont_type, src, text in product(
+                    titles, exp_types, cont_types, srcs, texts
+                ):
+                    yield paper, title, exp, exp_type, cont, cont_type, src, text
+
     def export_all_triples(self):
         """Returns all triples for bulk export or visualization without filters."""
         # Or maybe utilize filter to construct sub-graph
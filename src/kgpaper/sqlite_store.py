@@ -0,0 +1,321 @@
+import sqlite3
+import threading
+from typing import Iterator
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.store import Store
+
+# 語彙IDキャッシュの上限（超えたら破棄して作り直す）
+_TERM_CACHE_SIZE = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    datatype TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    UNIQUE (kind, value, datatype, lang)
+);
+CREATE TABLE IF NOT EXISTS quads (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    c INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o, c)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS quads_pos ON quads (p, o, s, c);
+CREATE INDEX IF NOT EXISTS quads_osp ON quads (o, s, p, c);
+CREATE INDEX IF NOT EXISTS quads_cspo ON quads (c, s, p, o);
+CREATE TABLE IF NOT EXISTS graphs (id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    uri TEXT NOT NULL
+);
+"""
+
+_TERM_COLUMNS = "kind, value, datatype, lang"
+
+
+def _encode(term) -> tuple[str, str, str, str]:
+    """RDF語彙を terms テーブルの列値に変換する"""
+    if isinstance(term, Literal):
+        return ("L", str(term), str(term.datatype or ""), term.language or "")
+    if isinstance(term, BNode):
+        return ("B", str(term), "", "")
+    return ("U", str(term), "", "")
+
+
+def _decode(kind: str, value: str, datatype: str, lang: str):
+    """terms テーブルの列値からRDF語彙を復元する"""
+    if kind == "U":
+        return URIRef(value)
+    if kind == "B":
+        return BNode(value)
+    return Literal(
+        value, lang=lang or None, datatype=URIRef(datatype) if datatype else None
+    )
+
+
+class SQLiteStore(Store):
+    """
+    SQLite 上のディスク常駐トリプルストア（rdflib Store 実装）。
+
+    語彙は terms テーブルで整数IDに辞書符号化し、クワッドは SPOC を主キーに
+    POS / OSP / CSPO の索引を持つ。書き込みは commit() まで1つのトランザクション
+    にまとめられ、rollback() で取り消せる。
+    """
+
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = True
+
+    def __init__(self, configuration: str | None = None, identifier=None):
+        self._conn = None
+        self._term_ids = {}
+        self._graphs = {}
+        # Streamlit のスレッド間で共有されるため書き込みを直列化する
+        self._lock = threading.RLock()
+        super().__init__(configuration, identifier)
+
+    def open(self, configuration: str, create: bool = True) -> int:
+        self._conn = sqlite3.connect(configuration, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        return 1  # rdflib.store.VALID_STORE
+
+    def close(self, commit_pending_transaction: bool = False) -> None:
+        if self._conn is None:
+            return
+        if commit_pending_transaction:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        self._conn.close()
+        self._conn = None
+
+    def commit(self) -> None:
+        with self._lock:
+            self._conn.commit()
+
+    def data_version(self) -> int:
+        """他の接続がコミットするたびに変わる値（PRAGMA data_version。自身のコミットでは変わらない）"""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def rollback(self) -> None:
+        with self._lock:
+            self._conn.rollback()
+            # ロールバックで取り消された語彙IDを参照しないよう破棄する
+            self._term_ids.clear()
+
+    # --- 語彙の辞書符号化 ---
+
+    def _lookup(self, term) -> int | None:
+        """登録済み語彙のIDを返す（未登録なら None）"""
+        term_id = self._term_ids.get(term)
+        if term_id is not None:
+            return term_id
+        row = self._conn.execute(
+            f"SELECT id FROM terms WHERE ({_TERM_COLUMNS}) = (?, ?, ?, ?)",
+            _encode(term),
+        ).fetchone()
+        if row is None:
+            return None
+        self._remember(term, row[0])
+        return row[0]
+
+    def _intern(self, term) -> int:
+        """語彙を登録してIDを返す"""
+        term_id = self._lookup(term)
+        if term_id is not None:
+            return term_id
+        cursor = self._conn.execute(
+            f"INSERT INTO terms ({_TERM_COLUMNS}) VALUES (?, ?, ?, ?)", _encode(term)
+        )
+        self._remember(term, cursor.lastrowid)
+        return cursor.lastrowid
+
+    def _remember(self, term, term_id: int) -> None:
+        if len(self._term_ids) >= _TERM_CACHE_SIZE:
+            self._term_ids.clear()
+        self._term_ids[term] = term_id
+
+    def _graph(self, identifier) -> Graph:
+        graph = self._graphs.get(identifier)
+        if graph is None:
+            graph = self._graphs[identifier] = Graph(store=self, identifier=identifier)
+        return graph
+
+    def _context_id(self, context, create: bool = False) -> int | None:
+        identifier = getattr(context, "identifier", context)
+        if create:
+            context_id = self._intern(identifier)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO graphs (id) VALUES (?)", (context_id,)
+            )
+            return context_id
+        return self._lookup(identifier)
+
+    # --- 追加・削除 ---
+
+    def add(self, triple, context, quoted: bool = False) -> None:
+        Store.add(self, triple, context, quoted)
+        self.addN([(*triple, context)])
+
+    def addN(self, quads) -> None:
+        with self._lock:
+            rows = []
+            context_ids = {}
+            for s, p, o, context in quads:
+                key = getattr(context, "identifier", context)
+                context_id = context_ids.get(key)
+                if context_id is None:
+                    context_id = context_ids[key] = self._context_id(key, create=True)
+                rows.append(
+                    (self._intern(s), self._intern(p), self._intern(o), context_id)
+                )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO quads (s, p, o, c) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def remove(self, triple_pattern, context=None) -> None:
+        with self._lock:
+            where = self._where(triple_pattern, context)
+            if where is None:
+                return
+            conditions, params = where
+            self._conn.execute(f"DELETE FROM quads WHERE {conditions}", params)
+
+    def add_graph(self, graph: Graph) -> None:
+        with self._lock:
+            self._context_id(graph, create=True)
+
+    def remove_graph(self, graph: Graph) -> None:
+        with self._lock:
+            context_id = self._context_id(graph)
+            if context_id is None:
+                return
+            self._conn.execute("DELETE FROM quads WHERE c = ?", (context_id,))
+            self._conn.execute("DELETE FROM graphs WHERE id = ?", (context_id,))
+
+    # --- 検索 ---
+
+    def _where(self, triple_pattern, context) -> tuple[str, list] | None:
+        """パターンに対応する WHERE 句を返す（未登録の語彙を含む場合は None）"""
+        conditions, params = [], []
+        for column, term in zip("spo", triple_pattern):
+            if term is None:
+                continue
+            term_id = self._lookup(term)
+            if term_id is None:
+                return None
+            conditions.append(f"{column} = ?")
+            params.append(term_id)
+        if context is not None:
+            context_id = self._context_id(context)
+            if context_id is None:
+                return None
+            conditions.append("c = ?")
+            params.append(context_id)
+        return " AND ".join(conditions) or "1", params
+
+    def triples(self, triple_pattern, context=None) -> Iterator:
+        where = self._where(triple_pattern, context)
+        if where is None:
+            return
+        conditions, params = where
+
+        # 同一トリプルの行が連続するよう、使用する索引の列順で並べる
+        s, p, o = triple_pattern
+        if s is None and p is not None:
+            order = "q.p, q.o, q.s"
+        elif s is None and o is not None:
+            order = "q.o, q.s, q.p"
+        else:
+            order = "q.s, q.p, q.o"
+
+        columns = ", ".join(
+            f"term_{i}.kind, term_{i}.value, term_{i}.datatype, term_{i}.lang"
+            for i in "spoc"
+        )
+        joins = " ".join(f"JOIN terms term_{i} ON term_{i}.id = q.{i}" for i in "spoc")
+        cursor = self._conn.execute(
+            f"SELECT q.s, q.p, q.o, {columns} FROM quads q {joins} "
+            f"WHERE {conditions} ORDER BY {order}",
+            params,
+        )
+
+        current_key, current_triple, contexts = None, None, []
+        for row in cursor:
+            key = row[:3]
+            if key != current_key:
+                if current_key is not None:
+                    yield current_triple, self._contexts_iter(contexts)
+                current_key = key
+                current_triple = tuple(
+                    _decode(*row[3 + 4 * i : 7 + 4 * i]) for i in range(3)
+                )
+                contexts = []
+            contexts.append(_decode(*row[15:19]))
+        if current_key is not None:
+            yield current_triple, self._contexts_iter(contexts)
+
+    def _contexts_iter(self, identifiers: list) -> Iterator[Graph]:
+        return (self._graph(identifier) for identifier in identifiers)
+
+    def __len__(self, context=None) -> int:
+        if context is None:
+            query = "SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM quads)"
+            return self._conn.execute(query).fetchone()[0]
+        context_id = self._context_id(context)
+        if context_id is None:
+            return 0
+        query = "SELECT COUNT(*) FROM quads WHERE c = ?"
+        return self._conn.execute(query, (context_id,)).fetchone()[0]
+
+    def contexts(self, triple=None) -> Iterator[Graph]:
+        if triple is None:
+            cursor = self._conn.execute(
+                f"SELECT {_TERM_COLUMNS} FROM graphs g JOIN terms t ON t.id = g.id"
+            )
+            for row in cursor.fetchall():
+                yield self._graph(_decode(*row))
+            return
+        for _, contexts in self.triples(triple):
+            yield from contexts
+
+    # --- 名前空間 ---
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True) -> None:
+        with self._lock:
+            if not override:
+                if self.prefix(namespace) is not None or self.namespace(prefix):
+                    return
+            self._conn.execute(
+                "DELETE FROM namespaces WHERE prefix = ? OR uri = ?",
+                (prefix, str(namespace)),
+            )
+            self._conn.execute(
+                "INSERT INTO namespaces (prefix, uri) VALUES (?, ?)",
+                (prefix, str(namespace)),
+            )
+
+    def namespace(self, prefix: str) -> URIRef | None:
+        row = self._conn.execute(
+            "SELECT uri FROM namespaces WHERE prefix = ?", (prefix,)
+        ).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace: URIRef) -> str | None:
+        row = self._conn.execute(
+            "SELECT prefix FROM namespaces WHERE uri = ?", (str(namespace),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self) -> Iterator[tuple[str, URIRef]]:
+        rows = self._conn.execute("SELECT prefix, uri FROM namespaces").fetchall()
+        for prefix, uri in rows:
+            yield prefix, URIRef(uri)
@@ -0,0 +1,136 @@
+import codecs
+import json
+import re
+from typing import BinaryIO, Callable, Iterator
+
+_WHITESPACE = re.compile(r"\s*")
+_DECODER = json.JSONDecoder()
+
+# 1回に読み込むバイト数
+READ_SIZE = 1 << 20
+
+
+class JsonStream:
+    """
+    バイナリファイルから JSON の値を1つずつ取り出す逐次リーダー。
+
+    読み込み済みで未消費の部分だけをバッファに保持するため、メモリ使用量は
+    ファイル全体ではなく取り出す値の大きさで決まる。
+    """
+
+    def __init__(self, file: BinaryIO, read_size: int = READ_SIZE):
+        self._file = file
+        self._read_size = read_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def _fill(self) -> bool:
+        """次のチャンクをバッファに読み足す。ファイル末尾なら False を返す"""
+        if self.eof:
+            return False
+        data = self._file.read(self._read_size)
+        self.bytes_read += len(data)
+        if not data:
+            self.eof = True
+        self._buffer = self._buffer[self._pos :] + self._decoder.decode(
+            data, final=not data
+        )
+        self._pos = 0
+        return bool(data)
+
+    def peek(self) -> str:
+        """空白を読み飛ばして次の1文字を返す（ファイル末尾なら空文字列）"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """次の1文字が chars のいずれかであることを確認して消費する"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Invalid JSON file: expected one of {chars!r}")
+        self._pos += 1
+        return char
+
+    def value(self):
+        """次の JSON の値を1つ読み込む"""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+                # 末尾の数値などが途中で切れていないよう、値の後ろが読み込まれるまで待つ
+                if end < len(self._buffer) or self.eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Invalid JSON file: {e}")
+            self._fill()
+
+
+def iter_json_members(
+    stream: JsonStream, streamed: Callable[[str], bool]
+) -> Iterator[tuple[str, object, bool]]:
+    """
+    最上位オブジェクトのメンバーを (キー, 値, 要素ごとか) の順に返す。
+
+    streamed(key) が True を返すキーの値が配列の場合は、配列全体ではなく
+    要素を1つずつ (キー, 要素, True) として返す。
+    """
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        if not isinstance(key, str):
+            raise ValueError("Invalid JSON file: object key must be a string")
+        stream.expect(":")
+        if streamed(key) and stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield key, stream.value(), True
+                    if stream.expect(",]") == "]":
+                        break
+        else:
+            yield key, stream.value(), False
+        if stream.expect(",}") == "}":
+            return
+
+
+def iter_line_chunks(file: BinaryIO, chunk_lines: int) -> Iterator[tuple[str, int]]:
+    """行単位の形式（N-Triples / N-Quads）を chunk_lines 行ずつ (テキスト, 読み込み済みバイト数) で返す"""
+    lines = []
+    bytes_read = 0
+    for raw in file:
+        bytes_read += len(raw)
+        lines.append(raw.decode("utf-8"))
+        if len(lines) >= chunk_lines:
+            yield "".join(lines), bytes_read
+            lines = []
+    if lines:
+        yield "".join(lines), bytes_read
+
+
+def resolves_to(key: str, context: dict, iri: str) -> bool:
+    """JSON-LD のキーが @context の下で iri に展開されるかを判定する"""
+    definition = context.get(key, key)
+    if isinstance(definition, dict):
+        definition = definition.get("@id", key)
+    if not isinstance(definition, str):
+        return False
+    prefix, sep, local = definition.partition(":")
+    namespace = context.get(prefix) if sep else None
+    if isinstance(namespace, dict):
+        namespace = namespace.get("@id")
+    if isinstance(namespace, str):
+        definition = namespace + local
+    return definition == str(iri)
@@ -0,0 +1,236 @@
+import json
+import math
+import re
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from rdflib import RDF, Graph, URIRef
+from rdflib.term import Node
+from rdflib.util import from_n3
+from .journal import durable_replace
+from .ontology import KG
+
+# 文字 n-gram の長さ（日本語のように空白で区切らない言語も部分一致で検索できるようにする）
+NGRAM = 2
+# BM25 のパラメータ
+K1 = 1.2
+B = 0.75
+# 索引するフィールド（title: kg:paperTitle、text: kg:text）
+FIELDS = ("title", "text")
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    NFKC 正規化・大文字小文字の区別なしで語に分け、語ごとに文字 n-gram にする。
+
+    NGRAM 文字以下の語はそのまま1つのトークンにする。
+    """
+    tokens = []
+    for word in _WORD.findall(unicodedata.normalize("NFKC", text).casefold()):
+        if len(word) <= NGRAM:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i : i + NGRAM] for i in range(len(word) - NGRAM + 1))
+    return tokens
+
+
+class TextIndex:
+    """
+    論文タイトル（kg:paperTitle）とコンテンツの本文（kg:text）の転置索引。
+
+    文書（論文タイトル・コンテンツの本文1つ）ごとに文字 n-gram の出現回数を持ち、
+    フィールドごとの転置リスト（n-gram -> {文書ID: 出現回数}）から BM25 でスコアを付ける。
+    論文の名前付きグラフ単位で update し、ファイルには目録（PaperManifest）と同じく
+    対応するスナップショットの識別子を記録して、食い違う場合は使わない。
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path is not None else None
+        self.clear()
+
+    @classmethod
+    def build(cls, graph: Graph) -> "TextIndex":
+        """グラフ内のすべての論文から保存しない索引を作る"""
+        index = cls()
+        for paper in set(graph.subjects(RDF.type, KG.Paper)):
+            index.update(paper, graph)
+        return index
+
+    def clear(self) -> None:
+        """索引を空にする"""
+        # 文書ID -> [主語（N3）, 論文の URI, フィールド, トークン数]
+        self.docs: dict[int, list] = {}
+        # 論文の URI -> 文書ID
+        self.papers: dict[str, list[int]] = {}
+        # フィールド -> n-gram -> {文書ID: 出現回数}
+        self.postings: dict[str, dict[str, dict[int, int]]] = {field: {} for field in FIELDS}
+        # フィールド -> [文書数, トークン数の合計]
+        self.stats: dict[str, list[int]] = {field: [0, 0] for field in FIELDS}
+        self._next_id = 0
+        # 文書ID -> n-gram（削除に使う。初回の削除時に転置リストから作る）
+        self._forward: dict[int, list[str]] | None = None
+
+    def load(self, base_id: str) -> bool:
+        """base_id が一致する索引を読み込む。読み込めた場合は True を返す"""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        if data.get("version") != self.VERSION or data.get("base_id") != base_id:
+            return False
+        self.clear()
+        for doc_id, doc in data["docs"].items():
+            self._register(int(doc_id), doc)
+        self._next_id = data["next_id"]
+        for field, postings in data["postings"].items():
+            # 転置リストは [文書ID, 出現回数, 文書ID, 出現回数, …] で保存する
+            self.postings[field] = {
+                gram: dict(zip(flat[::2], flat[1::2])) for gram, flat in postings.items()
+            }
+        return True
+
+    def save(self, base_id: str) -> None:
+        """一時ファイル経由で索引を書き出す"""
+        data = {
+            "version": self.VERSION,
+            "base_id": base_id,
+            "next_id": self._next_id,
+            "docs": self.docs,
+            "postings": {
+                field: {
+                    gram: [value for item in posting.items() for value in item]
+                    for gram, posting in postings.items()
+                }
+                for field, postings in self.postings.items()
+            },
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        durable_replace(tmp_path, self.path)
+
+    def update(self, paper: URIRef, graph: Graph) -> None:
+        """論文のタイトルと、実験を経由したコンテンツの本文を索引し直す（グラフが空なら外す）"""
+        for doc_id in self.papers.pop(str(paper), ()):
+            self._remove(doc_id)
+        for title in graph.objects(paper, KG.paperTitle):
+            self._add(paper, paper, "title", str(title))
+        texts = {
+            (content, text)
+            for experiment in graph.objects(paper, KG.hasExperiment)
+            for content in graph.objects(experiment, KG.hasContent)
+            for text in graph.objects(content, KG.text)
+        }
+        for content, text in texts:
+            self._add(paper, content, "text", str(text))
+
+    def _register(self, doc_id: int, doc: list) -> None:
+        self.docs[doc_id] = doc
+        self.papers.setdefault(doc[1], []).append(doc_id)
+        stats = self.stats[doc[2]]
+        stats[0] += 1
+        stats[1] += doc[3]
+
+    def _add(self, paper: URIRef, subject: Node, field: str, text: str) -> None:
+        counts = Counter(tokenize(text))
+        doc_id = self._next_id
+        self._next_id += 1
+        self._register(doc_id, [subject.n3(), str(paper), field, sum(counts.values())])
+        postings = self.postings[field]
+        for gram, count in counts.items():
+            postings.setdefault(gram, {})[doc_id] = count
+        if self._forward is not None:
+            self._forward[doc_id] = list(counts)
+
+    def _remove(self, doc_id: int) -> None:
+        if self._forward is None:
+            self._forward = {}
+            for postings in self.postings.values():
+                for gram, posting in postings.items():
+                    for indexed in posting:
+                        self._forward.setdefault(indexed, []).append(gram)
+        _, _, field, length = self.docs.pop(doc_id)
+        postings = self.postings[field]
+        for gram in self._forward.pop(doc_id, ()):
+            posting = postings[gram]
+            del posting[doc_id]
+            if not posting:
+                del postings[gram]
+        stats = self.stats[field]
+        stats[0] -= 1
+        stats[1] -= length
+
+    def _query_terms(self, query: str, field: str) -> list[list[str]]:
+        """
+        検索語を n-gram の組のリストにする。
+
+        NGRAM 文字未満の語（日本語の1文字など）は、その文字を含む索引済みの n-gram のいずれかに一致すればよい。
+        """
+        terms = []
+        for gram in dict.fromkeys(tokenize(query)):
+            if len(gram) < NGRAM:
+                terms.append([indexed for indexed in self.postings[field] if gram in indexed])
+            else:
+                terms.append([gram])
+        return terms
+
+    def _match(self, query: str, field: str) -> dict[int, float]:
+        """検索語のすべての n-gram を含む文書の BM25 スコア"""
+        count, total = self.stats[field]
+        terms = self._query_terms(query, field)
+        if count == 0 or not terms:
+            return {}
+        postings = self.postings[field]
+        average = total / count
+        # 文書の少ない n-gram から絞り込む
+        terms.sort(key=lambda grams: sum(len(postings.get(gram, ())) for gram in grams))
+        scores = None
+        for grams in terms:
+            found: dict[int, float] = {}
+            for gram in grams:
+                posting = postings.get(gram)
+                if not posting:
+                    continue
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                if scores is None:
+                    matches = posting.items()
+                else:
+                    matches = ((doc_id, posting[doc_id]) for doc_id in scores if doc_id in posting)
+                for doc_id, tf in matches:
+                    norm = K1 * (1 - B + B * self.docs[doc_id][3] / average)
+                    found[doc_id] = found.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+            if scores is None:
+                scores = found
+            else:
+                scores = {doc_id: scores[doc_id] + score for doc_id, score in found.items()}
+            if not scores:
+                break
+        return scores
+
+    def search(self, query: str) -> list[tuple[Node, str, float]]:
+        """
+        検索語に一致するコンテンツを (コンテンツ, 論文の URI, スコア) のスコアの高い順で返す。
+
+        本文が一致するコンテンツに加え、タイトルが一致する論文のすべてのコンテンツを返す。
+        スコアは本文の BM25 スコアと論文タイトルの BM25 スコアの和。
+        """
+        # コンテンツ（N3） -> [論文の URI, スコア]
+        hits: dict[str, list] = {}
+        for doc_id, score in self._match(query, "text").items():
+            subject, paper = self.docs[doc_id][:2]
+            hit = hits.setdefault(subject, [paper, 0.0])
+            hit[1] = max(hit[1], score)
+        titles: dict[str, float] = {}
+        for doc_id, score in self._match(query, "title").items():
+            paper = self.docs[doc_id][1]
+            titles[paper] = max(titles.get(paper, 0.0), score)
+        for paper, score in titles.items():
+            for content_id in self.papers.get(paper, ()):
+                subject, _, field, _ = self.docs[content_id]
+                if field == "text":
+                    hits.setdefault(subject, [paper, 0.0])[1] += score
+        ranked = sorted(hits.items(), key=lambda item: (-item[1][1], item[0]))
+        return [(from_n3(subject), paper, score) for subject, (paper, score) in ranked]
@@ -0,0 +1,40 @@
+from .journal import JournalBatch
+
+
+class Transaction:
+    """
+    GraphManager.transaction() 中の変更の差分（デルタ）。
+
+    トランザクション中に実際に追加・削除されたクワッドを記録し、
+    打ち消し合う変更を相殺した正味の差分を保持する。コミット時はこの差分を
+    検証・永続化し、ロールバック時は逆向きに適用して元に戻す。
+    """
+
+    def __init__(self):
+        self.added = set()
+        self.removed = set()
+
+    def record(self, removed, added) -> None:
+        """実際に削除・追加されたクワッドを差分に反映する（削除が先）"""
+        for quad in removed:
+            if quad in self.added:
+                self.added.discard(quad)
+            else:
+                self.removed.add(quad)
+        for quad in added:
+            if quad in self.removed:
+                self.removed.discard(quad)
+            else:
+                self.added.add(quad)
+
+    def added_subjects(self) -> set:
+        """トリプルが追加された主語（検証の対象）"""
+        return {quad[0] for quad in self.added}
+
+    def as_batch(self) -> JournalBatch:
+        """正味の差分を1つのジャーナルバッチとして返す"""
+        return JournalBatch(removed=list(self.removed), added=list(self.added), dropped=[])
+
+    def inverse(self) -> JournalBatch:
+        """差分を取り消すバッチ"""
+        return JournalBatch(removed=list(self.added), added=list(self.removed), dropped=[])
@@ -0,0 +1,88 @@
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+from rdflib import RDF, Graph, URIRef
+from rdflib.term import Node
+from .ontology import KG, PREFIXES
+
+
+def expand_curie(curie: str) -> URIRef:
+    """kg:Paper のような CURIE を PREFIXES で IRI に展開する"""
+    prefix, local = curie.split(":", 1)
+    return URIRef(PREFIXES[prefix] + local)
+
+
+class Violation(NamedTuple):
+    """バリデーション違反（対象の主語とメッセージ）"""
+
+    subject: Node
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.message} ({self.subject})"
+
+
+class ValidationError(ValueError):
+    """1件以上のバリデーション違反。violations に全件を保持する"""
+
+    def __init__(self, violations: list[Violation]):
+        self.violations = violations
+        super().__init__("\n".join(str(violation) for violation in violations))
+
+
+class RequiredPropertyValidator:
+    """
+    必須プロパティの定義（{型: [プロパティ]}）から組み立てたバリデータ。
+
+    グラフのトリプルを1回走査して主語ごとの rdf:type と述語の有無を集め、
+    必須プロパティの欠落と空の論文タイトルを主語つきで全件報告する。
+    subjects を指定すると、その主語のトリプルだけを調べる（差分の検証用）。
+    """
+
+    def __init__(self, required: dict[str, list[str]]):
+        # 型 -> [(プロパティ, 報告用メッセージ)]
+        self._rules = {
+            expand_curie(entity_type): [
+                (expand_curie(prop), f"{entity_type} must have {prop}") for prop in props
+            ]
+            for entity_type, props in required.items()
+        }
+        self._tracked = {prop for rules in self._rules.values() for prop, _ in rules}
+
+    def violations(
+        self, graph: Graph, subjects: Iterable[Node] | None = None
+    ) -> list[Violation]:
+        """違反をすべて返す"""
+        if subjects is None:
+            triples = graph.triples((None, None, None))
+        else:
+            triples = (
+                triple for subject in subjects for triple in graph.triples((subject, None, None))
+            )
+
+        types = defaultdict(set)
+        present = defaultdict(set)
+        found = []
+        for s, p, o in triples:
+            if p == RDF.type:
+                if o in self._rules:
+                    types[s].add(o)
+            else:
+                if p in self._tracked:
+                    present[s].add(p)
+                if p == KG.paperTitle and not str(o).strip():
+                    found.append(Violation(s, "Paper title cannot be empty"))
+
+        for subject, entity_types in types.items():
+            for entity_type in entity_types:
+                found.extend(
+                    Violation(subject, message)
+                    for prop, message in self._rules[entity_type]
+                    if prop not in present[subject]
+                )
+        return found
+
+    def validate(self, graph: Graph, subjects: Iterable[Node] | None = None) -> None:
+        """違反があれば ValidationError を送出する"""
+        found = self.violations(graph, subjects)
+        if found:
+            raise ValidationError(found)
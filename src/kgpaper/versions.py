@@ -0,0 +1,130 @@
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from .journal import ChangeJournal, JournalBatch, durable_replace
+
+logger = logging.getLogger(__name__)
+
+
+class VersionStore:
+    """
+    グラフの版の履歴（差分の連鎖）。
+
+    版はコミット1回分の正味の差分（実際に削除・追加されたクワッド）として
+    versions/<id>.nq にジャーナルと同じ形式で保存し、版の一覧は index.json に記録する。
+    版 n の状態は最新の状態から版 n+1 以降の差分を新しい順に取り消したものになるため、
+    過去の状態への復元にかかる時間はグラフの大きさではなく差分の大きさに比例する。
+    checkout で過去の状態に戻した版には、戻した先の版の番号（restores）を記録する。
+    古い版は保持数と合計サイズの上限を超えた分から削除する（最新の版は常に残す）。
+    複数のプロセスで共有する場合は GraphManager の書き込みロックを保持した状態で呼ぶ。
+    """
+
+    def __init__(self, directory: Path, max_count: int, max_bytes: int):
+        self.directory = Path(directory)
+        self.index_file = self.directory / "index.json"
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+
+    def entries(self) -> list[dict]:
+        """保持している版の一覧（古い順）"""
+        try:
+            return json.loads(self.index_file.read_text(encoding="utf-8"))["versions"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return []
+
+    @property
+    def head(self) -> int:
+        """最新の版の番号（版がなければ0）"""
+        entries = self.entries()
+        return entries[-1]["id"] if entries else 0
+
+    def record(self, deltas: list[JournalBatch]) -> None:
+        """差分を1つずつ新しい版として記録し、保持の上限を超えた古い版を削除する"""
+        deltas = [delta for delta in deltas if delta.added or delta.removed]
+        if not deltas:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = self.entries()
+        next_id = entries[-1]["id"] + 1 if entries else 1
+        for delta in deltas:
+            path = self._delta_file(next_id)
+            delta_file = ChangeJournal(path)
+            delta_file.reset(str(next_id))
+            delta_file.append(added=delta.added, removed=delta.removed)
+            papers = {quad[3] for quad in delta.added} | {quad[3] for quad in delta.removed}
+            entries.append(
+                {
+                    "id": next_id,
+                    "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "added": len(delta.added),
+                    "removed": len(delta.removed),
+                    "papers": sorted(
+                        str(paper) for paper in papers if paper != DATASET_DEFAULT_GRAPH_ID
+                    ),
+                    "bytes": path.stat().st_size,
+                }
+            )
+            next_id += 1
+        self._save(self._prune(entries))
+
+    def mark_restore(self, version: int, restores: int) -> None:
+        """版 version が版 restores の状態に戻す操作であることを記録する"""
+        entries = self.entries()
+        for entry in entries:
+            if entry["id"] == version:
+                entry["restores"] = restores
+        self._save(entries)
+
+    def state_of(self, version: int) -> int:
+        """
+        版 version の状態がどの変更の版の状態と同じか（checkout の版は戻した先をたどる）。
+
+        rollback はこの版の1つ前に戻すため、繰り返すと変更を1つずつさかのぼる。
+        """
+        restores = {entry["id"]: entry.get("restores") for entry in self.entries()}
+        while restores.get(version) is not None:
+            version = restores[version]
+        return version
+
+    def deltas_after(self, version: int) -> list[JournalBatch]:
+        """
+        版 version より新しい版の差分を古い順に返す。
+
+        version まで戻るのに必要な差分が削除済みの場合は ValueError を送出する。
+        """
+        entries = self.entries()
+        head = entries[-1]["id"] if entries else 0
+        oldest = entries[0]["id"] - 1 if entries else 0
+        if not oldest <= version <= head:
+            raise ValueError(
+                f"Version {version} is not available (available: {oldest}..{head})"
+            )
+        deltas = []
+        for entry in entries:
+            if entry["id"] > version:
+                batches = list(ChangeJournal(self._delta_file(entry["id"])).replay())
+                deltas.append(
+                    batches[0] if batches else JournalBatch(removed=[], added=[], dropped=[])
+                )
+        return deltas
+
+    def _prune(self, entries: list[dict]) -> list[dict]:
+        total = sum(entry["bytes"] for entry in entries)
+        while len(entries) > 1 and (
+            len(entries) > self.max_count or total > self.max_bytes
+        ):
+            oldest = entries.pop(0)
+            total -= oldest["bytes"]
+            self._delta_file(oldest["id"]).unlink(missing_ok=True)
+            logger.info(f"古い版を削除しました: {oldest['id']}")
+        return entries
+
+    def _save(self, entries: list[dict]) -> None:
+        tmp_path = self.index_file.with_name(self.index_file.name + ".tmp")
+        tmp_path.write_text(json.dumps({"versions": entries}), encoding="utf-8")
+        durable_replace(tmp_path, self.index_file)
+
+    def _delta_file(self, version: int) -> Path:
+        return self.directory / f"{version}.nq"
@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+import weakref
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWriter:
+    """
+    変更通知をまとめて永続化するバックグラウンド書き込みスレッド。
+
+    notify() された変更は interval 秒に1回までの頻度で persist() にまとめて
+    渡される。flush() は呼び出し時点までの変更が永続化されるまで待つ。
+    persist() が失敗した場合は次の周期で再試行し、flush() は例外を送出する。
+    persist に weakref.WeakMethod を渡すと、スレッドは永続化待ちの変更がある間だけ
+    その持ち主を参照する（書き込み待ちがなければ持ち主はガベージコレクションされうる）。
+    """
+
+    def __init__(self, persist: Callable[[], None], interval: float):
+        self._persist = persist
+        # 永続化待ちの変更がある間に保持する persist の強参照（WeakMethod の場合）
+        self._pinned = None
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._requested = 0  # notify() の通算回数
+        self._completed = 0  # 永続化済みの notify() の通算回数
+        self._urgent = False
+        self._closing = False
+        self._error = None
+        self._last_write = float("-inf")
+        self._thread = threading.Thread(
+            target=self._run, name="kgpaper-writer", daemon=True
+        )
+        self._thread.start()
+
+    def notify(self) -> None:
+        """未保存の変更があることを通知する"""
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("BackgroundWriter is closed")
+            if isinstance(self._persist, weakref.WeakMethod):
+                self._pinned = self._persist()
+            self._requested += 1
+            self._cond.notify_all()
+
+    def flush(self) -> None:
+        """これまでに通知された変更が永続化されるまで待つ"""
+        with self._cond:
+            target = self._requested
+            self._urgent = True
+            self._error = None  # 失敗していた場合はすぐに再試行させる
+            self._cond.notify_all()
+            while self._completed < target and self._error is None:
+                if not self._thread.is_alive():
+                    raise RuntimeError("BackgroundWriter is not running")
+                self._cond.wait()
+            if self._completed < target:
+                raise self._error
+
+    def close(self) -> None:
+        """未保存の変更を永続化してからスレッドを終了する"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if threading.current_thread() is self._thread:
+            return  # 持ち主の解放が書き込みスレッド上で起きた場合（スレッドはこの後終了する）
+        self._thread.join()
+        with self._cond:
+            if self._completed < self._requested and self._error is not None:
+                raise self._error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._completed == self._requested and not self._closing:
+                    self._cond.wait()
+                if self._completed == self._requested:
+                    return
+                # 前回の書き込みから interval 秒経つまで通知をまとめる
+                while not (self._closing or self._urgent):
+                    remaining = self._last_write + self.interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                target = self._requested
+                self._urgent = False
+
+            try:
+                (self._pinned or self._persist)()
+                error = None
+            except Exception as e:
+                logger.error(f"バックグラウンド書き込み失敗: {e}", exc_info=True)
+                error = e
+
+            with self._cond:
+                self._last_write = time.monotonic()
+                self._error = error
+                if error is None:
+                    self._completed = target
+                    if self._completed == self._requested:
+                        self._pinned = None
+                self._cond.notify_all()
+                if error is not None and self._closing:
+                    return  # 終了時は再試行しない
@@ -0,0 +1,133 @@
+"""
+テストで共有するヘルパー
+
+設定ファイルの書き出しと、テスト用の論文の JSON-LD を作る関数を定義する
+（パラメータ化の引数などモジュールの読み込み時にも使うため、フィクスチャではなく関数とする）。
+"""
+
+import os
+
+
+def write_config(tmp_path, extra: str = "") -> str:
+    """tmp_path に graph_dir を指す設定ファイルを書き出す（extra は storage 節に追記する）"""
+    config_path = tmp_path / "config.yaml"
+    graph_dir = tmp_path / "graphs"
+    config_path.write_text(
+        f"""
+storage:
+  graph_dir: "{str(graph_dir).replace(os.sep, '/')}"
+{extra}
+""",
+        encoding="utf-8",
+    )
+    return str(config_path)
+
+
+def sample_paper(paper_id: str, title: str) -> dict:
+    """空白ノードの実験・コンテンツを持つ論文のJSON-LD"""
+    return {
+        "@context": {
+            "kg": "http://example.org/kgpaper/",
+            "paperTitle": "kg:paperTitle",
+            "documentType": "kg:documentType",
+            "hasExperiment": "kg:hasExperiment",
+            "experimentType": "kg:experimentType",
+            "hasContent": "kg:hasContent",
+            "contentType": "kg:contentType",
+            "text": "kg:text",
+        },
+        "@id": paper_id,
+        "@type": "kg:Paper",
+        "paperTitle": title,
+        "documentType": "main",
+        "hasExperiment": [
+            {
+                "@type": "kg:Experiment",
+                "experimentType": "kg:Synthesis",
+                "hasContent": [
+                    {
+                        "@type": "kg:Method",
+                        "contentType": "method",
+                        "text": f"Method of {title}\nsecond line",
+                    }
+                ],
+            }
+        ],
+    }
+
+
+def sourced_paper(paper_id: str, title: str) -> dict:
+    """IRI の実験タイプと複数の sourceContext を持つ論文のJSON-LD"""
+    return {
+        "@context": {
+            "kg": "http://example.org/kgpaper/",
+            "paperTitle": "kg:paperTitle",
+            "documentType": "kg:documentType",
+            "hasExperiment": "kg:hasExperiment",
+            "experimentType": {"@id": "kg:experimentType", "@type": "@id"},
+            "hasContent": "kg:hasContent",
+            "contentType": "kg:contentType",
+            "sourceContext": "kg:sourceContext",
+            "text": "kg:text",
+        },
+        "@id": paper_id,
+        "@type": "kg:Paper",
+        "paperTitle": title,
+        "documentType": "main",
+        "hasExperiment": {
+            "@type": "kg:Experiment",
+            "experimentType": "kg:Synthesis",
+            "hasContent": {
+                "@type": "kg:Method",
+                "contentType": "method",
+                "sourceContext": ["Main", "Support"],
+                "text": f"Method of {title}",
+            },
+        },
+    }
+
+
+def typed_paper(paper_id: str, title: str, experiments: int = 1) -> dict:
+    """DOI・元ファイルと、手法・結果のコンテンツを持つ実験を experiments 個持つ論文のJSON-LD"""
+    return {
+        "@context": {
+            "kg": "http://example.org/kgpaper/",
+            "paperTitle": "kg:paperTitle",
+            "paperDOI": "kg:paperDOI",
+            "documentType": "kg:documentType",
+            "sourceFile": "kg:sourceFile",
+            "hasExperiment": "kg:hasExperiment",
+            "experimentType": {"@id": "kg:experimentType", "@type": "@id"},
+            "hasContent": "kg:hasContent",
+            "contentType": "kg:contentType",
+            "sourceContext": "kg:sourceContext",
+            "text": "kg:text",
+        },
+        "@id": paper_id,
+        "@type": "kg:Paper",
+        "paperTitle": title,
+        "paperDOI": f"10.1234/{title.replace(' ', '-').lower()}",
+        "documentType": "main",
+        "sourceFile": f"{title}.pdf",
+        "hasExperiment": [
+            {
+                "@type": "kg:Experiment",
+                "experimentType": "kg:Synthesis",
+                "hasContent": [
+                    {
+                        "@type": "kg:Method",
+                        "contentType": "method",
+                        "sourceContext": "Main",
+                        "text": f"Method {i} of {title}",
+                    },
+                    {
+                        "@type": "kg:Result",
+                        "contentType": "result",
+                        "sourceContext": "Main",
+                        "text": f"Result {i} of {title}",
+                    },
+                ],
+            }
+            for i in range(experiments)
+        ],
+    }
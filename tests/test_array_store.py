@@ -0,0 +1,178 @@
+"""
+array_store.py のテスト
+
+ArrayStore（NumPy 配列による辞書符号化ストア）と、
+storage.backend: array の GraphManager を検証する。
+"""
+
+import pytest
+import json
+from rdflib import BNode, Dataset, Graph, Literal, URIRef
+from rdflib.namespace import RDF, XSD
+from kgpaper.array_store import ArrayStore
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG, PREFIXES
+from kgpaper.sparql_query import SparqlQuery
+from helpers import sourced_paper, write_config
+
+ARRAY = '  backend: "array"'
+
+
+@pytest.fixture
+def dataset():
+    return Dataset(store=ArrayStore(), default_union=True)
+
+
+class TestArrayStore:
+    """ArrayStore 単体のテスト"""
+
+    def test_terms_round_trip(self, dataset):
+        """URI・空白ノード・言語タグ付き/型付きリテラルが復元されるテスト"""
+        paper = URIRef("urn:uuid:p1")
+        node = BNode("exp1")
+        triples = [
+            (paper, KG.hasExperiment, node),
+            (node, KG.text, Literal("日本語のテキスト", lang="ja")),
+            (node, KG.extractedAt, Literal("2026-01-01", datatype=XSD.date)),
+        ]
+        for triple in triples:
+            dataset.graph(paper).add(triple)
+
+        assert set(dataset.triples((None, None, None))) == set(triples)
+        assert list(dataset.triples((None, None, Literal("2026-01-01")))) == []
+
+    def test_union_yields_each_triple_once(self, dataset):
+        """複数グラフにある同一トリプルが和集合では1回だけ返るテスト"""
+        triple = (URIRef("urn:a"), KG.paperTitle, Literal("A"))
+        dataset.graph(URIRef("urn:g1")).add(triple)
+        dataset.graph(URIRef("urn:g2")).add(triple)
+        dataset.graph(URIRef("urn:g2")).add(triple)
+
+        assert list(dataset.triples((None, KG.paperTitle, None))) == [triple]
+        assert len(dataset) == 1
+        assert len(list(dataset.quads((None, None, None, None)))) == 2
+
+    def test_lookup_by_each_index(self, dataset):
+        """束縛された位置の組み合わせごとに正しい索引で検索されるテスト"""
+        a, b = URIRef("urn:a"), URIRef("urn:b")
+        triples = {
+            (a, RDF.type, KG.Paper),
+            (a, KG.paperTitle, Literal("A")),
+            (b, RDF.type, KG.Paper),
+            (b, KG.cites, a),
+        }
+        dataset.addN((*triple, URIRef("urn:g")) for triple in triples)
+
+        for pattern in [
+            (a, None, None),
+            (a, RDF.type, None),
+            (a, None, KG.Paper),
+            (None, RDF.type, None),
+            (None, RDF.type, KG.Paper),
+            (None, None, a),
+            (b, KG.cites, a),
+            (None, None, None),
+        ]:
+            expected = {
+                t
+                for t in triples
+                if all(x is None or x == y for x, y in zip(pattern, t))
+            }
+            assert set(dataset.triples(pattern)) == expected, pattern
+
+    def test_incremental_adds_merge_into_index(self, dataset):
+        """索引構築後の少量の追加・重複追加が正しく反映されるテスト"""
+        graph = dataset.graph(URIRef("urn:g"))
+        for i in range(100):
+            graph.add((URIRef(f"urn:s{i}"), KG.paperTitle, Literal(f"T{i}")))
+        assert len(graph) == 100
+
+        graph.add((URIRef("urn:s50"), KG.paperTitle, Literal("T50")))
+        graph.add((URIRef("urn:s50"), KG.documentType, Literal("main")))
+
+        assert len(graph) == 101
+        assert set(graph.objects(URIRef("urn:s50"), None)) == {
+            Literal("T50"),
+            Literal("main"),
+        }
+
+    def test_remove_graph_and_patterns(self, dataset):
+        """グラフ単位・パターン単位の削除のテスト"""
+        g1 = dataset.graph(URIRef("urn:g1"))
+        g2 = dataset.graph(URIRef("urn:g2"))
+        g1.add((URIRef("urn:a"), RDF.type, KG.Paper))
+        g2.add((URIRef("urn:b"), RDF.type, KG.Paper))
+        g2.add((URIRef("urn:b"), KG.paperTitle, Literal("B")))
+
+        dataset.remove_graph(URIRef("urn:g1"))
+        dataset.remove((None, KG.paperTitle, None))
+
+        assert list(dataset.subjects(RDF.type, KG.Paper)) == [URIRef("urn:b")]
+        assert URIRef("urn:g1") not in {g.identifier for g in dataset.graphs()}
+        assert len(dataset.get_context(URIRef("urn:g2"))) == 1
+
+    def test_sparql_search(self, dataset):
+        """SparqlQuery.search が既定のストアと同じ結果を返すテスト"""
+        data = Graph()
+        data.parse(data=json.dumps(sourced_paper("urn:uuid:p1", "Paper One")), format="json-ld")
+        reference = Graph()
+        for prefix, namespace in PREFIXES.items():
+            reference.bind(prefix, namespace)
+            dataset.bind(prefix, namespace)
+        for triple in data:
+            reference.add(triple)
+            dataset.add(triple)
+
+        expected = SparqlQuery(reference).search(paper_title="paper")
+        actual = SparqlQuery(dataset).search(paper_title="paper")
+
+        assert actual == expected
+        assert len(actual) == 1
+
+
+class TestGraphManagerArrayBackend:
+    """storage.backend: array の GraphManager のテスト"""
+
+    def test_add_delete_and_reopen(self, tmp_path):
+        """追加・削除がジャーナル経由で永続化され、再起動後に復元されるテスト"""
+        config_path = write_config(tmp_path, ARRAY)
+        gm = GraphManager(config_path=config_path)
+        assert isinstance(gm.g.store, ArrayStore)
+        gm.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+        gm.add_json_ld(sourced_paper("urn:uuid:p2", "Paper Two"))
+        gm.delete_paper("urn:uuid:p1")
+
+        reopened = GraphManager(config_path=config_path)
+
+        assert [p["title"] for p in reopened.get_all_papers()] == ["Paper Two"]
+        assert len(reopened.g) == len(gm.g)
+
+    def test_search_matches_memory_backend(self, tmp_path):
+        """SparqlQuery.search の結果がメモリバックエンドと一致するテスト"""
+        results = {}
+        for backend in ("memory", "array"):
+            backend_dir = tmp_path / backend
+            backend_dir.mkdir()
+            gm = GraphManager(config_path=write_config(backend_dir, f'  backend: "{backend}"'))
+            gm.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+            gm.add_json_ld(sourced_paper("urn:uuid:p2", "Paper Two"))
+            rows = SparqlQuery(gm.g).search(source_context="Main")
+            results[backend] = sorted(
+                (r["paper_title"], r["experiment_type"], r["source_context"])
+                for r in rows
+            )
+
+        assert results["array"] == results["memory"]
+        assert len(results["array"]) == 2
+
+    def test_reads_memory_backend_files(self, tmp_path):
+        """memory バックエンドで保存したファイルをそのまま読み込めるテスト"""
+        memory_gm = GraphManager(config_path=write_config(tmp_path))
+        memory_gm.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+        memory_gm.compact()
+
+        gm = GraphManager(config_path=write_config(tmp_path, ARRAY))
+
+        assert set(gm.g.quads((None, None, None, None))) == set(
+            memory_gm.g.quads((None, None, None, None))
+        )
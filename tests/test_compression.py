@@ -0,0 +1,146 @@
+"""
+compression.py のテスト
+
+圧縮ファイルの逐次読み書きと、GraphManager の圧縮した保存・インポート・エクスポートを検証する。
+"""
+
+import gzip
+import pytest
+from rdflib import Graph
+from kgpaper.compression import compression_of, open_file, strip_compression
+from kgpaper.graph_manager import GraphManager
+from helpers import sample_paper, write_config
+
+GZIP = '  compression: "gzip"'
+
+
+def _quads(gm: GraphManager) -> set:
+    return set(gm.g.quads((None, None, None, None)))
+
+
+def _titles(gm: GraphManager) -> set:
+    return {paper["title"] for paper in gm.get_all_papers()}
+
+
+def _snapshot_compressions(gm: GraphManager) -> set:
+    """スナップショットのファイル（論文シャード・Turtle・バイナリ）の圧縮方式"""
+    files = [
+        *gm.paper_dir.iterdir(),
+        *gm.graph_dir.glob("knowledge_graph.ttl*"),
+        *gm.graph_dir.glob("knowledge_graph.snap*"),
+    ]
+    return {compression_of(path) for path in files}
+
+
+class TestOpenFile:
+    """open_file のテスト"""
+
+    def test_suffix(self):
+        """拡張子から圧縮方式を判定するテスト"""
+        assert compression_of("a.ttl.gz") == "gzip"
+        assert compression_of("a.nq.zst") == "zstd"
+        assert compression_of("a.ttl") is None
+        assert strip_compression("a.ttl.gz").name == "a.ttl"
+
+    @pytest.mark.parametrize("suffix", [".gz", ".zst"])
+    def test_round_trip(self, tmp_path, suffix):
+        """圧縮して書いた内容を行単位で読み戻せるテスト"""
+        if suffix == ".zst":
+            pytest.importorskip("zstandard")
+        path = tmp_path / f"data.nq{suffix}"
+        lines = [f"line {i}\n".encode() for i in range(1000)]
+        with open_file(path, "wb") as f:
+            f.writelines(lines)
+
+        assert path.stat().st_size < sum(len(line) for line in lines)
+        with open_file(path) as f:
+            assert list(f) == lines
+
+
+class TestCompressedStorage:
+    """GraphManager の圧縮した保存のテスト"""
+
+    @pytest.mark.parametrize("extra", ["", "  binary_snapshot: false", "  lazy_load: true"])
+    def test_reload(self, tmp_path, extra):
+        """圧縮したスナップショットから同じグラフを読み込めるテスト"""
+        config = write_config(tmp_path, f"{GZIP}\n{extra}")
+        gm = GraphManager(config)
+        for i in range(3):
+            gm.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+        gm.compact()
+
+        assert gm.graph_file.name == "knowledge_graph.ttl.gz"
+        with gzip.open(gm.graph_file) as f:
+            f.read()  # gzip として読める
+        assert all(path.name.endswith(".nq.gz") for path in gm.paper_dir.iterdir())
+
+        reloaded = GraphManager(config)
+        reloaded.load_papers(paper["uri"] for paper in reloaded.get_all_papers())
+        assert _quads(reloaded) == _quads(gm)
+
+    @pytest.mark.parametrize(
+        "before, after", [("", GZIP), (GZIP, ""), (GZIP + "\n  lazy_load: true", "")]
+    )
+    def test_change_compression(self, tmp_path, before, after):
+        """圧縮方式を変えると既存のファイルが書き直されるテスト（ジャーナルの変更も残る）"""
+        gm = GraphManager(write_config(tmp_path, before))
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        gm.compact()
+        gm.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))  # ジャーナルのみ
+
+        changed = GraphManager(write_config(tmp_path, after))
+        assert _titles(changed) == {"Paper 1", "Paper 2"}
+        assert _snapshot_compressions(changed) == {"gzip" if after else None}
+
+        reloaded = GraphManager(write_config(tmp_path, after))
+        assert _quads(reloaded) == _quads(changed)
+        assert reloaded.check_ownership() == []
+
+
+class TestCompressedImportExport:
+    """圧縮ファイルのインポート・エクスポートのテスト"""
+
+    def test_export_and_import(self, tmp_path):
+        """圧縮してエクスポートした論文を圧縮したままインポートできるテスト"""
+        source = GraphManager(write_config(tmp_path))
+        source.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        exported = tmp_path / "paper1.ttl.gz"
+        assert source.export_paper("http://example.org/paper1", destination=str(exported)) is None
+
+        with gzip.open(exported) as f:
+            graph = Graph().parse(data=f.read().decode("utf-8"), format="turtle")
+        assert len(graph) == len(source.g)
+
+        (tmp_path / "target").mkdir()
+        target = GraphManager(write_config(tmp_path / "target"))
+        target.import_graph(str(exported))
+        assert _titles(target) == {"Paper 1"}
+
+        (tmp_path / "dir").mkdir()
+        exported.rename(tmp_path / "dir" / exported.name)
+        (tmp_path / "other").mkdir()
+        other = GraphManager(write_config(tmp_path / "other"))
+        report = other.import_directory(str(tmp_path / "dir"), workers=1)
+        assert report["errors"] == {}
+        assert len(report["imported"]) == 1
+
+    def test_import_stream(self, tmp_path):
+        """圧縮した N-Quads を逐次インポートし、進捗がファイル上の位置で報告されるテスト"""
+        source = GraphManager(write_config(tmp_path))
+        for i in range(3):
+            source.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+        dump = tmp_path / "dump.nq.gz"
+        with gzip.open(dump, "wb") as f:
+            source.g.serialize(destination=f, format="nquads")
+
+        (tmp_path / "target").mkdir()
+        gm = GraphManager(write_config(tmp_path / "target"))
+        progress = []
+        report = gm.import_stream(
+            str(dump), chunk_lines=5, progress=lambda done, total: progress.append((done, total))
+        )
+
+        assert report["errors"] == {}
+        assert report["papers"] == 3
+        assert progress[-1] == (dump.stat().st_size, dump.stat().st_size)
+        assert len(gm.g) == len(source.g)
@@ -0,0 +1,193 @@
+"""
+dedup.py のテスト
+
+重複検出のキー（PDF のハッシュ・DOI・内容の指紋）と、GraphManager の取り込み時の
+重複処理（skip / replace / merge）を検証する。
+"""
+
+import copy
+import json
+import pytest
+from rdflib import Graph, URIRef
+from kgpaper.dedup import content_fingerprint, dedup_keys, file_hash, normalize_doi
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+from helpers import sample_paper, write_config
+
+SQLITE = '  backend: "sqlite"'
+
+
+def _with_doi(paper_id: str, title: str, doi: str) -> dict:
+    data = sample_paper(paper_id, title)
+    data["@context"]["paperDOI"] = "kg:paperDOI"
+    data["paperDOI"] = doi
+    return data
+
+
+def _with_experiment(data: dict, text: str) -> dict:
+    data = copy.deepcopy(data)
+    experiment = copy.deepcopy(data["hasExperiment"][0])
+    experiment["hasContent"][0]["text"] = text
+    data["hasExperiment"].append(experiment)
+    return data
+
+
+def _parse(data: dict) -> Graph:
+    return Graph().parse(data=json.dumps(data), format="json-ld")
+
+
+class TestDedupKeys:
+    """重複検出のキーのテスト"""
+
+    def test_normalize_doi(self):
+        """DOI の接頭辞と大文字小文字を揃えるテスト"""
+        assert normalize_doi("https://doi.org/10.1000/ABC") == "10.1000/abc"
+        assert normalize_doi("doi: 10.1000/abc ") == "10.1000/abc"
+        assert normalize_doi("http://dx.doi.org/10.1000/abc") == "10.1000/abc"
+
+    def test_fingerprint_ignores_ids_and_formatting(self):
+        """内容の指紋が URI・空白ノード・空白や大文字小文字の違いに依存しないテスト"""
+        original = sample_paper("urn:uuid:p1", "Paper One")
+        reformatted = sample_paper("urn:uuid:p2", "  paper   ONE ")
+        reformatted["hasExperiment"][0]["hasContent"][0]["text"] = (
+            "method of paper one second   line"
+        )
+        changed = _with_experiment(original, "Another method")
+
+        fingerprint = content_fingerprint(_parse(original), URIRef("urn:uuid:p1"))
+        assert content_fingerprint(_parse(reformatted), URIRef("urn:uuid:p2")) == fingerprint
+        assert content_fingerprint(_parse(changed), URIRef("urn:uuid:p1")) != fingerprint
+
+    def test_keys(self, tmp_path):
+        """DOI と内容の指紋がキーになり、PDF のハッシュが内容から計算されるテスト"""
+        keys = dedup_keys(
+            _parse(_with_doi("urn:uuid:p1", "Paper", "DOI:10.1/X")), URIRef("urn:uuid:p1")
+        )
+        assert keys[0] == "doi:10.1/x"
+        assert keys[1].startswith("content:")
+
+        pdf = tmp_path / "paper.pdf"
+        pdf.write_bytes(b"%PDF-1.4 test")
+        assert file_hash(pdf) == file_hash(pdf)
+        assert len(file_hash(pdf)) == 64
+
+
+@pytest.mark.parametrize("backend", ["", SQLITE])
+class TestIngestDedup:
+    """取り込み時の重複処理のテスト"""
+
+    def test_readd_is_noop(self, tmp_path, backend):
+        """同じ JSON-LD を再登録してもトリプルが増えないテスト（デフォルト: merge）"""
+        gm = GraphManager(write_config(tmp_path, backend))
+        data = sample_paper("urn:uuid:p1", "Paper One")
+        assert gm.add_json_ld(data) == {}
+        before = len(gm.g)
+
+        assert gm.add_json_ld(data) == {"urn:uuid:p1": "urn:uuid:p1"}
+        assert len(gm.g) == before
+
+    def test_skip_same_content_with_new_uri(self, tmp_path, backend):
+        """URI が違っても内容が同じ論文は skip で取り込まれないテスト"""
+        gm = GraphManager(write_config(tmp_path, backend))
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        before = len(gm.g)
+
+        duplicates = gm.add_json_ld(sample_paper("urn:uuid:p2", "paper one"), on_duplicate="skip")
+
+        assert duplicates == {"urn:uuid:p2": "urn:uuid:p1"}
+        assert len(gm.g) == before
+        assert [paper["uri"] for paper in gm.get_all_papers()] == ["urn:uuid:p1"]
+
+    def test_replace_by_doi(self, tmp_path, backend):
+        """DOI が一致する論文が replace で置き換えられるテスト"""
+        gm = GraphManager(write_config(tmp_path, backend))
+        gm.add_json_ld(_with_doi("urn:uuid:p1", "Old Title", "10.1/abc"))
+
+        gm.add_json_ld(
+            _with_doi("urn:uuid:p2", "New Title", "https://doi.org/10.1/ABC"),
+            on_duplicate="replace",
+        )
+
+        assert [(p["uri"], p["title"]) for p in gm.get_all_papers()] == [
+            ("urn:uuid:p2", "New Title")
+        ]
+        assert len(gm.g.get_context(URIRef("urn:uuid:p1"))) == 0
+
+    def test_find_after_replace(self, tmp_path, backend):
+        """置き換えた論文が同じセッションの find_duplicate で DOI から見つかるテスト"""
+        gm = GraphManager(write_config(tmp_path, backend))
+        gm.add_json_ld(_with_doi("urn:uuid:p1", "Old Title", "10.1/abc"))
+        assert gm.find_duplicate(doi="10.1/abc") == "urn:uuid:p1"  # 索引を作る
+
+        for new, old in (("urn:uuid:p2", "urn:uuid:p1"), ("urn:uuid:p0", "urn:uuid:p2")):
+            duplicates = gm.add_json_ld(
+                _with_doi(new, "New Title", "10.1/abc"), on_duplicate="replace"
+            )
+            assert duplicates == {new: old}
+            assert gm.find_duplicate(doi="10.1/ABC") == new
+        gm.delete_paper("urn:uuid:p0")
+        assert gm.find_duplicate(doi="10.1/abc") is None
+
+    def test_merge_adds_new_experiments(self, tmp_path, backend):
+        """merge で既存の論文にない実験だけが追加され、その後の再登録も検出されるテスト"""
+        gm = GraphManager(write_config(tmp_path, backend))
+        original = _with_doi("urn:uuid:p1", "Paper One", "10.1/abc")
+        gm.add_json_ld(original)
+        extended = _with_experiment(original, "Another method")
+        extended["@id"] = "urn:uuid:p2"
+        extended["paperTitle"] = "Paper One (revised)"
+
+        assert gm.add_json_ld(extended, on_duplicate="merge") == {"urn:uuid:p2": "urn:uuid:p1"}
+
+        paper = URIRef("urn:uuid:p1")
+        assert len(list(gm.g.objects(paper, KG.hasExperiment))) == 2
+        assert [str(title) for title in gm.g.objects(paper, KG.paperTitle)] == ["Paper One"]
+        assert len(gm.g.get_context(URIRef("urn:uuid:p2"))) == 0
+        merged = len(gm.g)
+        # 取り込んだ論文・元の論文と同じ内容の論文（DOI なし）も重複として検出される
+        for data in (original, extended, sample_paper("urn:uuid:p3", "Paper One")):
+            assert gm.add_json_ld(data, on_duplicate="merge") != {}
+        assert len(gm.g) == merged
+
+    def test_pdf_hash_survives_reopen(self, tmp_path, backend):
+        """PDF のハッシュで登録済みの論文を抽出前に見つけられるテスト（再起動後も）"""
+        config = write_config(tmp_path, backend)
+        gm = GraphManager(config)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"), source_hash="abc123")
+        gm.compact()
+
+        reopened = GraphManager(config)
+        assert reopened.find_duplicate(source_hash="abc123") == "urn:uuid:p1"
+        assert reopened.find_duplicate(source_hash="other") is None
+        # LLM が内容を変えて抽出し直しても同じ PDF として検出される
+        duplicates = reopened.add_json_ld(
+            sample_paper("urn:uuid:p2", "Extracted Again"), on_duplicate="skip", source_hash="abc123"
+        )
+        assert duplicates == {"urn:uuid:p2": "urn:uuid:p1"}
+
+
+class TestImportDedup:
+    """ファイルのインポート時の重複処理のテスト"""
+
+    def test_reimport_ttl(self, tmp_path):
+        """エクスポートした Turtle（空白ノードの実験）の再インポートで重複しないテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        exported = tmp_path / "paper.ttl"
+        gm.export_paper("urn:uuid:p1", destination=str(exported))
+        before = len(gm.g)
+
+        assert gm.import_graph(str(exported)) == {"urn:uuid:p1": "urn:uuid:p1"}
+        assert len(gm.g) == before
+
+        (tmp_path / "dir").mkdir()
+        exported.rename(tmp_path / "dir" / exported.name)
+        report = gm.import_directory(str(tmp_path / "dir"), workers=1, on_duplicate="skip")
+        assert report["duplicates"] == {"urn:uuid:p1": "urn:uuid:p1"}
+        assert len(gm.g) == before
+
+    def test_invalid_policy(self, tmp_path):
+        """未知の方針で ValueError が送出されるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        with pytest.raises(ValueError, match="Unsupported duplicate policy"):
+            gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"), on_duplicate="ignore")
@@ -1,25 +1,15 @@
 import pytest
-import os
 from pathlib import Path
 from kgpaper.graph_manager import GraphManager
 from kgpaper.ontology import KG, PREFIXES
+from kgpaper.validation import ValidationError
+from helpers import sourced_paper, write_config
 
 
 @pytest.fixture
 def graph_manager(tmp_path):
     # Mock config to use tmp_path
-    config_path = tmp_path / "config.yaml"
-    graph_dir = tmp_path / "graphs"
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        f.write(
-            f"""
-storage:
-  graph_dir: "{str(graph_dir).replace(os.sep, '/')}"
-"""
-        )
-
-    return GraphManager(config_path=str(config_path))
+    return GraphManager(config_path=write_config(tmp_path))
 
 
 def test_add_json_ld(graph_manager):
@@ -32,6 +22,7 @@ def test_add_json_ld(graph_manager):
         "@id": "urn:uuid:123",
         "@type": "kg:Paper",
         "paperTitle": "Test Paper",
+        "kg:documentType": "main",
     }
 
     graph_manager.add_json_ld(data)
@@ -49,6 +40,26 @@ def test_add_json_ld(graph_manager):
     assert str(results[0].title) == "Test Paper"
 
 
+def test_add_json_ld_missing_required_properties(graph_manager):
+    """必須プロパティの欠けた JSON-LD が違反を全件報告して拒否されるテスト"""
+    data = {
+        "@context": {"kg": "http://example.org/kgpaper/"},
+        "@id": "urn:uuid:123",
+        "@type": "kg:Paper",
+        "kg:paperTitle": "Test Paper",
+        "kg:hasExperiment": {"@id": "urn:uuid:exp", "@type": "kg:Experiment"},
+    }
+
+    with pytest.raises(ValidationError) as exc_info:
+        graph_manager.add_json_ld(data)
+
+    assert {(str(v.subject), v.message) for v in exc_info.value.violations} == {
+        ("urn:uuid:123", "kg:Paper must have kg:documentType"),
+        ("urn:uuid:exp", "kg:Experiment must have kg:experimentType"),
+    }
+    assert len(graph_manager.g) == 0
+
+
 def test_delete_paper(graph_manager):
     # Add data
     data = {
@@ -60,6 +71,7 @@ def test_delete_paper(graph_manager):
         "@id": "urn:uuid:123",
         "@type": "kg:Paper",
         "paperTitle": "Test Paper",
+        "kg:documentType": "main",
     }
     graph_manager.add_json_ld(data)
 
@@ -79,6 +91,8 @@ def test_clear_all(graph_manager):
         "@context": {"kg": "http://example.org/kgpaper/"},
         "@id": "urn:uuid:123",
         "@type": "kg:Paper",
+        "kg:paperTitle": "Test Paper",
+        "kg:documentType": "main",
     }
     graph_manager.add_json_ld(data)
     assert len(graph_manager.g) > 0
@@ -91,7 +105,6 @@ def test_clear_all(graph_manager):
 
 def test_load_graph_with_existing_file(tmp_path):
     """既存のグラフファイルを読み込むテスト"""
-    config_path = tmp_path / "config.yaml"
     graph_dir = tmp_path / "graphs"
     graph_dir.mkdir()
 
@@ -107,15 +120,7 @@ def test_load_graph_with_existing_file(tmp_path):
         encoding="utf-8",
     )
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        f.write(
-            f"""
-storage:
-  graph_dir: "{str(graph_dir).replace(os.sep, '/')}"
-"""
-        )
-
-    gm = GraphManager(config_path=str(config_path))
+    gm = GraphManager(config_path=write_config(tmp_path))
 
     # 既存のトリプルがロードされていることを確認
     assert len(gm.g) > 0
@@ -123,7 +128,6 @@ storage:
 
 def test_load_graph_with_invalid_file(tmp_path, capsys):
     """不正なグラフファイルを読み込んだ際のエラーハンドリングテスト"""
-    config_path = tmp_path / "config.yaml"
     graph_dir = tmp_path / "graphs"
     graph_dir.mkdir()
 
@@ -131,17 +135,9 @@ def test_load_graph_with_invalid_file(tmp_path, capsys):
     graph_file = graph_dir / "knowledge_graph.ttl"
     graph_file.write_text("This is not valid turtle syntax @@@###", encoding="utf-8")
 
-    with open(config_path, "w", encoding="utf-8") as f:
-        f.write(
-            f"""
-storage:
-  graph_dir: "{str(graph_dir).replace(os.sep, '/')}"
-"""
-        )
-
     # エラーが発生して例外が送出されることを確認
     with pytest.raises(Exception):
-        GraphManager(config_path=str(config_path))
+        GraphManager(config_path=write_config(tmp_path))
 
 
 def test_import_graph_turtle(graph_manager, tmp_path):
@@ -244,6 +240,96 @@ def test_import_graph_error(graph_manager, tmp_path):
     assert "Failed to import graph" in str(exc_info.value)
 
 
+def _write_import_files(directory):
+    """import_directory 用に正常なファイル3件と不正なファイル2件を作る"""
+    nested = directory / "nested"
+    nested.mkdir(parents=True)
+    for i, folder in enumerate([directory, directory, nested]):
+        (folder / f"paper{i}.ttl").write_text(
+            f"""
+@prefix kg: <http://example.org/kgpaper/> .
+
+<urn:uuid:dir{i}> a kg:Paper ;
+    kg:paperTitle "Directory Paper {i}" ;
+    kg:documentType "main" ;
+    kg:hasExperiment [ a kg:Experiment ; kg:experimentType kg:Synthesis ] .
+""",
+            encoding="utf-8",
+        )
+    (directory / "broken.ttl").write_text("This is not valid RDF @@@", encoding="utf-8")
+    (directory / "missing.jsonld").write_text(
+        """{
+  "@context": {"kg": "http://example.org/kgpaper/"},
+  "@id": "urn:uuid:missing",
+  "@type": "kg:Paper",
+  "kg:paperTitle": "Missing Document Type"
+}""",
+        encoding="utf-8",
+    )
+    (directory / "notes.txt").write_text("ignored", encoding="utf-8")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_directory(graph_manager, tmp_path, workers):
+    """ディレクトリ一括インポートで失敗したファイルだけがスキップされるテスト"""
+    directory = tmp_path / "import"
+    _write_import_files(directory)
+
+    report = graph_manager.import_directory(str(directory), workers=workers)
+
+    assert len(report["imported"]) == 3
+    assert set(report["errors"]) == {
+        str(directory / "broken.ttl"),
+        str(directory / "missing.jsonld"),
+    }
+    assert "Failed to import graph" in report["errors"][str(directory / "broken.ttl")]
+    assert "documentType" in report["errors"][str(directory / "missing.jsonld")]
+
+    titles = {paper["title"] for paper in graph_manager.get_all_papers()}
+    assert titles == {f"Directory Paper {i}" for i in range(3)}
+    # 空白ノードの実験はファイルごとに別のノードになる
+    experiments = set(graph_manager.g.subjects(KG.experimentType, KG.Synthesis))
+    assert len(experiments) == 3
+
+
+def test_import_directory_single_commit(graph_manager, tmp_path, monkeypatch):
+    """ディレクトリ一括インポートが1回の変更として保存されるテスト"""
+    directory = tmp_path / "import"
+    _write_import_files(directory)
+    commits = []
+    original = graph_manager._commit
+    monkeypatch.setattr(
+        graph_manager, "_commit", lambda **kw: commits.append(1) or original(**kw)
+    )
+
+    graph_manager.import_directory(str(directory), workers=2)
+
+    assert len(commits) == 1
+
+
+def test_import_directory_spawns_workers(graph_manager, tmp_path, monkeypatch):
+    """ワーカーが spawn で起動され、既定の数が import_workers で制限されるテスト"""
+    from kgpaper import graph_manager as module
+
+    directory = tmp_path / "import"
+    _write_import_files(directory)
+    pools = []
+
+    class RecordingPool(module.ProcessPoolExecutor):
+        def __init__(self, max_workers, mp_context):
+            pools.append((max_workers, mp_context.get_start_method()))
+            super().__init__(max_workers=max_workers, mp_context=mp_context)
+
+    monkeypatch.setattr(module, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(module.os, "cpu_count", lambda: 64)
+    graph_manager.config.config.setdefault("storage", {})["import_workers"] = 2
+
+    report = graph_manager.import_directory(str(directory))
+
+    assert pools == [(2, "spawn")]
+    assert len(report["imported"]) == 3
+
+
 def test_get_all_papers(graph_manager):
     """論文一覧を取得するテスト"""
     data = {
@@ -312,6 +398,7 @@ def test_delete_paper_preserves_other_papers(graph_manager):
         "@id": "urn:uuid:paper-1",
         "@type": "kg:Paper",
         "paperTitle": "Paper One",
+        "kg:documentType": "main",
     }
     paper2 = {
         "@context": {
@@ -322,6 +409,7 @@ def test_delete_paper_preserves_other_papers(graph_manager):
         "@id": "urn:uuid:paper-2",
         "@type": "kg:Paper",
         "paperTitle": "Paper Two",
+        "kg:documentType": "main",
     }
     graph_manager.add_json_ld(paper1)
     graph_manager.add_json_ld(paper2)
@@ -462,3 +550,95 @@ def test_get_all_papers_without_document_type(graph_manager):
     assert len(papers) == 1
     assert papers[0]["title"] == "Paper Without Type"
     assert papers[0]["type"] == ""  # OPTIONALなので空文字列
+
+
+def test_paper_stored_in_named_graph(graph_manager):
+    """論文・実験・コンテンツが論文IRIの名前付きグラフに格納されるテスト"""
+    from rdflib import URIRef
+
+    graph_manager.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+
+    context = graph_manager.g.get_context(URIRef("urn:uuid:p1"))
+    assert len(context) == len(graph_manager.g)
+    assert len(graph_manager.g.default_graph) == 0
+
+
+def test_delete_paper_drops_named_graph(graph_manager):
+    """論文削除で名前付きグラフごと実験・コンテンツが消えるテスト"""
+    from rdflib import URIRef
+
+    graph_manager.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+    graph_manager.add_json_ld(sourced_paper("urn:uuid:p2", "Paper Two"))
+
+    graph_manager.delete_paper("urn:uuid:p1")
+
+    identifiers = {g.identifier for g in graph_manager.g.graphs()}
+    assert URIRef("urn:uuid:p1") not in identifiers
+    assert len(graph_manager.g) == len(graph_manager.g.get_context(URIRef("urn:uuid:p2")))
+
+
+def test_save_rewrites_only_changed_papers(graph_manager):
+    """保存時に変更のあった論文のファイルだけが書き直されるテスト"""
+    from rdflib import URIRef
+
+    graph_manager.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+    graph_manager.compact()
+    p1_file = graph_manager._paper_file(URIRef("urn:uuid:p1"))
+    p1_mtime = p1_file.stat().st_mtime_ns
+
+    graph_manager.add_json_ld(sourced_paper("urn:uuid:p2", "Paper Two"))
+    graph_manager.compact()
+
+    assert p1_file.stat().st_mtime_ns == p1_mtime
+    assert graph_manager._paper_file(URIRef("urn:uuid:p2")).exists()
+
+    graph_manager.delete_paper("urn:uuid:p1")
+    graph_manager.compact()
+    assert not p1_file.exists()
+
+
+def test_search_over_union_graph(graph_manager):
+    """名前付きグラフに分かれた論文をSparqlQueryで横断検索できるテスト"""
+    from kgpaper.sparql_query import SparqlQuery
+
+    graph_manager.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+    graph_manager.add_json_ld(sourced_paper("urn:uuid:p2", "Paper Two"))
+
+    results = SparqlQuery(graph_manager.g).search(experiment_type="kg:Synthesis")
+
+    assert {r["paper_title"] for r in results} == {"Paper One", "Paper Two"}
+    assert len(graph_manager.get_all_papers()) == 2
+
+
+def test_legacy_turtle_migrated_to_named_graphs(tmp_path):
+    """旧形式の単一Turtleが論文ごとの名前付きグラフへ移行されるテスト"""
+    from rdflib import URIRef
+
+    graph_dir = tmp_path / "graphs"
+    graph_dir.mkdir()
+    (graph_dir / "knowledge_graph.ttl").write_text(
+        """
+@prefix kg: <http://example.org/kgpaper/> .
+
+<urn:uuid:legacy> a kg:Paper ;
+    kg:paperTitle "Legacy Paper" ;
+    kg:documentType "main" ;
+    kg:hasExperiment [
+        a kg:Experiment ;
+        kg:experimentType kg:Synthesis ;
+        kg:hasContent [ a kg:Method ; kg:contentType "method" ; kg:text "t" ]
+    ] .
+""",
+        encoding="utf-8",
+    )
+    config_path = write_config(tmp_path)
+
+    gm = GraphManager(config_path=config_path)
+
+    assert len(gm.g.get_context(URIRef("urn:uuid:legacy"))) == 10
+    assert len(gm.g.default_graph) == 0
+    assert gm._paper_file(URIRef("urn:uuid:legacy")).exists()
+
+    reopened = GraphManager(config_path=config_path)
+    reopened.delete_paper("urn:uuid:legacy")
+    assert len(reopened.g) == 0
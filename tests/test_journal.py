@@ -0,0 +1,176 @@
+"""
+journal.py のテスト
+
+ChangeJournal の追記・再生と、GraphManager のジャーナル永続化を検証する。
+"""
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from kgpaper.graph_manager import GraphManager
+from kgpaper.journal import ChangeJournal
+from kgpaper.ontology import KG
+from helpers import sample_paper, write_config
+
+
+class TestChangeJournal:
+    """ChangeJournal 単体のテスト"""
+
+    def test_append_and_replay_preserves_bnode_labels(self, tmp_path):
+        """追記したバッチが順序どおり、空白ノードのラベルを保ったまま再生されるテスト"""
+        journal = ChangeJournal(tmp_path / "j.nq")
+        journal.reset("base")
+
+        paper = URIRef("urn:uuid:p1")
+        node = BNode("exp1")
+        added = [
+            (paper, KG.hasExperiment, node, paper),
+            (node, KG.text, Literal('multi\nline "quoted"', lang="ja"), paper),
+            (URIRef("urn:corpus"), KG.hasPaper, paper, DATASET_DEFAULT_GRAPH_ID),
+        ]
+        journal.append(added=added)
+        journal.append(removed=[added[1]], dropped=[paper])
+
+        batches = list(journal.replay())
+
+        assert len(batches) == 2
+        assert batches[0].removed == []
+        assert set(batches[0].added) == set(added)
+        assert batches[1].removed == [added[1]]
+        assert batches[1].dropped == [paper]
+        assert journal.base_id == "base"
+
+    def test_replay_truncates_uncommitted_tail(self, tmp_path):
+        """コミット行のない末尾バッチが無視され切り詰められるテスト"""
+        journal = ChangeJournal(tmp_path / "j.nq")
+        journal.reset("base")
+        journal.append(
+            added=[(URIRef("urn:a"), KG.paperTitle, Literal("A"), URIRef("urn:a"))]
+        )
+        committed_size = journal.size
+
+        with open(journal.path, "ab") as f:
+            f.write(b'#A\n<urn:b> <http://example.org/kgpaper/paperTitle> "B')
+
+        batches = list(journal.replay())
+
+        assert len(batches) == 1
+        assert journal.size == committed_size
+
+
+class TestGraphManagerJournal:
+    """GraphManager のジャーナル永続化のテスト"""
+
+    def test_add_appends_to_journal_without_snapshot_rewrite(self, tmp_path):
+        """追加がジャーナルへの追記のみで行われ、再起動時に再生されるテスト"""
+        config_path = write_config(tmp_path)
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+
+        assert not gm.graph_file.exists()
+        assert gm.journal.size > 0
+
+        reopened = GraphManager(config_path=config_path)
+        assert len(reopened.g) == len(gm.g)
+        assert reopened.get_all_papers()[0]["title"] == "Paper One"
+
+    def test_delete_journaled_paper_is_replayed(self, tmp_path):
+        """ジャーナル由来の空白ノードを持つ論文の削除が再生されるテスト"""
+        config_path = write_config(tmp_path)
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        gm.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+
+        reopened = GraphManager(config_path=config_path)
+        reopened.delete_paper("urn:uuid:p1")
+        assert not reopened.graph_file.exists()  # 全体の書き直しは発生しない
+
+        final = GraphManager(config_path=config_path)
+        assert [p["title"] for p in final.get_all_papers()] == ["Paper Two"]
+        assert len(final.g) == len(reopened.g)
+
+    def test_compact_folds_journal_into_snapshot(self, tmp_path):
+        """compact でスナップショットが書き出され、ジャーナルが空になるテスト"""
+        config_path = write_config(tmp_path)
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+
+        gm.compact()
+
+        assert gm.graph_file.exists()
+        assert list(gm.journal.replay()) == []
+        reopened = GraphManager(config_path=config_path)
+        assert len(reopened.g) == len(gm.g)
+
+    def test_delete_snapshot_paper_is_journaled(self, tmp_path):
+        """スナップショット由来の論文の削除もジャーナルへの追記で済むテスト"""
+        config_path = write_config(tmp_path)
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        gm.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+        gm.compact()
+        snapshot_id = gm._snapshot_id()
+
+        reopened = GraphManager(config_path=config_path)
+        reopened.delete_paper("urn:uuid:p1")
+        assert reopened._snapshot_id() == snapshot_id
+
+        final = GraphManager(config_path=config_path)
+        assert [p["title"] for p in final.get_all_papers()] == ["Paper Two"]
+        assert len(final.g) == len(reopened.g)
+
+    def test_delete_touching_turtle_bnode_falls_back_to_compaction(self, tmp_path):
+        """Turtle由来の空白ノードを削除する場合はスナップショットを書き直すテスト"""
+        config_path = write_config(tmp_path)
+        gm = GraphManager(config_path=config_path)
+        paper = sample_paper("urn:uuid:p1", "Paper One")
+        context = paper.pop("@context") | {"hasPaper": "kg:hasPaper"}
+        corpus = {"@context": context, "@type": "kg:PaperCorpus", "hasPaper": [paper]}
+        gm.add_json_ld(corpus)
+        gm.compact()
+        snapshot_id = gm._snapshot_id()
+
+        reopened = GraphManager(config_path=config_path)
+        reopened.delete_paper("urn:uuid:p1")
+        assert reopened._snapshot_id() != snapshot_id
+
+        final = GraphManager(config_path=config_path)
+        assert final.get_all_papers() == []
+        assert len(final.g) == len(reopened.g)
+
+    def test_auto_compaction_on_journal_size(self, tmp_path):
+        """ジャーナルが上限を超えると自動でコンパクションされるテスト"""
+        config_path = write_config(tmp_path, "  journal_max_bytes: 1")
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+
+        assert gm.graph_file.exists()
+        assert list(gm.journal.replay()) == []
+
+    def test_stale_journal_is_discarded(self, tmp_path):
+        """スナップショットが外部で置換された場合に古いジャーナルを破棄するテスト"""
+        config_path = write_config(tmp_path)
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+
+        gm.graph_file.write_text(
+            """
+@prefix kg: <http://example.org/kgpaper/> .
+
+<urn:uuid:other> a kg:Paper ;
+    kg:paperTitle "Replaced" ;
+    kg:documentType "main" .
+""",
+            encoding="utf-8",
+        )
+
+        reopened = GraphManager(config_path=config_path)
+        assert [p["title"] for p in reopened.get_all_papers()] == ["Replaced"]
+
+    def test_journal_disabled_saves_snapshot(self, tmp_path):
+        """journal: false の場合は従来どおり毎回スナップショットを書き出すテスト"""
+        config_path = write_config(tmp_path, "  journal: false")
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+
+        assert gm.graph_file.exists()
+        assert not gm.journal.path.exists()
@@ -0,0 +1,107 @@
+"""
+jsonld.py のテスト
+
+抽出プロンプトの @context の JSON-LD を直接トリプルにした結果が rdflib の汎用の
+JSON-LD パーサーと一致することと、扱えない JSON-LD で汎用のパーサーに切り替わることを検証する。
+"""
+
+import copy
+import json
+from pathlib import Path
+import pytest
+from rdflib import Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+from kgpaper.jsonld import JsonLdConverter, _Unsupported, parse_json_ld
+from kgpaper.ontology import KG
+from helpers import sample_paper, typed_paper
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _generic(data, public_id: str | None = None) -> Graph:
+    graph = Graph()
+    graph.parse(data=json.dumps(data), format="json-ld", publicID=public_id)
+    return graph
+
+
+def _with(data: dict, context: dict | None = None, **properties) -> dict:
+    data = copy.deepcopy(data)
+    data["@context"].update(context or {})
+    data.update(properties)
+    return data
+
+
+class TestDirectConversion:
+    """直接トリプルにする経路のテスト"""
+
+    @pytest.mark.parametrize(
+        "name", ["test.json", "test_multidata.json", "test_from_pdf.json"]
+    )
+    def test_sample_files(self, name):
+        """リポジトリのサンプルの JSON-LD が汎用のパーサーと同じグラフになるテスト"""
+        data = json.loads((ROOT / name).read_text(encoding="utf-8"))
+        graph = JsonLdConverter(data["@context"]).convert(data)
+        assert len(graph) > 0
+        assert isomorphic(graph, _generic(data))
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            sample_paper("urn:uuid:p1", "Paper One"),
+            typed_paper("http://example.org/paper#1", "Paper One", 3),
+            # @context にない項目（UI が追加する supportFile など）は捨てられる
+            _with(sample_paper("urn:uuid:p1", "P"), supportFile="support.pdf"),
+            # 絶対 IRI の項目・型、データ型の指定、文字列の配列
+            _with(
+                sample_paper("urn:uuid:p1", "P"),
+                {"published": {"@id": "kg:published", "@type": "xsd:date"},
+                 "xsd": "http://www.w3.org/2001/XMLSchema#"},
+                published="2024-01-01",
+                **{"http://purl.org/dc/terms/subject": ["a", "b"],
+                   "@type": ["kg:Paper", "http://schema.org/ScholarlyArticle"]},
+            ),
+        ],
+    )
+    def test_matches_generic_parser(self, data):
+        """テスト用の論文・項目の展開の規則が汎用のパーサーと一致するテスト"""
+        graph = JsonLdConverter(data["@context"]).convert(data)
+        assert isomorphic(graph, _generic(data))
+
+    def test_coerced_iri(self):
+        """"@type": "@id" の項目の値が IRI、それ以外が文字列リテラルになるテスト"""
+        graph = parse_json_ld(typed_paper("urn:uuid:p1", "Paper One"))
+        assert KG.Synthesis in set(graph.objects(None, KG.experimentType))
+        graph = parse_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        assert Literal("kg:Synthesis") in set(graph.objects(None, KG.experimentType))
+
+
+class TestFallback:
+    """汎用のパーサーへの切り替えのテスト"""
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            _with(sample_paper("urn:uuid:p1", "P"), {"@vocab": "http://example.org/vocab/"},
+                  supportFile="support.pdf"),
+            _with(sample_paper("urn:uuid:p1", "P"), {"@language": "ja"}),
+            _with(sample_paper("urn:uuid:p1", "P"), {"year": "kg:year"}, year=2024),
+            _with(sample_paper("urn:uuid:p1", "P"), paperTitle={"@value": "P", "@language": "en"}),
+            _with(sample_paper("urn:uuid:p1", "P"), **{"@id": "_:paper"}),
+        ],
+    )
+    def test_unsupported_falls_back(self, data):
+        """扱えない JSON-LD は汎用のパーサーで読み込まれるテスト"""
+        with pytest.raises(_Unsupported):
+            JsonLdConverter(data["@context"]).convert(data)
+        assert isomorphic(parse_json_ld(data), _generic(data))
+
+    def test_relative_iri_uses_public_id(self):
+        """相対 IRI は汎用のパーサーで public_id を基底として解決されるテスト"""
+        data = _with(sample_paper("urn:uuid:p1", "P"), **{"@id": "paper-1"})
+        graph = parse_json_ld(data, public_id="file:///data/papers.json")
+        assert set(graph.subjects(KG.paperTitle, None)) == {URIRef("file:///data/paper-1")}
+
+    def test_remote_context_falls_back(self):
+        """@context が辞書でない場合も汎用のパーサーに任せるテスト"""
+        with pytest.raises(_Unsupported):
+            JsonLdConverter(["http://example.org/context.jsonld"])
@@ -0,0 +1,147 @@
+"""
+locking.py のテスト
+
+FileLock と、同じ graph_dir を共有する複数の GraphManager の同期を検証する。
+"""
+
+import os
+import threading
+from kgpaper.graph_manager import GraphManager
+from kgpaper.locking import FileLock, read_version
+from helpers import sample_paper, write_config
+
+
+def _titles(gm: GraphManager) -> set:
+    return {paper["title"] for paper in gm.get_all_papers()}
+
+
+class TestFileLock:
+    """FileLock のテスト"""
+
+    def test_reentrant(self, tmp_path):
+        """同じインスタンスを入れ子で取得できるテスト"""
+        lock = FileLock(tmp_path / "test.lock")
+        with lock:
+            with lock:
+                assert lock._depth == 2
+            assert lock._fd is not None
+        assert lock._fd is None
+
+    def test_excludes_other_instances(self, tmp_path):
+        """別のインスタンス（別プロセス相当）は解放されるまで待たされるテスト"""
+        path = tmp_path / "test.lock"
+        first, second = FileLock(path), FileLock(path)
+        acquired = threading.Event()
+
+        def worker():
+            with second:
+                acquired.set()
+
+        with first:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            assert not acquired.wait(0.2)
+        thread.join(5)
+        assert acquired.is_set()
+
+
+class TestSharedGraph:
+    """同じ graph_dir を共有する GraphManager のテスト"""
+
+    def test_refresh_applies_journal_tail(self, tmp_path):
+        """他のインスタンスの書き込みがジャーナルの未適用部分から取り込まれるテスト"""
+        config = write_config(tmp_path)
+        a = GraphManager(config)
+        b = GraphManager(config)
+
+        b.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        assert read_version(b.version_file) == b.version
+
+        assert _titles(a) == {"Paper 1"}  # 読み取り時に refresh される
+        assert a.version == b.version
+        assert not a.refresh()
+
+    def test_refresh_after_compaction(self, tmp_path):
+        """他のインスタンスがコンパクションするとスナップショットから読み込み直すテスト"""
+        config = write_config(tmp_path)
+        a = GraphManager(config)
+        a.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        b = GraphManager(config)
+
+        b.delete_paper("http://example.org/paper1")
+        b.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+        b.compact()
+
+        assert a.refresh()
+        assert _titles(a) == {"Paper 2"}
+        assert a.check_ownership() == []
+
+    def test_compaction_with_same_timestamp(self, tmp_path):
+        """knowledge_graph.ttl の更新時刻が変わらないコンパクションも別の世代として扱うテスト"""
+        config = write_config(tmp_path)
+        a = GraphManager(config)
+        a.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        a.compact()
+        b = GraphManager(config)
+        b.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+        stat = a.graph_file.stat()
+
+        a.compact()
+        # 時刻の粒度が粗いファイルシステム・同じ時刻内のコンパクションを再現する
+        os.utime(a.graph_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        a.add_json_ld(sample_paper("http://example.org/paper3", "Paper 3"))
+
+        assert _titles(b) == {"Paper 1", "Paper 2", "Paper 3"}
+
+    def test_writes_are_not_lost(self, tmp_path):
+        """交互に書き込んでも互いの変更を上書きしないテスト"""
+        config = write_config(tmp_path)
+        a = GraphManager(config)
+        b = GraphManager(config)
+
+        a.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        b.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+        a.compact()
+        b.add_json_ld(sample_paper("http://example.org/paper3", "Paper 3"))
+        a.delete_paper("http://example.org/paper1")
+
+        expected = {"Paper 2", "Paper 3"}
+        assert _titles(a) == expected
+        assert _titles(b) == expected
+        assert _titles(GraphManager(config)) == expected
+
+    def test_concurrent_writers(self, tmp_path):
+        """複数のインスタンスが並行して書き込んでも全件が残るテスト"""
+        config = write_config(tmp_path)
+        managers = [GraphManager(config) for _ in range(3)]
+
+        def worker(index, gm):
+            for i in range(5):
+                gm.add_json_ld(sample_paper(f"http://example.org/p{index}-{i}", f"P{index}-{i}"))
+
+        threads = [
+            threading.Thread(target=worker, args=(index, gm))
+            for index, gm in enumerate(managers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expected = {f"P{index}-{i}" for index in range(3) for i in range(5)}
+        assert _titles(GraphManager(config)) == expected
+        for gm in managers:
+            assert _titles(gm) == expected
+        assert read_version(managers[0].version_file) == 15
+
+    def test_background_writer(self, tmp_path):
+        """バックグラウンド書き込みの保存時にも他のインスタンスの変更が取り込まれるテスト"""
+        a = GraphManager(write_config(tmp_path, "  background_write: true"))
+        b = GraphManager(write_config(tmp_path))
+
+        a.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        b.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+        a.close()
+
+        assert _titles(a) == {"Paper 1", "Paper 2"}
+        assert _titles(GraphManager(write_config(tmp_path))) == {"Paper 1", "Paper 2"}
@@ -0,0 +1,316 @@
+"""
+manifest.py のテスト
+
+論文の目録と、GraphManager の lazy_load（論文シャードの遅延読み込み）を検証する。
+"""
+
+import pytest
+import json
+from rdflib import URIRef
+from kgpaper.graph_manager import GraphManager
+from kgpaper.manifest import PaperManifest
+from helpers import typed_paper, write_config
+
+LAZY = "  lazy_load: true\n  max_loaded_papers: 2"
+
+
+def _populate(config_path: str, count: int = 3) -> GraphManager:
+    gm = GraphManager(config_path=config_path)
+    for i in range(count):
+        gm.add_json_ld(typed_paper(f"urn:uuid:p{i}", f"Paper {i}", experiments=i + 1))
+    gm.compact()
+    return gm
+
+
+class TestPaperManifest:
+    """論文の目録のテスト"""
+
+    def test_entry_summarizes_paper(self, tmp_path):
+        """目録にタイトル・DOI・実験数・コンテンツ数・シャードファイルが記録されるテスト"""
+        gm = _populate(write_config(tmp_path))
+
+        data = json.loads(gm.manifest.path.read_text(encoding="utf-8"))
+        entry = data["papers"]["urn:uuid:p2"]
+
+        assert data["base_id"] == gm._snapshot_id()
+        assert entry["title"] == "Paper 2"
+        assert entry["doi"] == "10.1234/paper-2"
+        assert entry["source"] == "Paper 2.pdf"
+        assert entry["experiments"] == 3
+        assert entry["contents"] == 6
+        assert (gm.graph_dir / entry["file"]) == gm._paper_file(URIRef("urn:uuid:p2"))
+
+    def test_stale_manifest_is_ignored(self, tmp_path):
+        """スナップショットと世代が異なる目録は読み込まないテスト"""
+        manifest = PaperManifest(tmp_path / "manifest.json")
+        manifest.entries = {"urn:uuid:p1": {"title": "A"}}
+        manifest.save("old")
+
+        reloaded = PaperManifest(tmp_path / "manifest.json")
+
+        assert not reloaded.load("new")
+        assert reloaded.load("old")
+        assert reloaded.entries == manifest.entries
+
+    def test_missing_manifest_is_rebuilt(self, tmp_path):
+        """目録がない場合は起動時に作り直されるテスト"""
+        config_path = write_config(tmp_path)
+        gm = _populate(config_path)
+        expected = gm.get_all_papers()
+        gm.manifest.path.unlink()
+
+        for extra in ("", LAZY):
+            reopened = GraphManager(config_path=write_config(tmp_path, extra))
+            assert sorted(reopened.get_all_papers(), key=lambda p: p["uri"]) == sorted(
+                expected, key=lambda p: p["uri"]
+            )
+        assert gm.manifest.path.exists()
+
+    def test_manifest_follows_journal(self, tmp_path):
+        """ジャーナルで記録した追加・削除が再起動後の論文一覧に反映されるテスト"""
+        config_path = write_config(tmp_path)
+        gm = _populate(config_path)
+        gm.delete_paper("urn:uuid:p0")
+        gm.add_json_ld(typed_paper("urn:uuid:p9", "Paper 9"))
+
+        reopened = GraphManager(config_path=config_path)
+
+        assert sorted(p["title"] for p in reopened.get_all_papers()) == [
+            "Paper 1",
+            "Paper 2",
+            "Paper 9",
+        ]
+
+
+class TestLazyLoad:
+    """storage.lazy_load のテスト"""
+
+    def test_get_all_papers_without_loading_shards(self, tmp_path, monkeypatch):
+        """論文一覧がシャードを読み込まずに目録から返されるテスト"""
+        _populate(write_config(tmp_path))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("paper shard should not be parsed")
+
+        monkeypatch.setattr("kgpaper.graph_manager.parse_nquads", fail)
+        gm = GraphManager(config_path=write_config(tmp_path, LAZY))
+
+        assert sorted(p["title"] for p in gm.get_all_papers()) == [
+            "Paper 0",
+            "Paper 1",
+            "Paper 2",
+        ]
+        assert gm.get_all_papers()[0]["source"].endswith(".pdf")
+
+    def test_search_matches_eager_load(self, tmp_path):
+        """シャードを分割して読み込んだ検索結果が全件読み込み時と一致するテスト"""
+        eager = _populate(write_config(tmp_path))
+        lazy = GraphManager(config_path=write_config(tmp_path, LAZY))
+
+        def key(rows):
+            return sorted((r["paper_title"], r["text"]) for r in rows)
+
+        assert key(lazy.search()) == key(eager.search())
+        assert key(lazy.search(content_type="result")) == key(
+            eager.search(content_type="result")
+        )
+        assert key(lazy.search(paper_title="paper 1")) == key(
+            eager.search(paper_title="paper 1")
+        )
+        assert len(lazy._loaded) <= 2
+
+    def test_evicts_least_recently_used_shards(self, tmp_path):
+        """読み込み済みシャードが上限を超えると古いものから解放されるテスト"""
+        _populate(write_config(tmp_path))
+        gm = GraphManager(config_path=write_config(tmp_path, LAZY))
+
+        gm.load_papers(["urn:uuid:p0", "urn:uuid:p1"])
+        gm.load_papers(["urn:uuid:p0"])
+        gm.load_papers(["urn:uuid:p2"])
+
+        assert list(gm._loaded) == [URIRef("urn:uuid:p0"), URIRef("urn:uuid:p2")]
+        assert len(gm.g.get_context(URIRef("urn:uuid:p1"))) == 0
+        assert len(gm.g.get_context(URIRef("urn:uuid:p0"))) > 0
+
+    def test_unsaved_shards_are_not_evicted(self, tmp_path):
+        """未保存の変更を持つシャードは上限を超えても解放されないテスト"""
+        config_path = write_config(tmp_path, LAZY)
+        gm = GraphManager(config_path=config_path)
+        for i in range(3):
+            gm.add_json_ld(typed_paper(f"urn:uuid:p{i}", f"Paper {i}"))
+
+        assert len(gm._loaded) == 3
+
+        gm.compact()
+        gm.load_papers(["urn:uuid:p0"])
+        assert len(gm._loaded) == 2
+
+    def test_update_unloaded_paper_keeps_existing_triples(self, tmp_path):
+        """未読み込みの論文への追加がシャードの既存内容を保ったまま保存されるテスト"""
+        eager = _populate(write_config(tmp_path))
+        before = len(eager.g.get_context(URIRef("urn:uuid:p0")))
+        gm = GraphManager(config_path=write_config(tmp_path, LAZY))
+
+        extra = typed_paper("urn:uuid:p0", "Paper 0")
+        extra["hasExperiment"][0]["hasContent"][0]["text"] = "Additional method"
+        gm.add_json_ld(extra)
+        gm.compact()
+
+        reopened = GraphManager(config_path=write_config(tmp_path))
+        assert len(reopened.g.get_context(URIRef("urn:uuid:p0"))) > before
+
+    def test_delete_and_clear_unloaded_papers(self, tmp_path):
+        """未読み込みの論文の削除・全削除でシャードファイルが消えるテスト"""
+        _populate(write_config(tmp_path))
+        gm = GraphManager(config_path=write_config(tmp_path, LAZY))
+
+        gm.delete_paper("urn:uuid:p0")
+        gm.compact()
+        assert not gm._paper_file(URIRef("urn:uuid:p0")).exists()
+        assert len(gm.get_all_papers()) == 2
+
+        gm.clear_all()
+        assert list(gm.paper_dir.glob("*.nq")) == []
+        assert GraphManager(config_path=write_config(tmp_path)).get_all_papers() == []
+
+    def test_binary_snapshot_is_not_written(self, tmp_path):
+        """一部の論文しか持たない状態でバイナリスナップショットを書き出さないテスト"""
+        _populate(write_config(tmp_path))
+        gm = GraphManager(config_path=write_config(tmp_path, LAZY))
+
+        gm.compact()
+
+        assert not gm.snapshot_file.exists()
+        eager = GraphManager(config_path=write_config(tmp_path))
+        assert len(eager.get_all_papers()) == 3
+
+
+class TestOwnershipIndex:
+    """論文 -> 所有する主語の索引のテスト"""
+
+    @pytest.mark.parametrize("extra", ["", LAZY, '  backend: "sqlite"'])
+    def test_owned_subjects_survive_reload(self, tmp_path, extra):
+        """所有する主語と逆引きが再起動後も同じになるテスト"""
+        config_path = write_config(tmp_path, extra)
+        gm = _populate(config_path)
+        owned = gm.owned_subjects("urn:uuid:p1")
+        if "sqlite" in extra:
+            gm.g.close()
+
+        reloaded = GraphManager(config_path=config_path)
+
+        assert len(owned) == 7  # 論文 + 実験2件 + コンテンツ4件
+        assert reloaded.owned_subjects("urn:uuid:p1") == owned
+        assert {reloaded.paper_of(subject) for subject in owned} == {URIRef("urn:uuid:p1")}
+        assert reloaded.paper_of(URIRef("urn:uuid:unknown")) is None
+        assert reloaded.check_ownership() == []
+
+    def test_delete_updates_index(self, tmp_path):
+        """論文の削除で索引から主語が外れるテスト"""
+        gm = _populate(write_config(tmp_path))
+        owned = gm.owned_subjects("urn:uuid:p1")
+
+        gm.delete_paper("urn:uuid:p1")
+
+        assert gm.owned_subjects("urn:uuid:p1") == set()
+        assert all(gm.paper_of(subject) is None for subject in owned)
+        assert gm.check_ownership() == []
+
+    def test_check_detects_inconsistency(self, tmp_path):
+        """索引とグラフの食い違いが検出されるテスト"""
+        gm = _populate(write_config(tmp_path))
+        entry = gm.manifest.entries["urn:uuid:p0"]
+        entry["subjects"] = entry["subjects"] + gm.manifest.entries["urn:uuid:p1"]["subjects"]
+
+        problems = gm.check_ownership()
+
+        assert any(p.startswith("urn:uuid:p0:") for p in problems)
+        assert any("両方に属しています" in p for p in problems)
+
+    def test_paper_stats_and_export(self, tmp_path):
+        """論文ごとの統計とエクスポートのテスト"""
+        gm = _populate(write_config(tmp_path, LAZY))
+
+        stats = gm.paper_stats("urn:uuid:p2")
+        exported = gm.export_paper("urn:uuid:p2", format="nt")
+
+        assert stats["title"] == "Paper 2"
+        assert stats["experiments"] == 3
+        assert stats["subjects"] == 10
+        assert len(exported.strip().splitlines()) == stats["triples"]
+        with pytest.raises(ValueError, match="Paper not found"):
+            gm.paper_stats("urn:uuid:unknown")
+
+
+class TestPaperCatalog:
+    """論文一覧（目録）の並べ替え・ページ分割のテスト"""
+
+    def _titles(self, papers: list[dict]) -> list[str]:
+        return [paper["title"] for paper in papers]
+
+    def test_sorted_pages(self, tmp_path):
+        """並べ替えた一覧をページ単位で取得できるテスト"""
+        gm = GraphManager(config_path=write_config(tmp_path))
+        for i, title in enumerate(["delta", "Alpha", "charlie", "Bravo", "echo"]):
+            gm.add_json_ld(typed_paper(f"urn:uuid:p{i}", title, experiments=i % 3 + 1))
+
+        assert gm.count_papers() == 5
+        assert self._titles(gm.get_all_papers(sort="title")) == [
+            "Alpha",
+            "Bravo",
+            "charlie",
+            "delta",
+            "echo",
+        ]
+        pages = [
+            gm.get_all_papers(sort="title", descending=True, offset=offset, limit=2)
+            for offset in range(0, 6, 2)
+        ]
+        assert [self._titles(page) for page in pages] == [
+            ["echo", "delta"],
+            ["charlie", "Bravo"],
+            ["Alpha"],
+        ]
+        by_experiments = gm.get_all_papers(sort="experiments", descending=True, limit=2)
+        assert [paper["experiments"] for paper in by_experiments] == [3, 2]
+        assert by_experiments[0]["contents"] == 6
+        assert by_experiments[0]["doi"] == "10.1234/charlie"
+        with pytest.raises(ValueError, match="Unsupported sort key"):
+            gm.get_all_papers(sort="year")
+
+    def test_order_follows_updates(self, tmp_path):
+        """並べ替え順が追加・削除・置き換えのたびに保守されるテスト"""
+        gm = _populate(write_config(tmp_path))
+        gm.get_all_papers(sort="title")  # 並べ替え順を作っておく
+        gm.get_all_papers(sort="contents")
+
+        gm.add_json_ld(typed_paper("urn:uuid:p9", "Another"))
+        gm.delete_paper("urn:uuid:p1")
+        gm.add_json_ld(typed_paper("urn:uuid:p0", "Zulu", experiments=5))
+
+        for sort in ("title", "contents"):
+            expected = sorted(
+                gm.manifest.papers(), key=lambda p: (p[sort], p["uri"])
+            )
+            assert gm.get_all_papers(sort=sort) == expected
+
+    def test_served_without_queries(self, tmp_path, monkeypatch):
+        """目録から返し、クエリを評価しないテスト"""
+        gm = _populate(write_config(tmp_path))
+        monkeypatch.setattr(
+            gm, "_query_papers", lambda graph: pytest.fail("query evaluated")
+        )
+
+        assert len(gm.get_all_papers(sort="title", limit=2)) == 2
+        assert gm.count_papers() == 3
+
+    def test_matches_sqlite_backend(self, tmp_path):
+        """目録の一覧が SQLite バックエンド（クエリ）の一覧と一致するテスト"""
+        results = {}
+        for backend in ("memory", "sqlite"):
+            (tmp_path / backend).mkdir()
+            gm = _populate(write_config(tmp_path / backend, f'  backend: "{backend}"'))
+            results[backend] = gm.get_all_papers(sort="uri")
+
+        assert results["memory"] == results["sqlite"]
+        assert [paper["contents"] for paper in results["sqlite"]] == [2, 4, 6]
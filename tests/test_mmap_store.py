@@ -0,0 +1,218 @@
+"""
+mmap_store.py のテスト
+
+mmap スナップショットの読み書き、MmapStore（スナップショット + メモリ上の差分）と、
+storage.backend: mmap の GraphManager を検証する。
+"""
+
+import pytest
+from rdflib import BNode, Dataset, Literal, URIRef
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.namespace import RDF, XSD
+from kgpaper.graph_manager import GraphManager
+from kgpaper.mmap_store import MmapStore, read_mmap_base_id, write_mmap_snapshot
+from kgpaper.ontology import KG
+from helpers import sample_paper, write_config
+
+MMAP = '  backend: "mmap"'
+G1, G2 = URIRef("urn:g1"), URIRef("urn:g2")
+A, B = URIRef("urn:a"), URIRef("urn:b")
+
+
+def _source() -> Dataset:
+    source = Dataset(default_union=True)
+    node = BNode("exp1")
+    source.addN(
+        [
+            (A, RDF.type, KG.Paper, G1),
+            (A, KG.paperTitle, Literal("A"), G1),
+            (A, KG.hasExperiment, node, G1),
+            (node, KG.text, Literal("日本語のテキスト", lang="ja"), G1),
+            (node, KG.extractedAt, Literal("2026-01-01", datatype=XSD.date), G1),
+            (B, RDF.type, KG.Paper, G2),
+            (B, KG.paperTitle, Literal("A"), G2),
+            (A, KG.paperTitle, Literal("A"), G2),
+            (URIRef("urn:corpus"), KG.hasPaper, A, DATASET_DEFAULT_GRAPH_ID),
+        ]
+    )
+    return source
+
+
+def _open(source: Dataset, path) -> Dataset:
+    write_mmap_snapshot(source, path, "base")
+    dataset = Dataset(store=MmapStore(), default_union=True)
+    dataset.store.open_snapshot(path)
+    return dataset
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    return _open(_source(), tmp_path / "test.mmap")
+
+
+def _quads(dataset: Dataset) -> set:
+    return set(dataset.quads((None, None, None, None)))
+
+
+class TestMmapSnapshot:
+    """スナップショットのみ（差分なし）の読み出しのテスト"""
+
+    def test_round_trip(self, dataset, tmp_path):
+        """全てのクワッドと語彙が復元されるテスト"""
+        assert _quads(dataset) == _quads(_source())
+        assert read_mmap_base_id(tmp_path / "test.mmap") == "base"
+        assert {graph.identifier for graph in dataset.graphs()} == {
+            G1,
+            G2,
+            DATASET_DEFAULT_GRAPH_ID,
+        }
+
+    def test_lookup_by_each_index(self, dataset):
+        """束縛された位置の組み合わせごとに正しく検索されるテスト"""
+        triples = set(_source().triples((None, None, None)))
+        for pattern in [
+            (A, None, None),
+            (A, RDF.type, None),
+            (None, RDF.type, KG.Paper),
+            (None, None, Literal("A")),
+            (None, None, Literal("2026-01-01")),  # 型が異なるリテラル
+            (URIRef("urn:missing"), None, None),
+            (None, None, None),
+        ]:
+            expected = {
+                t for t in triples if all(x is None or x == y for x, y in zip(pattern, t))
+            }
+            assert set(dataset.triples(pattern)) == expected, pattern
+
+    def test_union_yields_each_triple_once(self, dataset):
+        """複数グラフにある同一トリプルが和集合では1回だけ返るテスト"""
+        assert list(dataset.triples((A, KG.paperTitle, None))) == [
+            (A, KG.paperTitle, Literal("A"))
+        ]
+        assert len(dataset) == len(set(_source().triples((None, None, None))))
+        assert len(dataset.get_context(G1)) == 5
+
+    def test_truncated(self, tmp_path):
+        """途中で切れたファイルで ValueError が送出されるテスト"""
+        path = tmp_path / "test.mmap"
+        write_mmap_snapshot(_source(), path, "base")
+        path.write_bytes(path.read_bytes()[:100])
+        with pytest.raises(ValueError):
+            MmapStore().open_snapshot(path)
+
+
+class TestMmapStoreOverlay:
+    """スナップショットに重ねた差分のテスト"""
+
+    def test_matches_memory_store(self, dataset):
+        """追加・削除・グラフ削除・再追加の結果が既定のストアと一致するテスト"""
+        expected = _source()
+        for target in (dataset, expected):
+            target.remove((A, KG.paperTitle, None, G1))
+            target.add((A, KG.paperTitle, Literal("A2"), G1))
+            target.add((B, RDF.type, KG.Paper, G2))  # スナップショットに既にある
+            target.remove_graph(G2)
+            target.add((B, KG.paperTitle, Literal("B"), G2))
+            target.add((A, KG.paperTitle, Literal("A"), G1))  # 削除したものを戻す
+            target.add((URIRef("urn:new"), RDF.type, KG.Paper, URIRef("urn:g3")))
+
+        assert _quads(dataset) == _quads(expected)
+        assert len(dataset) == len(expected)
+        for graph in (G1, G2, URIRef("urn:g3")):
+            assert len(dataset.get_context(graph)) == len(expected.get_context(graph))
+        assert set(dataset.subjects(RDF.type, KG.Paper)) == {A, URIRef("urn:new")}
+
+    def test_reopen_discards_overlay(self, dataset, tmp_path):
+        """開き直すと差分が捨てられ、書き出した内容だけが残るテスト"""
+        dataset.add((A, KG.paperTitle, Literal("A2"), G1))
+        dataset.remove_graph(G2)
+        expected = _quads(dataset)
+
+        previous = dataset.store.snapshot
+        path = tmp_path / "next.mmap"
+        write_mmap_snapshot(dataset, path, "next")
+        dataset.store.open_snapshot(path)
+
+        assert _quads(dataset) == expected
+        assert dataset.store._removed == set()
+        assert previous._mmap.closed
+
+
+class TestGraphManagerMmapBackend:
+    """storage.backend: mmap の GraphManager のテスト"""
+
+    def test_add_delete_and_reopen(self, tmp_path):
+        """変更がジャーナル経由で永続化され、再起動後に復元されるテスト"""
+        config = write_config(tmp_path, MMAP)
+        gm = GraphManager(config)
+        assert isinstance(gm.g.store, MmapStore)
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        gm.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+        gm.delete_paper("http://example.org/paper1")
+
+        reopened = GraphManager(config)
+        assert [p["title"] for p in reopened.get_all_papers()] == ["Paper 2"]
+        assert _quads(reopened.g) == _quads(gm.g)
+
+    def test_compact_publishes_snapshot(self, tmp_path):
+        """コンパクションで新しい mmap スナップショットが公開されるテスト"""
+        config = write_config(tmp_path, MMAP)
+        gm = GraphManager(config)
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        before = gm.mmap_file
+        previous = gm.g.store.snapshot
+        gm.compact()
+
+        # mmap 中のファイルを置換せず、世代ごとの新しいファイルで公開する
+        assert gm.mmap_file != before
+        assert [path.name for path in tmp_path.glob("graphs/*.mmap")] == [gm.mmap_file.name]
+        assert read_mmap_base_id(gm.mmap_file) == gm._snapshot_id()
+        assert previous._mmap.closed  # 前のマッピングは閉じられた
+        assert gm.g.store._added.__len__() == 0  # 差分はスナップショットに含まれた
+
+        reader = GraphManager(config)
+        assert _quads(reader.g) == _quads(gm.g)
+
+    def test_reader_follows_writer(self, tmp_path):
+        """他のプロセスの追記とコンパクションが読み取り側に反映されるテスト"""
+        config = write_config(tmp_path, MMAP)
+        writer = GraphManager(config)
+        reader = GraphManager(config)
+
+        writer.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        assert [row["paper_title"] for row in reader.search()] == ["Paper 1"]
+
+        writer.compact()
+        writer.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+        assert {row["paper_title"] for row in reader.search()} == {"Paper 1", "Paper 2"}
+        assert _quads(reader.g) == _quads(writer.g)
+
+    def test_search_matches_memory_backend(self, tmp_path):
+        """SparqlQuery.search の結果がメモリバックエンドと一致するテスト"""
+        results = {}
+        for backend in ("memory", "mmap"):
+            backend_dir = tmp_path / backend
+            backend_dir.mkdir()
+            gm = GraphManager(write_config(backend_dir, f'  backend: "{backend}"'))
+            gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+            gm.compact()
+            gm.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+            results[backend] = sorted(
+                gm.search(paper_title="paper"), key=lambda row: row["paper_title"]
+            )
+            for row in results[backend]:
+                row.pop("content_uri")
+                row.pop("experiment_uri", None)
+
+        assert results["mmap"] == results["memory"]
+        assert len(results["mmap"]) == 2
+
+    def test_stale_snapshot_is_rebuilt(self, tmp_path):
+        """テキスト形式より古い mmap スナップショットは作り直されるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        gm.compact()
+
+        mmap_gm = GraphManager(write_config(tmp_path, MMAP))
+        assert read_mmap_base_id(mmap_gm.mmap_file) == mmap_gm._snapshot_id()
+        assert _quads(mmap_gm.g) == _quads(gm.g)
@@ -0,0 +1,139 @@
+"""
+result_cache.py のテスト
+
+検索結果のキャッシュの LRU・推定メモリ使用量による追い出しと同時計算の共有、
+検索条件の正規化（search_key）、GraphManager.search のグラフの版による無効化を検証する。
+"""
+
+import threading
+import time
+import pytest
+from kgpaper.graph_manager import GraphManager
+from kgpaper.result_cache import ResultCache, estimate_size
+from kgpaper.sparql_query import search_key
+from helpers import sample_paper, write_config
+
+
+class TestResultCache:
+    """ResultCache のテスト"""
+
+    def test_lru_eviction(self):
+        """件数の上限を超えると最近使われていないものから捨てられるテスト"""
+        cache = ResultCache(max_entries=2)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        assert cache.get("a") == [1]  # a を最近使ったものにする
+        cache.put("c", [3])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == [1] and cache.get("c") == [3]
+        assert len(cache) == 2
+
+    def test_byte_limit(self):
+        """推定メモリ使用量の上限を超えると捨てられ、1件で上限を超える結果は保持しないテスト"""
+        small = [{"text": "x" * 100}]
+        size = estimate_size(small)
+        cache = ResultCache(max_bytes=size * 2)
+        cache.put("a", small)
+        cache.put("b", [{"text": "y" * 100}])
+        cache.put("c", [{"text": "z" * 100}])
+
+        assert cache.get("a") is None
+        assert cache.nbytes <= size * 2
+        cache.put("huge", [{"text": "x" * size * 3}])
+        assert cache.get("huge") is None
+        cache.configure(max_entries=1, max_bytes=size * 2)
+        assert len(cache) == 1
+
+    def test_single_flight(self):
+        """同じキーを同時に計算すると1回だけ計算して結果を共有するテスト"""
+        cache = ResultCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return ["result"]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [["result"]] * 4
+        assert cache.misses == 1 and cache.hits == 3
+
+    def test_failed_compute(self):
+        """計算が失敗した場合は保持せず、次の呼び出しで計算し直すテスト"""
+        cache = ResultCache()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("k", fail)
+        assert cache.get_or_compute("k", lambda: [1]) == [1]
+
+
+class TestSearchKey:
+    """検索条件の正規化のテスト"""
+
+    def test_equivalent_filters(self):
+        """条件にならない値（None・空文字・"All"）が除かれ、同じ条件が同じキーになるテスト"""
+        assert search_key() == search_key(
+            source_context="All", experiment_type="All", content_type="All", text_query=""
+        )
+        assert search_key(content_type="method", paper_title="A") == (
+            ("content_type", "method"),
+            ("paper_title", "A"),
+        )
+        # paper_title の "All" はタイトルの部分一致の条件
+        assert search_key(paper_title="All") == (("paper_title", "All"),)
+
+
+@pytest.mark.parametrize("extra", ["", '  backend: "sqlite"'])
+class TestGraphManagerSearchCache:
+    """GraphManager.search の結果のキャッシュのテスト"""
+
+    def test_reuse_and_invalidate(self, tmp_path, extra, monkeypatch):
+        """同じ条件の検索は再利用され、追加・削除で版が進むと検索し直すテスト"""
+        gm = GraphManager(write_config(tmp_path, extra))
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        calls = []
+        search = gm._search
+        monkeypatch.setattr(gm, "_search", lambda **f: calls.append(f) or search(**f))
+
+        first = gm.search(content_type="method")
+        assert gm.search(content_type="method", source_context="All") is first
+        assert len(calls) == 1
+
+        gm.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+        assert {row["paper_uri"] for row in gm.search(content_type="method")} == {
+            "urn:uuid:p1",
+            "urn:uuid:p2",
+        }
+        gm.delete_paper("urn:uuid:p1")
+        assert {row["paper_uri"] for row in gm.search(content_type="method")} == {
+            "urn:uuid:p2"
+        }
+        assert len(calls) == 3
+
+    def test_other_process_changes(self, tmp_path, extra):
+        """別のプロセス（インスタンス）の変更で版が進み、古い結果が返らないテスト"""
+        config = write_config(tmp_path, extra)
+        gm = GraphManager(config)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        assert len(gm.search()) == 1
+
+        other = GraphManager(config)
+        other.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+        other.flush()
+
+        assert {row["paper_uri"] for row in gm.search()} == {"urn:uuid:p1", "urn:uuid:p2"}
+        assert gm.result_cache is other.result_cache
@@ -0,0 +1,265 @@
+"""
+search_index.py のテスト
+
+search 専用の索引（SearchIndex）が SPARQL と同じ結果を返すこと（等価性）、値が複数ある
+データでの SPARQL へのフォールバック、変更の差分更新、GraphManager での利用を検証する。
+"""
+
+import json
+from itertools import product
+import pytest
+from rdflib import Graph, Literal, URIRef
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG, PREFIXES
+from kgpaper.search_index import SearchIndex
+from kgpaper.sparql_query import SparqlQuery
+from helpers import sample_paper, write_config
+
+DATA = """
+@prefix kg: <http://example.org/kgpaper/> .
+
+<urn:uuid:p1> a kg:Paper ;
+    kg:paperTitle "Solid Electrolyte Paper" ;
+    kg:hasExperiment <urn:uuid:e1>, <urn:uuid:e2> .
+<urn:uuid:e1> kg:experimentType kg:Synthesis ;
+    kg:hasContent <urn:uuid:c1>, <urn:uuid:c2> .
+<urn:uuid:c1> kg:contentType "method" ; kg:text "Solid-state route." ;
+    kg:sourceContext "Main", "Support" .
+<urn:uuid:c2> kg:contentType "result" ; kg:text "Single phase." .
+<urn:uuid:e2> kg:experimentType "kg:Characterization" ;
+    kg:hasContent <urn:uuid:c3> .
+<urn:uuid:c3> kg:contentType "result" ; kg:text "XRD pattern." ;
+    kg:sourceContext "Main"@en .
+
+<urn:uuid:p2> a kg:Paper ;
+    kg:paperTitle "Battery paper"@en ;
+    kg:hasExperiment [
+        kg:experimentType <http://example.org/kgpaper/Electrochemical> ;
+        kg:hasContent [ kg:contentType "method" ; kg:text "Cyclic voltammetry." ;
+                        kg:sourceContext "Support" ]
+    ] .
+
+# タイトルのない論文・論文でない主語・本文のないコンテンツは結果に現れない
+<urn:uuid:p3> a kg:Paper ;
+    kg:hasExperiment <urn:uuid:e3> .
+<urn:uuid:e3> kg:experimentType kg:Synthesis ; kg:hasContent <urn:uuid:c4> .
+<urn:uuid:c4> kg:contentType "method" ; kg:text "Untitled." .
+<urn:uuid:x1> kg:paperTitle "Not a paper" ; kg:hasExperiment <urn:uuid:e1> .
+<urn:uuid:c5> kg:contentType "method" .
+<urn:uuid:e1> kg:hasContent <urn:uuid:c5> .
+"""
+
+# 条件の組み合わせ（product で全組を評価する）
+TITLES = [None, "paper", "SOLID", "All"]
+SOURCES = ["All", "Main", "ai", "Other"]
+EXPERIMENT_TYPES = [
+    None,
+    "kg:Synthesis",
+    "kg:Characterization",
+    "<http://example.org/kgpaper/Electrochemical>",
+    "Synthesis",
+]
+CONTENT_TYPES = [None, "result", "Method"]
+
+
+def _graph(data: str = DATA) -> Graph:
+    graph = Graph()
+    for prefix, namespace in PREFIXES.items():
+        graph.bind(prefix, namespace)
+    graph.parse(data=data, format="turtle")
+    return graph
+
+
+def _sorted(rows: list[dict]) -> list[dict]:
+    return sorted(rows, key=lambda row: row["content_uri"])
+
+
+def _assert_equivalent(graph: Graph, index: SearchIndex):
+    """すべての条件の組で索引と SPARQL の結果が一致することを確かめる"""
+    sparql = SparqlQuery(graph)
+    for title, source, experiment_type, content_type in product(
+        TITLES, SOURCES, EXPERIMENT_TYPES, CONTENT_TYPES
+    ):
+        filters = {
+            "paper_title": title,
+            "source_context": source,
+            "experiment_type": experiment_type,
+            "content_type": content_type,
+        }
+        assert _sorted(index.search(**filters)) == _sorted(sparql.search(**filters)), filters
+
+
+class TestEquivalence:
+    """SPARQL との等価性のテスト"""
+
+    def test_all_filter_combinations(self):
+        """URI・リテラルの実験タイプ、言語タグ付きの値、結果に現れないデータを含めて一致するテスト"""
+        graph = _graph()
+        index = SearchIndex.build(graph)
+
+        assert index.supported()
+        assert len(index.records) == 4
+        _assert_equivalent(graph, index)
+
+    def test_row_order(self):
+        """行が (論文, コンテンツ) の順で、SparqlQuery が索引の結果を返すテスト"""
+        graph = _graph()
+        query = SparqlQuery(graph, search_index=SearchIndex.build(graph))
+
+        rows = query.search(content_type="method")
+        assert rows == sorted(rows, key=lambda row: (row["paper_uri"], row["content_uri"]))
+        assert list(query.iter_search(content_type="method")) == rows
+        page, cursor = query.search_page(limit=1, content_type="method")
+        assert page == rows[:1]
+        assert query.search_page(limit=5, cursor=cursor, content_type="method")[0] == rows[1:]
+
+    def test_iter_search_resumes_from_cursor(self, monkeypatch):
+        """iter_search がカーソルより後の行だけを作って返すテスト"""
+        graph = _graph()
+        index = SearchIndex.build(graph)
+        rows = index.search()
+        built = []
+        original = index._row
+        monkeypatch.setattr(index, "_row", lambda *args: built.append(1) or original(*args))
+
+        cursor = json.dumps([rows[1]["paper_uri"], rows[1]["content_uri"]])
+        assert next(index.iter_search(cursor=cursor)) == rows[2]
+        assert len(built) == 1
+
+    def test_source_context_aggregation(self):
+        """sourceContext の条件を指定すると一致した値だけが集約されるテスト"""
+        index = SearchIndex.build(_graph())
+
+        [row] = index.search(source_context="Supp", content_type="method", paper_title="solid")
+        assert row["source_context"] == "Support"
+        [row] = index.search(content_type="method", paper_title="solid")
+        assert row["source_context"] == "Main, Support"
+
+
+class TestFallback:
+    """値が複数あるデータでの SPARQL へのフォールバックのテスト"""
+
+    @pytest.mark.parametrize(
+        "extra",
+        [
+            '<urn:uuid:p1> kg:paperTitle "Second title" .',
+            '<urn:uuid:c1> kg:text "Another text." .',
+            '<urn:uuid:c2> kg:contentType "discussion" .',
+            '<urn:uuid:e1> kg:experimentType kg:Other .',
+            '<urn:uuid:p2> kg:hasExperiment <urn:uuid:e1> .',
+            '<urn:uuid:c2> kg:contentType "result"@en .',
+            '<urn:uuid:c3> kg:sourceContext 1 .',
+        ],
+    )
+    def test_irregular_data(self, extra):
+        """経路・値が複数あるコンテンツがあると索引を使わず、SPARQL と同じ結果になるテスト"""
+        graph = _graph(DATA + "\n@prefix kg: <http://example.org/kgpaper/> .\n" + extra)
+        index = SearchIndex.build(graph)
+        query = SparqlQuery(graph, search_index=index)
+
+        assert not index.supported()
+        assert _sorted(query.search()) == _sorted(SparqlQuery(graph).search())
+
+
+class TestUpdate:
+    """変更の差分更新のテスト"""
+
+    def test_incremental_matches_rebuild(self):
+        """追加・削除したクワッドのノードから更新した索引が作り直したものと一致するテスト"""
+        graph = _graph()
+        index = SearchIndex.build(graph)
+        p1, e1, c1, c2 = (URIRef(f"urn:uuid:{name}") for name in ("p1", "e1", "c1", "c2"))
+        changes = [
+            # (削除するトリプル, 追加するトリプル)
+            ([(p1, KG.paperTitle, Literal("Solid Electrolyte Paper"))],
+             [(p1, KG.paperTitle, Literal("Renamed"))]),
+            ([(e1, KG.hasContent, c2)], []),
+            ([], [(e1, KG.hasContent, c2), (c2, KG.sourceContext, Literal("Main"))]),
+            ([(c1, KG.contentType, Literal("method"))],
+             [(c1, KG.contentType, Literal("discussion"))]),
+            ([], [(c1, KG.text, Literal("Second text"))]),  # irregular になる
+            ([(c1, KG.text, Literal("Second text"))], []),  # 元に戻る
+            (list(graph.triples((p1, None, None))), []),
+        ]
+        for removed, added in changes:
+            for triple in removed:
+                graph.remove(triple)
+            for triple in added:
+                graph.add(triple)
+            index.update(graph, {node for s, _, o in removed + added for node in (s, o)})
+
+            rebuilt = SearchIndex.build(graph)
+            assert index.records == rebuilt.records
+            assert index.irregular == rebuilt.irregular
+        assert index.supported()
+        assert not index.search(paper_title="renamed")
+        _assert_equivalent(graph, index)
+
+
+def _native(tmp_path, extra: str = "") -> str:
+    """search.native_index を有効にした設定ファイル"""
+    config = write_config(tmp_path, extra)
+    with open(config, "a", encoding="utf-8") as f:
+        f.write("search:\n  native_index: true\n")
+    return config
+
+
+@pytest.mark.parametrize("extra", ["", '  backend: "sqlite"'])
+class TestGraphManagerNativeSearch:
+    """GraphManager の search 専用の索引のテスト"""
+
+    def test_add_delete_and_reopen(self, tmp_path, extra):
+        """追加・置換・削除・再起動後も SPARQL と同じ結果を返すテスト"""
+        config = _native(tmp_path, extra)
+        gm = GraphManager(config)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        assert len(gm.search()) == 1  # 索引を作る
+        gm.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+        gm.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"), on_duplicate="replace")
+        gm.add_json_ld(sample_paper("urn:uuid:p3", "Paper Three"))
+        gm.delete_paper("urn:uuid:p1")
+
+        assert gm.search_index.supported()
+        assert len(gm.search_index.records) == len(SparqlQuery(gm.g).search())
+        expected = _sorted(SparqlQuery(gm.g).search(content_type="method"))
+        assert _sorted(gm.search(content_type="method")) == expected
+        assert {row["paper_uri"] for row in expected} == {"urn:uuid:p2", "urn:uuid:p3"}
+        gm.flush()
+
+        reopened = GraphManager(config)
+        assert _sorted(reopened.search(content_type="method")) == expected
+
+    def test_other_process_changes(self, tmp_path, extra):
+        """別のプロセス（インスタンス）の変更も索引に反映されるテスト"""
+        config = _native(tmp_path, extra)
+        gm = GraphManager(config)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        assert len(gm.search()) == 1
+
+        other = GraphManager(config)
+        other.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+        other.flush()
+
+        assert {row["paper_uri"] for row in gm.search()} == {"urn:uuid:p1", "urn:uuid:p2"}
+
+    def test_page_builds_index(self, tmp_path, extra):
+        """search_page（Explore）の初回で索引を作り、以降のページも索引から返すテスト"""
+        gm = GraphManager(_native(tmp_path, extra))
+        for i in range(3):
+            gm.add_json_ld(sample_paper(f"urn:uuid:p{i}", f"Paper {i}"))
+        expected = _sorted(SparqlQuery(gm.g).search())
+
+        rows, cursor = gm.search_page(limit=2)
+        assert gm.search_index.records
+        assert gm._search_index_version is not None
+        more, cursor = gm.search_page(limit=2, cursor=cursor)
+        assert cursor is None
+        assert rows + more == expected
+
+    def test_disabled_by_default(self, tmp_path, extra):
+        """search.native_index を指定しない場合は索引を作らないテスト"""
+        gm = GraphManager(write_config(tmp_path, extra))
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+
+        assert len(gm.search()) == 1
+        assert not gm.search_index.records
@@ -0,0 +1,129 @@
+"""
+skolem.py のテスト
+
+実験・コンテンツの空白ノードの決定的な IRI への置き換えと、GraphManager の取り込み時の
+置き換え・既存のグラフの移行を検証する。
+"""
+
+import copy
+import json
+import pytest
+from rdflib import BNode, Graph, URIRef
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+from kgpaper.skolem import skolem_map, skolemize_quads
+from helpers import sample_paper, write_config
+
+NO_SKOLEM = "  skolemize: false"
+
+
+def _quads(data: dict) -> list:
+    graph = Graph().parse(data=json.dumps(data), format="json-ld")
+    return [(s, p, o, URIRef("urn:g")) for s, p, o in graph]
+
+
+def _bnodes(gm: GraphManager) -> set:
+    return {
+        term
+        for quad in gm.g.quads((None, None, None, None))
+        for term in quad[:3]
+        if isinstance(term, BNode)
+    }
+
+
+class TestSkolemMap:
+    """空白ノード -> IRI の対応のテスト"""
+
+    def test_deterministic(self):
+        """同じ論文を別々にパースしても同じ IRI になるテスト"""
+        first = set(skolemize_quads(_quads(sample_paper("urn:uuid:p1", "Paper One"))))
+        second = set(skolemize_quads(_quads(sample_paper("urn:uuid:p1", "Paper One"))))
+
+        assert first == second
+        assert not any(isinstance(term, BNode) for quad in first for term in quad)
+        experiment = next(o for s, p, o, _ in first if p == KG.hasExperiment)
+        content = next(o for s, p, o, _ in first if p == KG.hasContent)
+        assert experiment.startswith("urn:uuid:p1#experiment-")
+        assert content.startswith(f"{experiment}-content-")
+
+    def test_identical_siblings_are_numbered(self):
+        """同じ内容の実験が番号で区別されるテスト"""
+        data = sample_paper("http://example.org/paper#1", "Paper One")
+        data["hasExperiment"].append(copy.deepcopy(data["hasExperiment"][0]))
+
+        experiments = sorted(
+            o for s, p, o, _ in skolemize_quads(_quads(data)) if p == KG.hasExperiment
+        )
+
+        assert len(experiments) == 2
+        assert experiments[0] + "-1" == experiments[1]
+        assert experiments[0].startswith("http://example.org/paper#1-experiment-")
+
+    def test_unchanged_experiments_keep_iris(self):
+        """抽出し直して実験が増えても、変わらない実験の IRI は同じままであるテスト"""
+        original = sample_paper("urn:uuid:p1", "Paper One")
+        extended = copy.deepcopy(original)
+        extended["hasExperiment"].append(copy.deepcopy(original["hasExperiment"][0]))
+        extended["hasExperiment"][1]["hasContent"][0]["text"] = "Another method"
+
+        before = set(skolemize_quads(_quads(original)))
+        after = set(skolemize_quads(_quads(extended)))
+
+        assert before < after
+
+    def test_blank_paper_is_kept(self):
+        """論文が空白ノードの場合は置き換えないテスト"""
+        graph = Graph().parse(
+            data=json.dumps({k: v for k, v in sample_paper("x", "P").items() if k != "@id"}),
+            format="json-ld",
+        )
+        assert skolem_map(graph) == {}
+
+
+class TestGraphManagerSkolem:
+    """GraphManager の取り込み時の置き換えと移行のテスト"""
+
+    def test_ingest(self, tmp_path):
+        """取り込んだ論文に空白ノードが残らず、再登録で重複しないテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        before = set(gm.g.quads((None, None, None, None)))
+
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"), on_duplicate="replace")
+
+        assert _bnodes(gm) == set()
+        assert set(gm.g.quads((None, None, None, None))) == before
+
+    def test_disabled(self, tmp_path):
+        """skolemize: false では空白ノードのまま取り込むテスト"""
+        gm = GraphManager(write_config(tmp_path, NO_SKOLEM))
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        assert len(_bnodes(gm)) == 2
+
+    @pytest.mark.parametrize(
+        "extra", ["", "  lazy_load: true\n  max_loaded_papers: 1", '  backend: "sqlite"']
+    )
+    def test_migrate_existing(self, tmp_path, extra):
+        """既存のグラフの移行結果が取り込み時の置き換えと一致し、再起動後も残るテスト"""
+        legacy = GraphManager(write_config(tmp_path, f"{extra}\n{NO_SKOLEM}"))
+        for i in range(3):
+            legacy.add_json_ld(sample_paper(f"urn:uuid:p{i}", f"Paper {i}"))
+        legacy.compact()
+        del legacy
+
+        gm = GraphManager(write_config(tmp_path, extra))
+        assert gm.skolemize_existing() == 6
+        assert gm.skolemize_existing() == 0
+
+        (tmp_path / "fresh").mkdir()
+        fresh = GraphManager(write_config(tmp_path / "fresh"))
+        for i in range(3):
+            fresh.add_json_ld(sample_paper(f"urn:uuid:p{i}", f"Paper {i}"))
+
+        reopened = GraphManager(write_config(tmp_path, extra))
+        for i in range(3):
+            paper = URIRef(f"urn:uuid:p{i}")
+            if reopened.lazy:
+                reopened.load_papers([paper])
+            assert set(reopened.g.get_context(paper)) == set(fresh.g.get_context(paper))
+        assert reopened.check_ownership() == []
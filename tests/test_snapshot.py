@@ -0,0 +1,138 @@
+"""
+snapshot.py のテスト
+
+バイナリスナップショットの書き出し・読み込みと、GraphManager の高速起動を検証する。
+"""
+
+import pytest
+from rdflib import BNode, Dataset, Literal, URIRef
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.namespace import XSD
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+from kgpaper.snapshot import (
+    load_binary_snapshot,
+    read_snapshot_base_id,
+    write_binary_snapshot,
+)
+from helpers import sample_paper, write_config
+
+
+def _sample_quads() -> list:
+    paper = URIRef("urn:uuid:p1")
+    node = BNode("exp1")
+    return [
+        (paper, KG.paperTitle, Literal("論文タイトル 🧪", lang="ja"), paper),
+        (paper, KG.hasExperiment, node, paper),
+        (node, KG.text, Literal('multi\nline "quoted"'), paper),
+        (node, KG.year, Literal(2024, datatype=XSD.integer), paper),
+        (URIRef("urn:corpus"), KG.hasPaper, paper, DATASET_DEFAULT_GRAPH_ID),
+    ]
+
+
+class TestBinarySnapshot:
+    """バイナリスナップショット単体のテスト"""
+
+    def test_round_trip_preserves_terms_and_graphs(self, tmp_path):
+        """語彙の種類・言語タグ・データ型・空白ノードのラベルと所属グラフが復元されるテスト"""
+        source = Dataset()
+        source.addN(_sample_quads())
+        path = tmp_path / "kg.snap"
+        write_binary_snapshot(source, path, "base")
+
+        loaded = Dataset()
+        load_binary_snapshot(loaded, path)
+
+        assert set(loaded.quads((None, None, None, None))) == set(_sample_quads())
+        assert read_snapshot_base_id(path) == "base"
+
+    def test_checksum_mismatch_is_rejected(self, tmp_path):
+        """破損したスナップショットが ValueError で拒否されるテスト"""
+        source = Dataset()
+        source.addN(_sample_quads())
+        path = tmp_path / "kg.snap"
+        write_binary_snapshot(source, path, "base")
+
+        data = bytearray(path.read_bytes())
+        data[len(data) // 2] ^= 0xFF
+        path.write_bytes(bytes(data))
+
+        with pytest.raises(ValueError, match="checksum"):
+            load_binary_snapshot(Dataset(), path)
+
+    def test_non_snapshot_file_has_no_base_id(self, tmp_path):
+        """スナップショット以外のファイルでは base_id が None になるテスト"""
+        path = tmp_path / "kg.snap"
+        path.write_bytes(b"@prefix kg: <http://example.org/kgpaper/> .\n")
+
+        assert read_snapshot_base_id(path) is None
+        assert read_snapshot_base_id(tmp_path / "missing.snap") is None
+
+
+class TestGraphManagerBinarySnapshot:
+    """GraphManager のバイナリスナップショット利用のテスト"""
+
+    def _compacted(self, tmp_path, extra: str = "") -> tuple[str, GraphManager]:
+        config_path = write_config(tmp_path, extra)
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        gm.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+        gm.compact()
+        return config_path, gm
+
+    def test_load_prefers_snapshot_over_text(self, tmp_path, monkeypatch):
+        """同じ世代のスナップショットがあればテキスト形式をパースせずに読み込むテスト"""
+        config_path, gm = self._compacted(tmp_path)
+        assert gm.snapshot_file.exists()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("text snapshot should not be parsed")
+
+        monkeypatch.setattr("kgpaper.graph_manager.parse_nquads", fail)
+        reopened = GraphManager(config_path=config_path)
+
+        assert set(reopened.g.quads((None, None, None, None))) == set(
+            gm.g.quads((None, None, None, None))
+        )
+
+    def test_journal_is_replayed_on_top_of_snapshot(self, tmp_path):
+        """スナップショット読み込み後にジャーナルの変更が再生されるテスト"""
+        config_path, _ = self._compacted(tmp_path)
+        gm = GraphManager(config_path=config_path)
+        gm.delete_paper("urn:uuid:p1")
+
+        reopened = GraphManager(config_path=config_path)
+
+        assert [p["title"] for p in reopened.get_all_papers()] == ["Paper Two"]
+        assert len(reopened.g) == len(gm.g)
+
+    def test_falls_back_to_text_when_turtle_is_newer(self, tmp_path):
+        """Turtle が後から書き換えられた場合はスナップショットを使わないテスト"""
+        config_path, gm = self._compacted(tmp_path)
+        gm.graph_file.write_text(
+            "<urn:corpus> <http://example.org/kgpaper/note> \"edited\" .\n",
+            encoding="utf-8",
+        )
+
+        reopened = GraphManager(config_path=config_path)
+
+        assert (URIRef("urn:corpus"), KG.note, Literal("edited")) in reopened.g
+        assert len(reopened.get_all_papers()) == 2
+
+    def test_falls_back_to_text_when_snapshot_is_corrupted(self, tmp_path):
+        """破損したスナップショットの場合はテキスト形式から読み込むテスト"""
+        config_path, gm = self._compacted(tmp_path)
+        data = bytearray(gm.snapshot_file.read_bytes())
+        data[-1] ^= 0xFF
+        gm.snapshot_file.write_bytes(bytes(data))
+
+        reopened = GraphManager(config_path=config_path)
+
+        assert len(reopened.g) == len(gm.g)
+
+    def test_snapshot_disabled(self, tmp_path):
+        """binary_snapshot: false の場合はスナップショットを書き出さないテスト"""
+        _, gm = self._compacted(tmp_path, "  binary_snapshot: false")
+
+        assert gm.graph_file.exists()
+        assert not gm.snapshot_file.exists()
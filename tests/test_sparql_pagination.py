@@ -0,0 +1,119 @@
+"""
+sparql_query.py のテスト（ページング）
+
+SparqlQuery / GraphManager の iter_search・search_page が search と同じ行を安定した順序で返し、
+カーソルで続きから再開できることを検証する。
+"""
+
+import json
+import pytest
+from kgpaper.graph_manager import GraphManager
+from kgpaper.sparql_query import SparqlQuery
+from helpers import write_config
+from test_text_index import PAPERS, _graph, _with_texts
+
+FILTERS = [
+    {},
+    {"paper_title": "battery"},
+    {"content_type": "method", "source_context": "All"},
+    {"experiment_type": "kg:Synthesis"},
+    {"text_query": "voltammetry"},
+    {"text_query": "cyclic", "content_type": "method"},
+]
+
+MORE_PAPERS = PAPERS + (
+    _with_texts("urn:uuid:p0", "Zeroth Paper", "Cyclic test.", "Another cyclic run."),
+)
+
+
+def _pages(search_page, limit: int, **filters) -> list[list[dict]]:
+    """カーソルをたどって全ページを集める"""
+    pages, cursor = [], None
+    while True:
+        rows, cursor = search_page(limit=limit, cursor=cursor, **filters)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+def _sort_key(row: dict):
+    if "score" in row:
+        return -row["score"], row["content_uri"]
+    return row["paper_uri"], row["content_uri"]
+
+
+class TestIterSearch:
+    """SparqlQuery.iter_search のテスト"""
+
+    @pytest.mark.parametrize("filters", FILTERS)
+    def test_matches_search(self, filters):
+        """search と同じ行を (論文, コンテンツ)、text_query ではスコアの降順で返すテスト"""
+        query = SparqlQuery(_graph(*MORE_PAPERS))
+
+        rows = list(query.iter_search(**filters))
+        assert rows == sorted(query.search(**filters), key=_sort_key)
+
+    def test_lazy_first_row(self):
+        """先頭の行を返す時点では最初の論文しか評価しないテスト"""
+        query = SparqlQuery(_graph(*MORE_PAPERS))
+        loaded = []
+
+        rows = query.iter_search(load_papers=loaded.append, batch_size=1)
+        assert next(rows)["paper_uri"] == "urn:uuid:p0"
+        assert loaded == [["urn:uuid:p0"]]
+
+
+class TestSearchPage:
+    """SparqlQuery.search_page のテスト"""
+
+    @pytest.mark.parametrize("filters", FILTERS)
+    @pytest.mark.parametrize("limit", [1, 2, 100])
+    def test_cursor_walk(self, filters, limit):
+        """カーソルをたどると iter_search と同じ行が重複・欠落なく返るテスト"""
+        query = SparqlQuery(_graph(*MORE_PAPERS))
+
+        pages = _pages(query.search_page, limit, **filters)
+        assert all(len(rows) <= limit for rows in pages)
+        assert [row for rows in pages for row in rows] == list(query.iter_search(**filters))
+
+    def test_cursor_is_json(self):
+        """カーソルが最後の行の並び順のキーの JSON であるテスト"""
+        query = SparqlQuery(_graph(*MORE_PAPERS))
+
+        rows, cursor = query.search_page(limit=1)
+        assert json.loads(cursor) == [rows[0]["paper_uri"], rows[0]["content_uri"]]
+        assert query.search_page(limit=1, cursor=cursor)[0][0] != rows[0]
+
+
+@pytest.mark.parametrize(
+    "extra", ["", "  lazy_load: true\n  max_loaded_papers: 1", '  backend: "sqlite"']
+)
+class TestGraphManagerPagination:
+    """GraphManager.iter_search / search_page のテスト"""
+
+    @pytest.mark.parametrize("filters", FILTERS)
+    def test_pages_match_search(self, tmp_path, extra, filters):
+        """保存後に開き直した場合も含め、ページをつなげると search と同じ行になるテスト"""
+        config = write_config(tmp_path, extra)
+        gm = GraphManager(config)
+        for data in MORE_PAPERS:
+            gm.add_json_ld(data)
+        gm.compact()
+
+        reopened = GraphManager(config)
+        expected = sorted(reopened.search(**filters), key=_sort_key)
+        pages = _pages(reopened.search_page, 1, **filters)
+        assert [row for rows in pages for row in rows] == expected
+        assert list(reopened.iter_search(**filters)) == expected
+
+    def test_page_after_change(self, tmp_path, extra):
+        """論文の追加後は新しい版のページが返るテスト"""
+        gm = GraphManager(write_config(tmp_path, extra))
+        gm.add_json_ld(PAPERS[0])
+        _, cursor = gm.search_page(limit=1)
+        assert cursor is not None
+
+        gm.add_json_ld(MORE_PAPERS[-1])
+        rows, _ = gm.search_page(limit=1)
+        assert rows[0]["paper_uri"] == "urn:uuid:p0"
+        assert gm.search_page(limit=1, cursor=cursor)[0][0]["paper_uri"] == "urn:uuid:p1"
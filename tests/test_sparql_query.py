@@ -5,9 +5,9 @@ SparqlQuery クラスの SPARQL 検索機能のテストを実施する。
 """
 
 import pytest
-from rdflib import Graph
-from kgpaper.sparql_query import SparqlQuery
-from kgpaper.ontology import PREFIXES
+from rdflib import Graph, Literal, URIRef
+from kgpaper.sparql_query import SparqlQuery, prepared_query
+from kgpaper.ontology import KG, PREFIXES
 
 
 @pytest.fixture
@@ -248,3 +248,31 @@ class TestSparqlQueryURIExperimentType:
 
         assert len(results) == 1
         assert "Electrochemical" in results[0]["experiment_type"]
+
+
+class TestSparqlQueryPrepared:
+    """コンパイル済みクエリの再利用とパラメータ化のテスト"""
+
+    def test_compiled_once_per_filter_set(self, graph_with_data):
+        """同じフィルターの組では値が違ってもクエリを1回だけコンパイルするテスト"""
+        sq = SparqlQuery(graph_with_data)
+        prepared_query.cache_clear()
+
+        sq.search(paper_title="carbon", content_type="Method")
+        sq.search(paper_title="analysis", content_type="Result")
+        sq.search(paper_title="carbon")
+
+        info = prepared_query.cache_info()
+        assert (info.misses, info.hits) == (2, 1)
+
+    def test_values_are_not_injected(self, graph_with_data):
+        """フィルターの値が SPARQL として解釈されず、文字列として照合されるテスト"""
+        sq = SparqlQuery(graph_with_data)
+
+        assert sq.search(paper_title='") || true || ("') == []
+        assert sq.search(experiment_type="kg:Synthesis || true") == []
+        graph_with_data.add(
+            (URIRef("urn:uuid:paper1"), KG.paperTitle, Literal('Test "quoted" \\ title'))
+        )
+        results = sq.search(paper_title='"QUOTED" \\')
+        assert {r["paper_uri"] for r in results} == {"urn:uuid:paper1"}
@@ -0,0 +1,160 @@
+"""
+sqlite_store.py のテスト
+
+SQLiteStore の rdflib Store としての動作と、GraphManager の sqlite バックエンドを検証する。
+"""
+
+import pytest
+from rdflib import BNode, Dataset, Literal, URIRef
+from rdflib.namespace import RDF, XSD
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+from kgpaper.sparql_query import SparqlQuery
+from kgpaper.sqlite_store import SQLiteStore
+from helpers import sourced_paper, write_config
+
+SQLITE = '  backend: "sqlite"'
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    ds = Dataset(store=SQLiteStore(str(tmp_path / "store.sqlite")), default_union=True)
+    yield ds
+    ds.store.close()
+
+
+class TestSQLiteStore:
+    """SQLiteStore 単体のテスト"""
+
+    def test_terms_round_trip(self, dataset):
+        """URI・空白ノード・言語タグ付き/型付きリテラルが復元されるテスト"""
+        paper = URIRef("urn:uuid:p1")
+        node = BNode("exp1")
+        triples = [
+            (paper, KG.hasExperiment, node),
+            (node, KG.text, Literal("日本語のテキスト", lang="ja")),
+            (node, KG.extractedAt, Literal("2026-01-01", datatype=XSD.date)),
+        ]
+        for triple in triples:
+            dataset.graph(paper).add(triple)
+
+        assert set(dataset.triples((None, None, None))) == set(triples)
+        assert list(dataset.triples((None, None, Literal("2026-01-01")))) == []
+
+    def test_union_yields_each_triple_once(self, dataset):
+        """複数グラフにある同一トリプルが和集合では1回だけ返るテスト"""
+        triple = (URIRef("urn:a"), KG.paperTitle, Literal("A"))
+        dataset.graph(URIRef("urn:g1")).add(triple)
+        dataset.graph(URIRef("urn:g2")).add(triple)
+
+        assert list(dataset.triples((None, KG.paperTitle, None))) == [triple]
+        assert len(dataset) == 1
+        assert len(list(dataset.quads((None, None, None, None)))) == 2
+
+    def test_remove_graph_and_patterns(self, dataset):
+        """グラフ単位・パターン単位の削除のテスト"""
+        g1 = dataset.graph(URIRef("urn:g1"))
+        g2 = dataset.graph(URIRef("urn:g2"))
+        g1.add((URIRef("urn:a"), RDF.type, KG.Paper))
+        g2.add((URIRef("urn:b"), RDF.type, KG.Paper))
+        g2.add((URIRef("urn:b"), KG.paperTitle, Literal("B")))
+
+        dataset.remove_graph(URIRef("urn:g1"))
+        dataset.remove((None, KG.paperTitle, None))
+
+        assert list(dataset.subjects(RDF.type, KG.Paper)) == [URIRef("urn:b")]
+        assert URIRef("urn:g1") not in {g.identifier for g in dataset.graphs()}
+        assert len(dataset.get_context(URIRef("urn:g2"))) == 1
+
+    def test_rollback_discards_uncommitted_changes(self, dataset):
+        """rollback でコミット前の変更が取り消されるテスト"""
+        dataset.add((URIRef("urn:a"), KG.paperTitle, Literal("A")))
+        dataset.commit()
+        dataset.add((URIRef("urn:b"), KG.paperTitle, Literal("B")))
+
+        dataset.rollback()
+
+        assert set(dataset.objects(None, KG.paperTitle)) == {Literal("A")}
+
+    def test_persists_across_connections(self, tmp_path):
+        """コミットした内容と名前空間が再接続後も残るテスト"""
+        path = str(tmp_path / "store.sqlite")
+        ds = Dataset(store=SQLiteStore(path), default_union=True)
+        ds.bind("kg", KG)
+        ds.graph(URIRef("urn:g1")).add((URIRef("urn:a"), KG.paperTitle, Literal("A")))
+        ds.commit()
+        ds.store.close()
+
+        reopened = Dataset(store=SQLiteStore(path), default_union=True)
+        assert len(reopened) == 1
+        assert reopened.store.namespace("kg") == URIRef(str(KG))
+        reopened.store.close()
+
+
+class TestGraphManagerSQLiteBackend:
+    """storage.backend: sqlite の GraphManager のテスト"""
+
+    def test_add_and_reopen(self, tmp_path):
+        """追加した論文が再起動後もファイル再読み込みなしで参照できるテスト"""
+        config_path = write_config(tmp_path, SQLITE)
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+
+        reopened = GraphManager(config_path=config_path)
+
+        assert [p["title"] for p in reopened.get_all_papers()] == ["Paper One"]
+        assert not reopened.graph_file.exists()
+        assert not reopened.journal.path.exists()
+
+    def test_delete_and_clear(self, tmp_path):
+        """論文削除と全削除が永続化されるテスト"""
+        config_path = write_config(tmp_path, SQLITE)
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+        gm.add_json_ld(sourced_paper("urn:uuid:p2", "Paper Two"))
+
+        gm.delete_paper("urn:uuid:p1")
+        assert [p["title"] for p in GraphManager(config_path).get_all_papers()] == [
+            "Paper Two"
+        ]
+
+        gm.clear_all()
+        assert len(GraphManager(config_path).g) == 0
+
+    def test_search_matches_memory_backend(self, tmp_path):
+        """SparqlQuery.search の結果がメモリバックエンドと一致するテスト"""
+        results = {}
+        for backend in ("memory", "sqlite"):
+            backend_dir = tmp_path / backend
+            backend_dir.mkdir()
+            gm = GraphManager(config_path=write_config(backend_dir, f'  backend: "{backend}"'))
+            gm.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+            gm.add_json_ld(sourced_paper("urn:uuid:p2", "Paper Two"))
+            rows = SparqlQuery(gm.g).search(source_context="Main")
+            results[backend] = sorted(
+                (r["paper_title"], r["experiment_type"], r["source_context"])
+                for r in rows
+            )
+
+        assert results["sqlite"] == results["memory"]
+        assert len(results["sqlite"]) == 2
+
+    def test_imports_existing_files_once(self, tmp_path):
+        """既存のファイル形式のデータが初回作成時のみ取り込まれるテスト"""
+        memory_gm = GraphManager(config_path=write_config(tmp_path))
+        memory_gm.add_json_ld(sourced_paper("urn:uuid:p1", "Paper One"))
+        memory_gm.compact()
+
+        config_path = write_config(tmp_path, SQLITE)
+        gm = GraphManager(config_path=config_path)
+        assert [p["title"] for p in gm.get_all_papers()] == ["Paper One"]
+
+        gm.clear_all()
+        assert GraphManager(config_path).get_all_papers() == []
+
+    def test_unknown_backend(self, tmp_path):
+        """未対応のバックエンド指定でエラーになるテスト"""
+        with pytest.raises(ValueError) as exc_info:
+            GraphManager(config_path=write_config(tmp_path, '  backend: "oracle"'))
+
+        assert "Unsupported storage backend" in str(exc_info.value)
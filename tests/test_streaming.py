@@ -0,0 +1,224 @@
+"""
+streaming.py のテスト
+
+JsonStream による逐次読み込みと、GraphManager.import_stream を検証する。
+"""
+
+import io
+import json
+import pytest
+from pathlib import Path
+from rdflib import RDF, BNode, Graph, URIRef
+from rdflib.compare import isomorphic
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+from kgpaper.streaming import JsonStream, iter_json_members, resolves_to
+from helpers import sample_paper, write_config
+
+MULTIDATA = Path(__file__).parent.parent / "test_multidata.json"
+
+
+def _corpus(papers: list) -> dict:
+    return {
+        "@context": sample_paper("urn:x", "x")["@context"] | {"hasPaper": "kg:hasPaper"},
+        "@id": "urn:uuid:corpus",
+        "@type": "kg:PaperCorpus",
+        "hasPaper": papers,
+    }
+
+
+def _manager(directory: Path) -> GraphManager:
+    directory.mkdir()
+    return GraphManager(write_config(directory))
+
+
+def _graph(gm: GraphManager) -> Graph:
+    """全グラフのトリプルを1つのグラフにまとめる（同型判定用）"""
+    merged = Graph()
+    for s, p, o, _ in gm.g.quads((None, None, None, None)):
+        merged.add((s, p, o))
+    return merged
+
+
+class TestJsonStream:
+    """JsonStream / iter_json_members のテスト"""
+
+    def test_streams_array_items(self):
+        """指定したキーの配列が要素ごとに返されるテスト（読み込み単位の境界をまたぐ）"""
+        data = {"a": 12345, "items": [{"n": i, "s": "x" * i} for i in range(20)], "z": [1]}
+        stream = JsonStream(io.BytesIO(json.dumps(data).encode()), read_size=7)
+
+        members = list(iter_json_members(stream, lambda key: key == "items"))
+
+        assert members[0] == ("a", 12345, False)
+        assert [value for key, value, item in members if item] == data["items"]
+        assert members[-1] == ("z", [1], False)
+
+    def test_invalid_json(self):
+        """途中で途切れた JSON で ValueError が送出されるテスト"""
+        stream = JsonStream(io.BytesIO(b'{"items": [{"n": 1}, {"n"'), read_size=4)
+        with pytest.raises(ValueError, match="Invalid JSON file"):
+            list(iter_json_members(stream, lambda key: key == "items"))
+
+    def test_resolves_to(self):
+        """@context の項目定義・接頭辞・完全IRIが展開されるテスト"""
+        context = {"kg": str(KG), "hasPaper": "kg:hasPaper", "papers": {"@id": "kg:hasPaper"}}
+        for key in ("hasPaper", "papers", "kg:hasPaper", str(KG.hasPaper)):
+            assert resolves_to(key, context, KG.hasPaper)
+        assert not resolves_to("paperTitle", context, KG.hasPaper)
+
+
+class TestImportStream:
+    """GraphManager.import_stream のテスト"""
+
+    def test_corpus_matches_add_json_ld(self, tmp_path):
+        """逐次インポートの結果が一括の add_json_ld と同じになるテスト"""
+        expected = _manager(tmp_path / "expected")
+        expected.add_json_ld(json.loads(MULTIDATA.read_text(encoding="utf-8")))
+
+        gm = _manager(tmp_path / "streamed")
+        progress = []
+        report = gm.import_stream(
+            str(MULTIDATA),
+            chunk_size=1,
+            progress=lambda done, total: progress.append((done, total)),
+        )
+
+        assert report["errors"] == {}
+        assert report["papers"] == len(expected.get_all_papers())
+        assert isomorphic(_graph(gm), _graph(expected))
+        assert sorted(gm.get_all_papers(), key=lambda p: p["uri"]) == sorted(
+            expected.get_all_papers(), key=lambda p: p["uri"]
+        )
+        assert len(progress) > 1
+        assert progress[-1] == (MULTIDATA.stat().st_size, MULTIDATA.stat().st_size)
+
+    def test_corpus_skips_invalid_papers(self, tmp_path):
+        """不正な論文だけがスキップされて報告されるテスト"""
+        invalid = sample_paper("http://example.org/invalid", "Invalid")
+        del invalid["documentType"]
+        corpus = _corpus(
+            [
+                sample_paper("http://example.org/paper1", "Paper 1"),
+                invalid,
+                sample_paper("http://example.org/paper2", "Paper 2"),
+            ]
+        )
+        path = tmp_path / "corpus.jsonld"
+        path.write_text(json.dumps(corpus), encoding="utf-8")
+
+        gm = GraphManager(write_config(tmp_path))
+        report = gm.import_stream(str(path), chunk_size=2)
+
+        assert report["papers"] == 2
+        assert list(report["errors"]) == ["http://example.org/invalid"]
+        assert {p["title"] for p in gm.get_all_papers()} == {"Paper 1", "Paper 2"}
+        corpus_ref = next(gm.g.subjects(KG.hasPaper, None))
+        assert len(set(gm.g.objects(corpus_ref, KG.hasPaper))) == 2
+
+    def test_corpus_without_leading_id(self, tmp_path):
+        """@id が論文一覧より後ろにあっても一括処理でインポートされるテスト"""
+        corpus = _corpus([sample_paper("http://example.org/paper1", "Paper 1")])
+        corpus = {"hasPaper": corpus.pop("hasPaper")} | corpus
+        path = tmp_path / "corpus.json"
+        path.write_text(json.dumps(corpus), encoding="utf-8")
+
+        gm = GraphManager(write_config(tmp_path))
+        report = gm.import_stream(str(path))
+
+        assert report["papers"] == 1
+        assert {p["title"] for p in gm.get_all_papers()} == {"Paper 1"}
+
+    @pytest.mark.parametrize("suffix", [".nt", ".nq"])
+    def test_line_formats(self, tmp_path, suffix):
+        """N-Triples / N-Quads を小さなチャンクでインポートしても同じグラフになるテスト"""
+        source = _manager(tmp_path / "source")
+        for i in range(3):
+            source.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+        dump = tmp_path / f"dump{suffix}"
+        if suffix == ".nt":
+            _graph(source).serialize(destination=str(dump), format="nt", encoding="utf-8")
+        else:
+            source.g.serialize(destination=str(dump), format="nquads")
+
+        gm = _manager(tmp_path / "target")
+        report = gm.import_stream(str(dump), chunk_lines=2)
+
+        assert report["errors"] == {}
+        assert report["papers"] == 3
+        assert isomorphic(_graph(gm), _graph(source))
+        # 論文ごとの名前付きグラフに振り分けられる
+        for i in range(3):
+            paper = URIRef(f"http://example.org/paper{i}")
+            assert len(gm.g.graph(paper)) == len(source.g.graph(paper))
+
+    @pytest.mark.parametrize("suffix", [".nt", ".nq"])
+    def test_line_formats_reimport(self, tmp_path, suffix):
+        """空白ノードを含むダンプを取り込み直しても重複が処理され、グラフが変わらないテスト"""
+        source = GraphManager(write_config(tmp_path, "  skolemize: false"))
+        for i in range(2):
+            source.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+        dump = tmp_path / f"dump{suffix}"
+        if suffix == ".nt":
+            _graph(source).serialize(destination=str(dump), format="nt", encoding="utf-8")
+        else:
+            source.g.serialize(destination=str(dump), format="nquads")
+
+        gm = _manager(tmp_path / "target")
+        gm.import_stream(str(dump), chunk_lines=3)
+        # 空白ノードはチャンクをまたいでも論文ごとの IRI に置き換えられる
+        assert not any(isinstance(node, BNode) for triple in _graph(gm) for node in triple)
+        assert len(_graph(gm)) == len(_graph(source))
+        before = _graph(gm)
+
+        report = gm.import_stream(str(dump), chunk_lines=3, on_duplicate="skip")
+
+        assert report["errors"] == {}
+        assert report["duplicates"] == {
+            f"http://example.org/paper{i}": f"http://example.org/paper{i}" for i in range(2)
+        }
+        assert isomorphic(_graph(gm), before)
+
+    def test_corpus_duplicate_policy(self, tmp_path):
+        """登録済みの論文と重複したコーパスの論文が on_duplicate に従って処理されるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        before = _graph(gm)
+        path = tmp_path / "corpus.json"
+        path.write_text(
+            json.dumps(_corpus([sample_paper("http://example.org/paper1", "Paper 1")])),
+            encoding="utf-8",
+        )
+
+        report = gm.import_stream(str(path), on_duplicate="skip")
+
+        assert report["duplicates"] == {
+            "http://example.org/paper1": "http://example.org/paper1"
+        }
+        assert len(gm.g.graph(URIRef("http://example.org/paper1"))) == len(before)
+        with pytest.raises(ValueError, match="Unsupported duplicate policy"):
+            gm.import_stream(str(path), on_duplicate="ignore")
+
+    def test_line_formats_missing_property(self, tmp_path):
+        """最後まで必須プロパティが現れないエンティティが報告されるテスト"""
+        dump = tmp_path / "dump.nt"
+        dump.write_text(
+            f"<urn:p1> <{KG.paperTitle}> \"Paper 1\" .\n"
+            f"<urn:p1> <{RDF.type}> <{KG.Paper}> .\n"
+            f"<urn:p2> <{RDF.type}> <{KG.Paper}> .\n"
+            f"<urn:p2> <{KG.paperTitle}> \"Paper 2\" .\n"
+            f"<urn:p1> <{KG.documentType}> \"main\" .\n",
+            encoding="utf-8",
+        )
+
+        gm = GraphManager(write_config(tmp_path))
+        report = gm.import_stream(str(dump), chunk_lines=1)
+
+        assert report["errors"] == {"urn:p2": "kg:Paper must have kg:documentType"}
+        assert report["triples"] == 5
+
+    def test_unsupported_format(self, tmp_path):
+        """対応していない拡張子で ValueError が送出されるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        with pytest.raises(ValueError, match="Unsupported format"):
+            gm.import_stream(str(tmp_path / "dump.ttl"))
@@ -0,0 +1,199 @@
+"""
+text_index.py のテスト
+
+論文タイトルと本文の転置索引（文字 n-gram・BM25）の検索と保存、SparqlQuery.search の
+text_query、GraphManager による追加・削除時の索引の更新を検証する。
+"""
+
+import json
+import pytest
+from rdflib import Graph, URIRef
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+from kgpaper.sparql_query import SparqlQuery
+from kgpaper.text_index import TextIndex, tokenize
+from helpers import sample_paper, write_config
+
+
+def _with_texts(paper_id: str, title: str, *texts: str) -> dict:
+    """本文を指定したコンテンツを1つずつ持つ実験を並べた論文"""
+    data = sample_paper(paper_id, title)
+    experiment = data["hasExperiment"][0]
+    data["hasExperiment"] = [
+        {**experiment, "hasContent": [{**experiment["hasContent"][0], "text": text}]}
+        for text in texts
+    ]
+    return data
+
+
+def _graph(*papers: dict) -> Graph:
+    graph = Graph()
+    for data in papers:
+        graph.parse(data=json.dumps(data), format="json-ld")
+    return graph
+
+
+PAPERS = (
+    _with_texts(
+        "urn:uuid:p1",
+        "Solid Electrolyte Synthesis",
+        "Cyclic voltammetry of the electrolyte. The electrolyte was stable.",
+        "電解質の合成には固相法を用いた。",
+    ),
+    _with_texts(
+        "urn:uuid:p2",
+        "Battery Performance",
+        "Cyclic voltammetry was recorded once.",
+        "充放電試験を行った。",
+    ),
+)
+
+
+class TestTokenize:
+    """文字 n-gram への分割のテスト"""
+
+    def test_ngrams(self):
+        """英語・日本語とも語ごとに 2-gram になり、全角・大文字が正規化されるテスト"""
+        assert tokenize("ＣＶ Test") == ["cv", "te", "es", "st"]
+        assert tokenize("電解質、a") == ["電解", "解質", "a"]
+
+
+class TestTextIndex:
+    """転置索引の検索と保存のテスト"""
+
+    def test_bm25_ranking(self):
+        """語を多く含む本文ほど上位になり、すべての n-gram を含むものだけが一致するテスト"""
+        graph = _graph(*PAPERS)
+        index = TextIndex.build(graph)
+
+        # タイトルの一致で論文のすべてのコンテンツが返り、本文も一致するものが上位になる
+        hits = index.search("electrolyte")
+        assert [paper for _, paper, _ in hits] == ["urn:uuid:p1", "urn:uuid:p1"]
+        assert "voltammetry" in str(graph.value(hits[0][0], KG.text))
+        ranked = index.search("voltammetry electrolyte")
+        assert len(ranked) == 1
+        ranked = index.search("voltammetry")
+        assert [paper for _, paper, _ in ranked] == ["urn:uuid:p2", "urn:uuid:p1"]
+        assert ranked[0][2] > ranked[1][2] > 0  # 短い本文の方がスコアが高い
+        assert index.search("voltammetryx") == []
+
+    def test_japanese_and_title(self):
+        """日本語の部分一致（1文字を含む）と、タイトルの一致で論文のコンテンツが返るテスト"""
+        index = TextIndex.build(_graph(*PAPERS))
+
+        assert len(index.search("電解質")) == 1
+        assert {paper for _, paper, _ in index.search("試")} == {"urn:uuid:p2"}
+        title_hits = index.search("battery")
+        assert len(title_hits) == 2
+        assert {paper for _, paper, _ in title_hits} == {"urn:uuid:p2"}
+
+    def test_update_and_remove(self):
+        """論文の更新で古い本文が消え、空のグラフで論文が索引から外れるテスト"""
+        graph = _graph(*PAPERS)
+        index = TextIndex.build(graph)
+        index.update(URIRef("urn:uuid:p1"), _graph(_with_texts("urn:uuid:p1", "T", "new text")))
+
+        assert index.search("electrolyte") == []
+        assert len(index.search("new text")) == 1
+        index.update(URIRef("urn:uuid:p1"), Graph())
+        assert index.search("new text") == []
+        assert set(index.papers) == {"urn:uuid:p2"}
+
+    def test_save_and_load(self, tmp_path):
+        """保存した索引が同じ検索結果を返し、基準のスナップショットが違えば使われないテスト"""
+        index = TextIndex(tmp_path / "text_index.json")
+        for data in PAPERS:
+            index.update(URIRef(data["@id"]), _graph(data))
+        index.save("snap-1")
+
+        loaded = TextIndex(tmp_path / "text_index.json")
+        assert not loaded.load("snap-2")
+        assert loaded.load("snap-1")
+        assert loaded.search("voltammetry") == index.search("voltammetry")
+        loaded.update(URIRef("urn:uuid:p2"), Graph())
+        assert [paper for _, paper, _ in loaded.search("voltammetry")] == ["urn:uuid:p1"]
+
+
+class TestSearchTextQuery:
+    """SparqlQuery.search の text_query のテスト"""
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            {},
+            {"paper_title": "battery"},
+            {"content_type": "method"},
+            {"experiment_type": "kg:Synthesis"},
+            {"experiment_type": "kg:Characterization"},
+            {"source_context": "Main"},
+        ],
+    )
+    def test_matches_sparql_filters(self, filters):
+        """text_query の結果が SPARQL の検索結果のうち候補のコンテンツと一致するテスト"""
+        graph = _graph(*PAPERS)
+        query = SparqlQuery(graph)
+        candidates = {str(content) for content, _, _ in TextIndex.build(graph).search("cyclic")}
+
+        rows = query.search(text_query="cyclic", **filters)
+        expected = [row for row in query.search(**filters) if row["content_uri"] in candidates]
+
+        scores = {row["content_uri"]: row["score"] for row in rows}
+        assert sorted(rows, key=lambda row: row["content_uri"]) == sorted(
+            ({**row, "score": scores.get(row["content_uri"])} for row in expected),
+            key=lambda row: row["content_uri"],
+        )
+        assert [row["score"] for row in rows] == sorted(
+            (row["score"] for row in rows), reverse=True
+        )
+
+
+@pytest.mark.parametrize(
+    "extra", ["", "  lazy_load: true\n  max_loaded_papers: 1", '  backend: "sqlite"']
+)
+class TestGraphManagerTextIndex:
+    """GraphManager の全文索引の更新のテスト"""
+
+    def test_add_delete_and_reopen(self, tmp_path, extra):
+        """追加・削除が索引に反映され、再起動後（ジャーナルの再適用を含む）も検索できるテスト"""
+        config = write_config(tmp_path, extra)
+        gm = GraphManager(config)
+        for data in PAPERS:
+            gm.add_json_ld(data)
+        gm.compact()
+        gm.add_json_ld(_with_texts("urn:uuid:p3", "Third", "Impedance spectroscopy."))
+
+        assert [row["paper_uri"] for row in gm.search(text_query="voltammetry")] == [
+            "urn:uuid:p2",
+            "urn:uuid:p1",
+        ]
+        gm.delete_paper("urn:uuid:p2")
+        assert [row["paper_uri"] for row in gm.search(text_query="voltammetry")] == [
+            "urn:uuid:p1"
+        ]
+        gm.flush()
+
+        reopened = GraphManager(config)
+        assert [row["paper_uri"] for row in reopened.search(text_query="impedance")] == [
+            "urn:uuid:p3"
+        ]
+        assert reopened.search(text_query="充放電") == []
+        rows = reopened.search(text_query="電解質", content_type="method")
+        assert [row["paper_title"] for row in rows] == ["Solid Electrolyte Synthesis"]
+
+    def test_other_process_changes(self, tmp_path, extra):
+        """別のプロセス（インスタンス）が追加した論文も全文検索で見つかるテスト"""
+        config = write_config(tmp_path, extra)
+        gm = GraphManager(config)
+        gm.add_json_ld(PAPERS[0])
+        assert {row["paper_uri"] for row in gm.search(text_query="electrolyte")} == {
+            "urn:uuid:p1"
+        }
+
+        other = GraphManager(config)
+        other.add_json_ld(_with_texts("urn:uuid:p3", "Third", "Another electrolyte."))
+        other.flush()
+
+        assert {row["paper_uri"] for row in gm.search(text_query="electrolyte")} == {
+            "urn:uuid:p1",
+            "urn:uuid:p3",
+        }
@@ -0,0 +1,219 @@
+"""
+transaction.py のテスト
+
+Transaction の差分管理と、GraphManager.transaction() によるまとめ書き・ロールバックを検証する。
+"""
+
+import threading
+import pytest
+from rdflib import Literal, URIRef
+from kgpaper.graph_manager import GraphManager
+from kgpaper.journal import ChangeJournal
+from kgpaper.ontology import KG
+from kgpaper.transaction import Transaction
+from helpers import sample_paper, write_config
+
+
+def _quad(name: str) -> tuple:
+    node = URIRef(f"http://example.org/{name}")
+    return node, KG.paperTitle, Literal(name), node
+
+
+def _titles(gm: GraphManager) -> set:
+    return {paper["title"] for paper in gm.get_all_papers()}
+
+
+class TestTransactionDelta:
+    """Transaction の差分のテスト"""
+
+    def test_opposite_changes_cancel(self):
+        """追加と削除が打ち消し合うテスト"""
+        txn = Transaction()
+        a, b = _quad("a"), _quad("b")
+        txn.record(removed=[a], added=[b])
+        txn.record(removed=[b], added=[a])
+
+        assert txn.added == set()
+        assert txn.removed == set()
+
+    def test_inverse(self):
+        """逆向きのバッチが差分を取り消すテスト"""
+        txn = Transaction()
+        a, b = _quad("a"), _quad("b")
+        txn.record(removed=[a], added=[b])
+
+        inverse = txn.inverse()
+        assert inverse.added == [a]
+        assert inverse.removed == [b]
+        assert txn.added_subjects() == {b[0]}
+
+
+class TestGraphManagerTransaction:
+    """GraphManager.transaction() のテスト"""
+
+    def test_single_journal_batch(self, tmp_path, monkeypatch):
+        """複数の変更がジャーナルの1バッチ・1回の永続化にまとめられるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        calls = []
+        original = gm.journal.extend
+        monkeypatch.setattr(
+            gm.journal, "extend", lambda batches: calls.append(1) or original(batches)
+        )
+
+        with gm.transaction():
+            for i in range(3):
+                gm.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+            assert len(calls) == 0  # ブロック内では永続化しない
+
+        assert len(calls) == 1
+        batches = list(ChangeJournal(gm.journal.path).replay())
+        assert len(batches) == 1
+
+        reloaded = GraphManager(write_config(tmp_path))
+        assert _titles(reloaded) == {"Paper 0", "Paper 1", "Paper 2"}
+
+    def test_rollback_on_exception(self, tmp_path):
+        """ブロック内の例外で全ての変更が取り消されるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        gm.add_json_ld(sample_paper("http://example.org/keep", "Keep"))
+        before = set(gm.g.quads((None, None, None, None)))
+
+        with pytest.raises(RuntimeError):
+            with gm.transaction():
+                gm.add_json_ld(sample_paper("http://example.org/new", "New"))
+                gm.delete_paper("http://example.org/keep")
+                assert _titles(gm) == {"New"}  # ブロック内では反映済み
+                raise RuntimeError("abort")
+
+        assert set(gm.g.quads((None, None, None, None))) == before
+        assert _titles(gm) == {"Keep"}
+
+        reloaded = GraphManager(write_config(tmp_path))
+        assert _titles(reloaded) == {"Keep"}
+
+    def test_rollback_on_validation_error(self, tmp_path):
+        """終了時の必須プロパティ検証に失敗するとロールバックされるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        invalid = sample_paper("http://example.org/invalid", "Invalid")
+        del invalid["documentType"]
+
+        with pytest.raises(ValueError, match="documentType"):
+            with gm.transaction():
+                gm.add_json_ld(sample_paper("http://example.org/valid", "Valid"))
+                gm.add_json_ld(invalid)
+
+        assert len(gm.g) == 0
+        assert gm.get_all_papers() == []
+
+    @pytest.mark.parametrize("extra", ["", '  backend: "sqlite"'])
+    def test_reader_waits_for_transaction(self, tmp_path, extra):
+        """他のスレッドの読み取りが終了まで待ち、取り消される変更を読まないテスト"""
+        gm = GraphManager(write_config(tmp_path, extra))
+        gm.add_json_ld(sample_paper("http://example.org/keep", "Keep"))
+        results = {}
+
+        def read():
+            results["titles"] = _titles(gm)
+            results["rows"] = {row["paper_title"] for row in gm.search()}
+            results["count"] = gm.count_papers()
+
+        reader = threading.Thread(target=read)
+        with pytest.raises(RuntimeError):
+            with gm.transaction():
+                gm.add_json_ld(sample_paper("http://example.org/new", "New"))
+                gm.delete_paper("http://example.org/keep")
+                reader.start()
+                reader.join(timeout=0.2)
+                assert reader.is_alive()  # ブロックの終了を待っている
+                raise RuntimeError("abort")
+        reader.join(timeout=5)
+
+        assert results == {"titles": {"Keep"}, "rows": {"Keep"}, "count": 1}
+
+    def test_add_then_delete(self, tmp_path):
+        """ブロック内で追加して削除した論文が何も残さないテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        gm.add_json_ld(sample_paper("http://example.org/keep", "Keep"))
+        size = gm.journal.size
+
+        with gm.transaction():
+            gm.add_json_ld(sample_paper("http://example.org/temp", "Temp"))
+            gm.delete_paper("http://example.org/temp")
+
+        assert gm.journal.size == size  # 正味の差分が空なら書き込まない
+        assert _titles(gm) == {"Keep"}
+
+    def test_nested_transaction(self, tmp_path):
+        """入れ子のトランザクションが外側にまとめられるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+
+        with pytest.raises(RuntimeError):
+            with gm.transaction() as outer:
+                with gm.transaction() as inner:
+                    gm.add_json_ld(sample_paper("http://example.org/inner", "Inner"))
+                assert inner is outer
+                raise RuntimeError("abort")
+
+        assert len(gm.g) == 0
+
+    def test_clear_all_rollback(self, tmp_path):
+        """トランザクション中の clear_all も取り消せるテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        gm.add_json_ld(sample_paper("http://example.org/keep", "Keep"))
+
+        with pytest.raises(RuntimeError):
+            with gm.transaction():
+                gm.clear_all()
+                assert len(gm.g) == 0
+                raise RuntimeError("abort")
+
+        assert _titles(gm) == {"Keep"}
+
+    def test_lazy_load(self, tmp_path):
+        """lazy_load 時も未読み込みの論文の削除を取り消せるテスト"""
+        lazy = "  lazy_load: true\n  max_loaded_papers: 1"
+        gm = GraphManager(write_config(tmp_path, lazy))
+        for i in range(3):
+            gm.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+
+        gm = GraphManager(write_config(tmp_path, lazy))
+        with pytest.raises(RuntimeError):
+            with gm.transaction():
+                gm.delete_paper("http://example.org/paper0")
+                raise RuntimeError("abort")
+        gm.compact()
+
+        reloaded = GraphManager(write_config(tmp_path))
+        assert _titles(reloaded) == {"Paper 0", "Paper 1", "Paper 2"}
+
+    def test_background_writer(self, tmp_path):
+        """バックグラウンド書き込み時もトランザクションがまとめて保存されるテスト"""
+        gm = GraphManager(write_config(tmp_path, "  background_write: true"))
+        with gm.transaction():
+            gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+            gm.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+        gm.close()
+
+        assert len(list(ChangeJournal(gm.journal.path).replay())) == 1
+        reloaded = GraphManager(write_config(tmp_path))
+        assert _titles(reloaded) == {"Paper 1", "Paper 2"}
+
+    def test_sqlite_backend(self, tmp_path):
+        """SQLite バックエンドでもロールバックされるテスト"""
+        config = write_config(tmp_path, '  backend: "sqlite"')
+        gm = GraphManager(config)
+        gm.add_json_ld(sample_paper("http://example.org/keep", "Keep"))
+
+        with pytest.raises(RuntimeError):
+            with gm.transaction():
+                gm.add_json_ld(sample_paper("http://example.org/new", "New"))
+                gm.delete_paper("http://example.org/keep")
+                raise RuntimeError("abort")
+
+        assert _titles(gm) == {"Keep"}
+
+        with gm.transaction():
+            gm.add_json_ld(sample_paper("http://example.org/new", "New"))
+        gm.g.close()
+        reloaded = GraphManager(config)
+        assert _titles(reloaded) == {"Keep", "New"}
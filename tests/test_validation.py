@@ -0,0 +1,79 @@
+"""
+validation.py のテスト
+
+RequiredPropertyValidator の一括検証と差分（主語指定）検証を検証する。
+"""
+
+import pytest
+from rdflib import RDF, BNode, Graph, Literal, URIRef
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+from kgpaper.validation import RequiredPropertyValidator, ValidationError
+
+PAPER = URIRef("urn:paper")
+
+
+@pytest.fixture
+def validator():
+    return RequiredPropertyValidator(GraphManager.REQUIRED_PROPERTIES)
+
+
+def _valid_graph() -> Graph:
+    graph = Graph()
+    experiment, method = BNode(), BNode()
+    graph.add((PAPER, RDF.type, KG.Paper))
+    graph.add((PAPER, KG.paperTitle, Literal("Paper")))
+    graph.add((PAPER, KG.documentType, Literal("main")))
+    graph.add((PAPER, KG.hasExperiment, experiment))
+    graph.add((experiment, RDF.type, KG.Experiment))
+    graph.add((experiment, KG.experimentType, KG.Synthesis))
+    graph.add((experiment, KG.hasContent, method))
+    graph.add((method, RDF.type, KG.Method))
+    graph.add((method, KG.contentType, Literal("method")))
+    graph.add((method, KG.text, Literal("text")))
+    return graph
+
+
+class TestRequiredPropertyValidator:
+    """RequiredPropertyValidator のテスト"""
+
+    def test_valid_graph(self, validator):
+        """必須プロパティが揃ったグラフで違反がないテスト"""
+        assert validator.violations(_valid_graph()) == []
+
+    def test_reports_every_violation(self, validator):
+        """全ての違反が主語つきで報告されるテスト"""
+        graph = _valid_graph()
+        method = next(graph.subjects(RDF.type, KG.Method))
+        graph.remove((PAPER, KG.documentType, None))
+        graph.remove((method, KG.contentType, None))
+        graph.remove((method, KG.text, None))
+
+        found = {(v.subject, v.message) for v in validator.violations(graph)}
+
+        assert found == {
+            (PAPER, "kg:Paper must have kg:documentType"),
+            (method, "kg:Method must have kg:contentType"),
+            (method, "kg:Method must have kg:text"),
+        }
+        with pytest.raises(ValidationError, match="kg:Method must have kg:text"):
+            validator.validate(graph)
+
+    def test_empty_title(self, validator):
+        """空白だけの論文タイトルが違反になるテスト"""
+        graph = _valid_graph()
+        graph.set((PAPER, KG.paperTitle, Literal("  ")))
+
+        with pytest.raises(ValueError, match="Paper title cannot be empty"):
+            validator.validate(graph)
+
+    def test_subjects(self, validator):
+        """主語を指定するとその主語だけが検証されるテスト"""
+        graph = _valid_graph()
+        orphan = URIRef("urn:orphan")
+        graph.add((orphan, RDF.type, KG.Result))
+
+        assert validator.violations(graph, subjects=[PAPER]) == []
+        assert {v.subject for v in validator.violations(graph, subjects=[orphan])} == {
+            orphan
+        }
@@ -0,0 +1,186 @@
+"""
+versions.py のテスト
+
+VersionStore の差分の記録・保持上限と、GraphManager の checkout / rollback を検証する。
+"""
+
+import pytest
+from rdflib import Literal, URIRef
+from kgpaper.graph_manager import GraphManager
+from kgpaper.ontology import KG
+from kgpaper.versions import VersionStore
+from kgpaper.journal import JournalBatch
+from helpers import sample_paper, write_config
+
+
+def _quads(gm: GraphManager) -> set:
+    return set(gm.g.quads((None, None, None, None)))
+
+
+def _titles(gm: GraphManager) -> set:
+    return {paper["title"] for paper in gm.get_all_papers()}
+
+
+def _delta(name: str) -> JournalBatch:
+    node = URIRef(f"http://example.org/{name}")
+    return JournalBatch(removed=[], added=[(node, KG.paperTitle, Literal(name), node)], dropped=[])
+
+
+class TestVersionStore:
+    """VersionStore のテスト"""
+
+    def test_record_and_deltas(self, tmp_path):
+        """記録した差分が古い順に読み出せるテスト"""
+        store = VersionStore(tmp_path / "versions", max_count=10, max_bytes=1 << 20)
+        store.record([_delta("a"), _delta("b")])
+        store.record([JournalBatch(removed=[], added=[], dropped=[])])  # 空の差分は記録しない
+
+        assert [entry["id"] for entry in store.entries()] == [1, 2]
+        assert store.entries()[0]["papers"] == ["http://example.org/a"]
+        assert [delta.added for delta in store.deltas_after(0)] == [
+            _delta("a").added,
+            _delta("b").added,
+        ]
+        assert store.deltas_after(2) == []
+
+    def test_retention_by_count(self, tmp_path):
+        """保持数を超えた古い版が削除されるテスト"""
+        store = VersionStore(tmp_path / "versions", max_count=2, max_bytes=1 << 20)
+        store.record([_delta(name) for name in "abc"])
+
+        assert [entry["id"] for entry in store.entries()] == [2, 3]
+        assert not (tmp_path / "versions" / "1.nq").exists()
+        store.deltas_after(1)
+        with pytest.raises(ValueError, match="not available"):
+            store.deltas_after(0)
+
+    def test_retention_by_bytes(self, tmp_path):
+        """合計サイズの上限を超えても最新の版は残るテスト"""
+        store = VersionStore(tmp_path / "versions", max_count=10, max_bytes=1)
+        store.record([_delta("a"), _delta("b")])
+
+        assert [entry["id"] for entry in store.entries()] == [2]
+
+
+def _versioned(tmp_path, extra: str = "") -> str:
+    """版の履歴を有効にした設定ファイル"""
+    return write_config(tmp_path, "  versioning: true\n" + extra)
+
+
+class TestGraphManagerVersions:
+    """GraphManager の checkout / rollback のテスト"""
+
+    def test_rollback_delete(self, tmp_path):
+        """削除した論文が rollback で元に戻るテスト"""
+        gm = GraphManager(_versioned(tmp_path))
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        gm.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+        before = _quads(gm)
+
+        gm.delete_paper("http://example.org/paper1")
+        gm.rollback()
+
+        assert _quads(gm) == before
+        assert _titles(GraphManager(_versioned(tmp_path))) == {"Paper 1", "Paper 2"}
+
+    def test_rollback_clear_all(self, tmp_path):
+        """clear_all が rollback で元に戻るテスト"""
+        gm = GraphManager(_versioned(tmp_path))
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        before = _quads(gm)
+
+        gm.clear_all()
+        assert len(gm.g) == 0
+        gm.rollback()
+
+        assert _quads(gm) == before
+        assert _titles(gm) == {"Paper 1"}
+
+    def test_checkout(self, tmp_path):
+        """任意の版に戻り、戻す操作自体も checkout で取り消せるテスト"""
+        gm = GraphManager(_versioned(tmp_path))
+        states = [_quads(gm)]
+        for i in range(3):
+            gm.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+            states.append(_quads(gm))
+        versions = gm.list_versions()
+        assert [entry["id"] for entry in versions] == [1, 2, 3]
+        assert versions[0]["papers"] == ["http://example.org/paper0"]
+
+        gm.checkout(1)
+        assert _quads(gm) == states[1]
+        assert gm.list_versions()[-1]["removed"] > 0  # 戻す操作も版になる
+        assert gm.list_versions()[-1]["restores"] == 1
+
+        gm.checkout(3)
+        assert _quads(gm) == states[3]
+
+        gm.checkout(0)
+        assert _quads(gm) == states[0]
+        reloaded = GraphManager(_versioned(tmp_path))
+        assert _quads(reloaded) == states[0]
+
+    def test_repeated_rollback_steps_back(self, tmp_path):
+        """rollback を繰り返すと変更を1つずつさかのぼり、取り消しを取り消さないテスト"""
+        gm = GraphManager(_versioned(tmp_path))
+        states = [_quads(gm)]
+        for i in range(3):
+            gm.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+            states.append(_quads(gm))
+
+        for expected in reversed(states[:-1]):
+            gm.rollback()
+            assert _quads(gm) == expected
+        with pytest.raises(ValueError, match="No version"):
+            gm.rollback()
+
+        # 戻した状態からの変更を取り消すと、戻した状態に戻る
+        gm.add_json_ld(sample_paper("http://example.org/paper9", "Paper 9"))
+        gm.rollback()
+        assert _quads(gm) == states[0]
+        assert _quads(GraphManager(_versioned(tmp_path))) == states[0]
+
+    def test_transaction_is_one_version(self, tmp_path):
+        """トランザクションの変更が1つの版にまとめられるテスト"""
+        gm = GraphManager(_versioned(tmp_path))
+        with gm.transaction():
+            gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+            gm.add_json_ld(sample_paper("http://example.org/paper2", "Paper 2"))
+
+        assert len(gm.list_versions()) == 1
+        gm.rollback()
+        assert len(gm.g) == 0
+
+    def test_unavailable_version(self, tmp_path):
+        """保持数を超えて削除された版には戻れないテスト"""
+        gm = GraphManager(_versioned(tmp_path, "  max_versions: 2"))
+        for i in range(3):
+            gm.add_json_ld(sample_paper(f"http://example.org/paper{i}", f"Paper {i}"))
+
+        with pytest.raises(ValueError, match="not available"):
+            gm.checkout(0)
+        gm.checkout(1)
+        assert _titles(gm) == {"Paper 0"}
+
+    @pytest.mark.parametrize(
+        "extra", ["  background_write: true", "  lazy_load: true", '  backend: "sqlite"']
+    )
+    def test_backends(self, tmp_path, extra):
+        """バックグラウンド書き込み・lazy_load・SQLite でも rollback できるテスト"""
+        gm = GraphManager(_versioned(tmp_path, extra))
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+        gm.delete_paper("http://example.org/paper1")
+        gm.rollback()
+        gm.flush()
+
+        assert _titles(gm) == {"Paper 1"}
+        assert len(gm.list_versions()) == 3
+
+    def test_disabled_by_default(self, tmp_path):
+        """versioning を指定しない場合は版を保存しないテスト"""
+        gm = GraphManager(write_config(tmp_path))
+        gm.add_json_ld(sample_paper("http://example.org/paper1", "Paper 1"))
+
+        assert not (gm.graph_dir / "versions").exists()
+        with pytest.raises(ValueError, match="Versioning is disabled"):
+            gm.rollback()
@@ -0,0 +1,177 @@
+"""
+writer.py のテスト
+
+BackgroundWriter と、GraphManager のバックグラウンド書き込みを検証する。
+"""
+
+import gc
+import pytest
+import threading
+import time
+import weakref
+from kgpaper.graph_manager import GraphManager
+from kgpaper.writer import BackgroundWriter
+from helpers import sample_paper, write_config
+
+
+class TestBackgroundWriter:
+    """BackgroundWriter 単体のテスト"""
+
+    def test_coalesces_notifications(self):
+        """間隔内の通知が1回の永続化にまとめられるテスト"""
+        calls = []
+        writer = BackgroundWriter(lambda: calls.append(time.monotonic()), interval=60)
+        writer.notify()
+        writer.flush()
+        for _ in range(10):
+            writer.notify()
+        time.sleep(0.05)
+
+        assert len(calls) == 1  # 2回目は間隔が空くまで待機中
+
+        writer.flush()
+        assert len(calls) == 2
+        writer.close()
+
+    def test_flush_blocks_until_persisted(self):
+        """flush が永続化の完了まで戻らないテスト"""
+        started = threading.Event()
+        release = threading.Event()
+        done = []
+
+        def persist():
+            started.set()
+            release.wait()
+            done.append(True)
+
+        writer = BackgroundWriter(persist, interval=0)
+        writer.notify()
+        started.wait()
+        flusher = threading.Thread(target=writer.flush)
+        flusher.start()
+        flusher.join(0.05)
+        assert flusher.is_alive()
+
+        release.set()
+        flusher.join()
+        assert done == [True]
+        writer.close()
+
+    def test_failure_is_raised_and_retried(self):
+        """永続化の失敗が flush で送出され、次の flush で再試行されるテスト"""
+        failing = [True]
+        done = []
+
+        def persist():
+            if failing[0]:
+                raise OSError("disk full")
+            done.append(True)
+
+        writer = BackgroundWriter(persist, interval=0)
+        writer.notify()
+        with pytest.raises(OSError):
+            writer.flush()
+
+        failing[0] = False
+        writer.flush()
+        assert done == [True]
+        writer.close()
+
+    def test_close_persists_pending_changes(self):
+        """close で待機中の変更が間隔を待たずに永続化されるテスト"""
+        calls = []
+        writer = BackgroundWriter(lambda: calls.append(True), interval=60)
+        writer.notify()
+        writer.flush()
+        writer.notify()
+
+        writer.close()
+
+        assert len(calls) == 2
+        with pytest.raises(RuntimeError):
+            writer.notify()
+
+
+class TestGraphManagerBackgroundWrite:
+    """storage.background_write の GraphManager のテスト"""
+
+    def test_deletes_are_coalesced_into_one_journal_write(self, tmp_path, monkeypatch):
+        """連続した削除がまとめて1回でジャーナルに書き込まれるテスト"""
+        config_path = write_config(
+            tmp_path, "  background_write: true\n  write_interval: 60"
+        )
+        gm = GraphManager(config_path=config_path)
+        for i in range(3):
+            gm.add_json_ld(sample_paper(f"urn:uuid:p{i}", f"Paper {i}"))
+        gm.flush()
+
+        writes = []
+        extend = gm.journal.extend
+        monkeypatch.setattr(
+            gm.journal, "extend", lambda batches: writes.append(len(batches)) or extend(batches)
+        )
+        for i in range(3):
+            gm.delete_paper(f"urn:uuid:p{i}")
+        assert gm.get_all_papers() == []  # メモリ上には即時に反映される
+
+        gm.flush()
+
+        assert writes == [3]
+        assert GraphManager(config_path=write_config(tmp_path)).get_all_papers() == []
+        gm.close()
+
+    def test_close_persists_pending_changes(self, tmp_path):
+        """close で書き込み待ちの変更が永続化されるテスト"""
+        config_path = write_config(
+            tmp_path, "  background_write: true\n  write_interval: 60"
+        )
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        gm.flush()
+        gm.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+
+        gm.close()
+
+        reopened = GraphManager(config_path=write_config(tmp_path))
+        assert sorted(p["title"] for p in reopened.get_all_papers()) == [
+            "Paper One",
+            "Paper Two",
+        ]
+        assert gm.writer is None
+
+    def test_background_write_without_journal(self, tmp_path):
+        """ジャーナル無効時はスナップショットの書き出しがまとめて行われるテスト"""
+        config_path = write_config(
+            tmp_path, "  journal: false\n  background_write: true\n  write_interval: 60"
+        )
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        gm.flush()
+        gm.add_json_ld(sample_paper("urn:uuid:p2", "Paper Two"))
+        assert len(GraphManager(config_path=config_path).get_all_papers()) == 1
+
+        gm.flush()
+
+        assert len(GraphManager(config_path=config_path).get_all_papers()) == 2
+        gm.close()
+
+    def test_unreferenced_instance_is_released(self, tmp_path):
+        """close しないまま参照されなくなったインスタンスが、書き込み待ちの変更を永続化してから解放されるテスト"""
+        config_path = write_config(
+            tmp_path, "  background_write: true\n  write_interval: 0.05"
+        )
+        gm = GraphManager(config_path=config_path)
+        gm.add_json_ld(sample_paper("urn:uuid:p1", "Paper One"))
+        thread = gm.writer._thread
+        ref = weakref.ref(gm)
+        del gm
+
+        deadline = time.monotonic() + 5
+        while ref() is not None and time.monotonic() < deadline:
+            gc.collect()
+            time.sleep(0.01)
+        thread.join(timeout=5)
+
+        assert ref() is None
+        assert not thread.is_alive()
+        assert len(GraphManager(config_path=write_config(tmp_path)).get_all_papers()) == 1
@@ -1,17 +1,41 @@
 import streamlit as st
+import hashlib
 import tempfile
 import os
 from kgpaper.llm_extractor import LLMExtractor
 from kgpaper.graph_manager import GraphManager
-from kgpaper.utils import clear_graph_manager_cache
+from kgpaper.utils import get_graph_manager
 
 
 st.set_page_config(page_title="Register Papers", page_icon="📝")
 
 st.title("📝 Register Papers")
 
+gm = get_graph_manager()
+
 tab1, tab2 = st.tabs(["PDF Extract", "Import RDF"])
 
+# 登録済みの論文と重複した場合の扱い
+DUPLICATE_POLICIES = {
+    "Skip": "skip",
+    "Replace existing": "replace",
+    "Merge new experiments": "merge",
+}
+
+
+def select_duplicate_policy(key: str) -> str:
+    """重複した場合の扱いを選ばせる（初期値は設定の storage.on_duplicate）"""
+    policies = list(DUPLICATE_POLICIES.values())
+    label = st.radio(
+        "If already registered",
+        list(DUPLICATE_POLICIES),
+        index=policies.index(gm.config.duplicate_policy),
+        horizontal=True,
+        key=key,
+    )
+    return DUPLICATE_POLICIES[label]
+
+
 with tab1:
     st.header("Extract from PDF")
 
@@ -25,10 +49,19 @@ with tab1:
         "Upload Support PDF", type=["pdf"], key="support_uploader"
     )
 
+    on_duplicate = select_duplicate_policy("extract_on_duplicate")
+
     # 抽出開始ボタン（本文ファイルが必須）
     if st.button("Start Extraction", type="primary", disabled=not main_file):
         extractor = LLMExtractor()
-        gm = GraphManager()
+
+        # 同じ PDF が登録済みで skip の場合は抽出（LLM 呼び出し）を行わない
+        # （dedup.file_hash と同じ SHA-256）
+        source_hash = hashlib.sha256(main_file.getvalue()).hexdigest()
+        existing = gm.find_duplicate(source_hash=source_hash)
+        if existing and on_duplicate == "skip":
+            st.warning(f"Already registered: {existing}")
+            st.stop()
 
         # 一時ファイルのパスを保持
         tmp_paths = []
@@ -89,8 +122,11 @@ with tab1:
                             json_ld["supportFile"] = support_file.name
 
                     # グラフに追加
-                    gm.add_json_ld(json_ld)
-                    clear_graph_manager_cache()  # キャッシュをクリアして最新データを反映
+                    duplicates = gm.add_json_ld(
+                        json_ld, on_duplicate=on_duplicate, source_hash=source_hash
+                    )
+                    if duplicates:
+                        st.info(f"Duplicate of registered paper ({on_duplicate}): {duplicates}")
                     st.success(f"Successfully processed: {files_desc}")
 
         except TimeoutError as e:
@@ -110,13 +146,10 @@ with tab2:
     uploaded_rdf = st.file_uploader(
         "Upload RDF File (.ttl, .jsonld)", type=["ttl", "json", "jsonld"]
     )
+    import_on_duplicate = select_duplicate_policy("import_on_duplicate")
 
     if st.button("Import Graph"):
         if uploaded_rdf:
-            from kgpaper.utils import get_graph_manager
-
-            gm = get_graph_manager()
-
             # Save to temp
             suffix = "." + uploaded_rdf.name.split(".")[-1]
             with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
@@ -124,8 +157,11 @@ with tab2:
                 tmp_path = tmp.name
 
             try:
-                gm.import_graph(tmp_path)
-                clear_graph_manager_cache()  # キャッシュをクリアして最新データを反映
+                duplicates = gm.import_graph(tmp_path, on_duplicate=import_on_duplicate)
+                if duplicates:
+                    st.info(
+                        f"Duplicate of registered paper ({import_on_duplicate}): {duplicates}"
+                    )
                 st.success(f"Imported {uploaded_rdf.name}")
             except Exception as e:
                 st.error(f"Import failed: {e}")
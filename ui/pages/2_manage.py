@@ -1,11 +1,11 @@
 import streamlit as st
-from kgpaper.utils import get_graph_manager, clear_graph_manager_cache
+from kgpaper.utils import get_graph_manager
 
 st.set_page_config(page_title="Manage Data", page_icon="🗑️")
 st.title("🗑️ Manage Data")
 
 gm = get_graph_manager()
-papers = gm.get_all_papers()
+papers = gm.get_all_papers(sort="title")
 
 st.subheader("Registered Papers")
 
@@ -55,20 +55,21 @@ else:
                 papers_to_delete_safe = st.session_state.get("papers_to_delete", [])
 
                 deleted_count = 0
-                for label in papers_to_delete_safe:
-                    # ページリロード等でpaper_optionsが変わっている可能性があるためチェック
-                    if label in paper_options:
-                        uri = paper_options[label]
-                        gm.delete_paper(uri)
-                        st.toast(f"Deleted {label}")
-                        deleted_count += 1
-                    else:
-                        st.warning(
-                            f"スキップ: {label} (既に見つからないか、タイトルが変更されています)"
-                        )
+                # まとめて1回で保存する
+                with gm.transaction():
+                    for label in papers_to_delete_safe:
+                        # ページリロード等でpaper_optionsが変わっている可能性があるためチェック
+                        if label in paper_options:
+                            uri = paper_options[label]
+                            gm.delete_paper(uri)
+                            st.toast(f"Deleted {label}")
+                            deleted_count += 1
+                        else:
+                            st.warning(
+                                f"スキップ: {label} (既に見つからないか、タイトルが変更されています)"
+                            )
 
                 if deleted_count > 0:
-                    clear_graph_manager_cache()  # キャッシュをクリアして最新データを反映
                     st.success(f"{deleted_count}件削除しました")
 
                 # 処理完了後にセッション状態をクリア
@@ -98,7 +99,6 @@ with col2:
         if confirm:
             if st.button("⚠️ Execute Delete", type="secondary"):
                 gm.clear_all()
-                clear_graph_manager_cache()  # キャッシュをクリアして最新データを反映
                 st.success("All data cleared.")
                 st.session_state.pop("show_clear_confirm", None)
                 st.session_state.pop("confirm_clear_now", None)
@@ -3,7 +3,7 @@ import json
 import pandas as pd
 from st_cytoscape import cytoscape
 from kgpaper.graph_manager import GraphManager
-from kgpaper.sparql_query import SparqlQuery
+from kgpaper.sparql_query import search_key
 
 st.set_page_config(page_title="Explore & Visualize", page_icon="🔍", layout="wide")
 st.title("🔍 Explore Knowledge Graph")
@@ -11,22 +11,28 @@ st.title("🔍 Explore Knowledge Graph")
 from kgpaper.utils import get_graph_manager
 
 gm = get_graph_manager()
-sq = SparqlQuery(gm.g)
 
-# session_stateの初期化
-if "explore_results" not in st.session_state:
-    st.session_state.explore_results = None
-    st.session_state.explore_initialized = False
+# 1ページ（Load more 1回）あたりの件数
+PAGE_SIZE = 200
+
+# session_stateの初期化（結果そのものではなく検索条件と読み込んだページのカーソルだけを保持する。初回は全件）
+if "explore_query" not in st.session_state:
+    st.session_state.explore_query = search_key()
+if "explore_cursors" not in st.session_state:
+    st.session_state.explore_cursors = [None]
 
 # message: filters
 st.sidebar.header("Filters")
 
 # 登録済み論文のタイトル一覧を取得
-papers = gm.get_all_papers()
+papers = gm.get_all_papers(sort="title")
 paper_titles = ["All"] + [p["title"] for p in papers]
 paper_title_selected = st.sidebar.selectbox("Paper Title", paper_titles)
 paper_title = paper_title_selected if paper_title_selected != "All" else None
 
+# 論文タイトルとコンテンツの本文の全文検索（空欄なら使わない）
+text_query = st.sidebar.text_input("Full-text Search", placeholder="e.g. 電解質, voltammetry")
+
 source_context = st.sidebar.selectbox("Source Context", ["All", "Main", "Support"])
 # Experiment TypeはURI形式（kg:Synthesis等）に対応
 experiment_type = st.sidebar.selectbox(
@@ -51,30 +57,33 @@ content_type = st.sidebar.selectbox(
     "Content Type", ["All", "method", "result", "discussion", "conclusion"]
 )
 
-# 初回表示時に全件を検索（フィルターなし）
-if not st.session_state.explore_initialized:
-    st.session_state.explore_results = sq.search()
-    st.session_state.explore_initialized = True
-
-# Searchボタンクリック時はフィルター条件で再検索
+# Searchボタンクリック時はフィルター条件を更新
 if st.sidebar.button("Search", type="primary"):
-    source_context_filter = source_context if source_context != "All" else None
-    experiment_type_filter = experiment_type if experiment_type != "All" else None
-    content_type_filter = content_type if content_type != "All" else None
-
-    st.session_state.explore_results = sq.search(
+    st.session_state.explore_query = search_key(
         paper_title=paper_title,
-        source_context=source_context_filter,
-        experiment_type=experiment_type_filter,
-        content_type=content_type_filter,
+        source_context=source_context,
+        experiment_type=experiment_type,
+        content_type=content_type,
+        text_query=text_query.strip() or None,
     )
+    st.session_state.explore_cursors = [None]
 
-# 結果の表示
-results = st.session_state.explore_results
+# 結果の表示（ページは全セッション共有のキャッシュから引き、データが変わった場合のみ再検索される）
+results = []
+next_cursor = None
+for cursor in st.session_state.explore_cursors:
+    rows, next_cursor = gm.search_page(
+        limit=PAGE_SIZE, cursor=cursor, **dict(st.session_state.explore_query)
+    )
+    results.extend(rows)
+if next_cursor is not None and st.sidebar.button(f"Load more ({PAGE_SIZE})"):
+    st.session_state.explore_cursors.append(next_cursor)
+    st.rerun()
 if not results:
     st.warning("No results found.")
 else:
-    st.subheader(f"Found {len(results)} items")
+    more = "+" if next_cursor is not None else ""
+    st.subheader(f"Found {len(results)}{more} items")
 
     # Display Data
     df = pd.DataFrame(results)
@@ -279,7 +288,7 @@ else:
     # 直接ダウンロードボタンを表示（2段階フローを削除）
     json_str = json.dumps(results, indent=2, ensure_ascii=False)
     st.download_button(
-        label="Download Filtered Results (JSON)",
+        label="Download Loaded Results (JSON)",
         data=json_str,
         file_name="results.json",
         mime="application/json",